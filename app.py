@@ -1,12 +1,40 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import folium
-from folium.plugins import HeatMap, MarkerCluster
 from streamlit_folium import st_folium
 import plotly.express as px
 import plotly.graph_objects as go
+import hashlib
+import io
+import json
 from datetime import datetime
+from functools import partial
+
+from puntorojo.almacen import RUTA_ALMACEN, Almacen
+from puntorojo.anomalias import detectar_anomalias
+from puntorojo.diagnostico import RUTA_LOG_DIAGNOSTICO, Diagnostico, configurar_log
+from puntorojo.columnar import exportar_arrow, exportar_parquet
+from puntorojo.escenarios import (
+    PARAMETROS_ESCENARIO, TOP_K_ESCENARIOS, evaluar_escenarios, escenarios_ejemplo
+)
+from puntorojo.espacial import (
+    ZOOM_MAXIMO, ZOOM_MINIMO, IndiceEspacial, agregar_calor_para_zoom, limites_vista
+)
+from puntorojo.excel import exportar_xlsx, hojas_reporte
+from puntorojo.filtros import IndiceFiltros
+from puntorojo.fusion import REGLA_CONFLICTO, REGLAS_CONFLICTO, cargar_archivos
+from puntorojo.hotspots import agrupar_hotspots
+from puntorojo.incremental import aplicar_delta, leer_delta
+from puntorojo.ingesta import calcular_metricas
+from puntorojo.mapa import CENTRO_MAPA, ZOOM_INICIAL, crear_mapa_calor, crear_mapa_rutas
+from puntorojo.muestreo import (
+    COLUMNA_PERDIDA_EXPANDIDA, COLUMNA_PESO, UMBRAL_VISTA_PREVIA, agregar_por_sector_ponderado,
+    estimar_totales, muestra_estratificada
+)
+from puntorojo.paginacion import COLUMNAS_ORDEN, TAMANOS_PAGINA, numero_paginas, obtener_pagina
+from puntorojo.prioridad import agregar_por_sector, calcular_prioridades
+from puntorojo.rutas import HORAS_JORNADA, TOP_K_RUTAS, planificar_rutas
+from puntorojo.series import incorporar_tendencias, leer_historial, metricas_historial
 
 # =============================================
 # CONFIGURACIÓN DE LA APP
@@ -68,225 +96,288 @@ def generar_datos_demo():
     
     df = pd.DataFrame(datos_demo)
     
-    # Calcular pérdidas y métricas
-    df['kWh_Perdido'] = df['kWh_Entregado'] - df['kWh_Facturado']
-    df['Perdida_%'] = (df['kWh_Perdido'] / df['kWh_Entregado']) * 100
-    df['Perdida_Monetaria_RD$'] = df['kWh_Perdido'] * 12.5  # Tarifa promedio RD$
-    df['Carga_%'] = (df['kWh_Entregado'] / (df['Capacidad_kVA'] * 730 * 0.8)) * 100
-    
-    return df
+    # Calcular pérdidas y métricas (tarifa y factor de carga en puntorojo.ingesta)
+    return calcular_metricas(df)
 
 # =============================================
 # FUNCIÓN DE CARGA Y VALIDACIÓN DE DATOS
 # =============================================
-def cargar_y_validar_datos(archivo):
+def cargar_y_validar_datos(origenes, regla=REGLA_CONFLICTO):
     """
-    Carga archivo Excel o CSV y valida columnas requeridas
+    Carga uno o varios archivos Excel, CSV, Parquet o Arrow IPC (rutas o
+    tuplas (nombre, contenido)), valida columnas requeridas y filas y fusiona
+    los archivos regionales; devuelve (df, df_rechazos, df_conflictos)
     """
     try:
-        if archivo.name.endswith('.csv'):
-            df = pd.read_csv(archivo)
-        elif archivo.name.endswith('.xlsx'):
-            df = pd.read_excel(archivo, engine='openpyxl')
-        else:
-            st.error("❌ Formato no soportado. Use CSV o XLSX")
-            return None
-        
-        # Columnas requeridas (flexibles con mayúsculas/minúsculas)
-        columnas_requeridas = {
-            'id_trafo': ['ID_Trafo', 'id_trafo', 'ID_TRAFO', 'Trafo_ID', 'trafo_id'],
-            'sector': ['Sector', 'sector', 'SECTOR', 'Zona', 'zona'],
-            'latitud': ['Latitud', 'latitud', 'LATITUD', 'Lat', 'lat'],
-            'longitud': ['Longitud', 'longitud', 'LONGITUD', 'Lon', 'lon', 'Long', 'long'],
-            'capacidad_kva': ['Capacidad_kVA', 'capacidad_kva', 'CAPACIDAD_KVA', 'kVA', 'kva'],
-            'kwh_entregado': ['kWh_Entregado', 'kwh_entregado', 'KWH_ENTREGADO', 'Entregado', 'entregado'],
-            'kwh_facturado': ['kWh_Facturado', 'kwh_facturado', 'KWH_FACTURADO', 'Facturado', 'facturado']
-        }
-        
-        # Mapeo de columnas
-        mapa_columnas = {}
-        for col_std, variantes in columnas_requeridas.items():
-            encontrada = False
-            for variante in variantes:
-                if variante in df.columns:
-                    mapa_columnas[variante] = col_std
-                    encontrada = True
-                    break
-            if not encontrada:
-                st.error(f"❌ No se encontró la columna: {col_std.upper()}. Variantes buscadas: {', '.join(variantes)}")
-                return None
-        
-        # Renombrar columnas
-        df.rename(columns=mapa_columnas, inplace=True)
-        
-        # Calcular métricas
-        df['kwh_perdido'] = df['kwh_entregado'] - df['kwh_facturado']
-        df['perdida_%'] = (df['kwh_perdido'] / df['kwh_entregado']) * 100
-        df['perdida_monetaria_rd$'] = df['kwh_perdido'] * 12.5
-        df['carga_%'] = (df['kwh_entregado'] / (df['capacidad_kva'] * 730 * 0.8)) * 100
-        
-        # Normalizar nombres de columnas para consistencia
-        df.columns = [
-            'ID_Trafo', 'Sector', 'Latitud', 'Longitud', 'Capacidad_kVA', 
-            'kWh_Entregado', 'kWh_Facturado', 'kWh_Perdido', 'Perdida_%', 
-            'Perdida_Monetaria_RD$', 'Carga_%'
-        ]
-        
-        st.success(f"✅ Archivo cargado: {len(df)} transformadores procesados")
-        return df
-        
+        df, df_rechazos, df_conflictos = cargar_archivos(origenes, regla)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return None, None, None
     except Exception as e:
         st.error(f"❌ Error al procesar el archivo: {str(e)}")
-        return None
+        return None, None, None
+    
+    if len(origenes) > 1:
+        st.success(f"✅ {len(origenes)} archivos fusionados: {len(df)} transformadores procesados")
+    else:
+        st.success(f"✅ Archivo cargado: {len(df)} transformadores procesados")
+    if len(df_rechazos):
+        st.warning(f"⚠️ {len(df_rechazos)} filas rechazadas por datos inválidos")
+    if len(df_conflictos):
+        st.warning(f"⚠️ {len(df_conflictos)} transformadores repetidos con datos distintos")
+    return df, df_rechazos, df_conflictos
+
+# =============================================
+# FORMATOS DE EXPORTACIÓN
+# =============================================
+MIME_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Formato -> (extensión, tipo MIME, serializador)
+FORMATOS_EXPORTACION = {
+    'CSV': ('csv', 'text/csv', lambda df: df.to_csv(index=False).encode('utf-8')),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet', exportar_parquet),
+    'Arrow IPC': ('arrow', 'application/vnd.apache.arrow.file', exportar_arrow),
+    'Excel': ('xlsx', MIME_XLSX, lambda df: exportar_xlsx({'Datos': df}))
+}
 
 # =============================================
-# ALGORITMO DE PRIORIZACIÓN
+# LISTADO PRIORIZADO
 # =============================================
-def calcular_prioridades(df):
+COLUMNAS_LISTADO = [
+    'ID_Trafo', 'Sector', 'Categoria_Prioridad', 'Prioridad_Score', 'Perdida_%',
+    'kWh_Perdido', 'Perdida_Monetaria_RD$', 'Carga_%'
+]
+
+def mostrar_detalle_transformador(row):
     """
-    Calcula prioridad de intervención basada en múltiples factores
+    Ficha de un transformador: datos técnicos, pérdidas y plan de intervención
     """
-    df_prioridad = df.copy()
-    
-    # Score de prioridad (0-100)
-    df_prioridad['Score_Volumen'] = (df_prioridad['kWh_Perdido'] / df_prioridad['kWh_Perdido'].max()) * 40
-    df_prioridad['Score_Porcentaje'] = (df_prioridad['Perdida_%'] / 100) * 30
-    df_prioridad['Score_Sobrecarga'] = df_prioridad['Carga_%'].apply(lambda x: 30 if x > 100 else (x/100)*15)
-    
-    df_prioridad['Prioridad_Score'] = (
-        df_prioridad['Score_Volumen'] + 
-        df_prioridad['Score_Porcentaje'] + 
-        df_prioridad['Score_Sobrecarga']
-    )
-    
-    # Categorizar prioridad
-    def categorizar_prioridad(row):
-        score = row['Prioridad_Score']
-        perdida = row['Perdida_%']
-        sector = row['Sector']
-        carga = row['Carga_%']
-        
-        # Lógica especializada por sector y condiciones
-        if sector in ['Ensanche Luperón', 'San Isidro'] and perdida > 50:
-            return 'CRÍTICA - Operativo Urgente'
-        elif carga > 100 and perdida > 40:
-            return 'CRÍTICA - Cambio Transformador'
-        elif score > 70:
-            return 'ALTA'
-        elif score > 40:
-            return 'MEDIA'
-        else:
-            return 'BAJA'
+    col_d1, col_d2 = st.columns([1, 2])
     
-    df_prioridad['Categoria_Prioridad'] = df_prioridad.apply(categorizar_prioridad, axis=1)
-    
-    # Generar sugerencias
-    def generar_sugerencia(row):
-        sector = row['Sector']
-        perdida = row['Perdida_%']
-        carga = row['Carga_%']
-        
-        sugerencias = []
-        
-        if sector in ['Ensanche Luperón', 'San Isidro'] and perdida > 50:
-            sugerencias.append("🔴 OPERATIVO DE NORMALIZACIÓN: Blindaje de red y regularización de conexiones directas")
-        
-        if carga > 100:
-            sugerencias.append(f"⚡ CAMBIO DE TRANSFORMADOR: Sobrecarga del {carga:.0f}% - Capacidad insuficiente")
+    with col_d1:
+        st.markdown(f"""
+        **Datos Técnicos:**
+        - Capacidad: {row['Capacidad_kVA']:,.0f} kVA
+        - Carga: {row['Carga_%']:.0f}%
+        - Entregado: {row['kWh_Entregado']:,.0f} kWh
+        - Facturado: {row['kWh_Facturado']:,.0f} kWh
+        """)
         
-        if perdida > 60:
-            sugerencias.append("🔍 INSPECCIÓN TÉCNICA: Posible fraude masivo o falla en medición")
-        elif perdida > 40:
-            sugerencias.append("📋 AUDITORÍA DE RED: Revisar conexiones no autorizadas")
+        st.markdown(f"""
+        **Pérdidas:**
+        - Porcentaje: **{row['Perdida_%']:.1f}%**
+        - Volumen: {row['kWh_Perdido']:,.0f} kWh
+        - Impacto: RD$ {row['Perdida_Monetaria_RD$']:,.2f}
+        """)
         
-        if perdida > 30 and carga < 70:
-            sugerencias.append("🔧 MANTENIMIENTO PREVENTIVO: Revisar estado de conductores y empalmes")
+        if row['Anomalia']:
+            st.markdown(f"""
+        **Anomalía estadística:**
+        - Z robusto en su sector: {row['Z_Robusto_Sector']:.1f}
+        - Z frente a vecinos: {row['Z_Espacial']:.1f}
+        """)
         
-        return ' | '.join(sugerencias) if sugerencias else 'Monitoreo regular'
-    
-    df_prioridad['Sugerencia_Intervencion'] = df_prioridad.apply(generar_sugerencia, axis=1)
+        if row.get('Meses_Historial', 0) > 0:
+            st.markdown(f"""
+        **Historial ({row['Meses_Historial']} meses):**
+        - Pérdida móvil: {row['Perdida_%_Movil']:.1f}%
+        - Tendencia: {row['Tendencia_pp_Mes']:+.2f} pp/mes
+        - Salto último mes: {row['Salto_pp']:+.1f} pp
+        """)
     
-    return df_prioridad.sort_values('Prioridad_Score', ascending=False)
+    with col_d2:
+        st.markdown("**🎯 Plan de Intervención Sugerido:**")
+        st.warning(row['Sugerencia_Intervencion'])
+        
+        # Indicador visual de prioridad
+        if 'CRÍTICA' in row['Categoria_Prioridad']:
+            st.error("⚠️ **ACCIÓN INMEDIATA REQUERIDA**")
+        elif row['Categoria_Prioridad'] == 'ALTA':
+            st.warning("⚡ **INTERVENCIÓN PRIORITARIA**")
+        else:
+            st.info("📋 Programar revisión")
+
+# =============================================
+# MAPA
+# =============================================
+ANCHO_MAPA_PX = 1400
+ALTO_MAPA_PX = 600
 
 # =============================================
-# GENERACIÓN DE MAPA INTERACTIVO
+# CACHÉ ENTRE RERUNS
 # =============================================
-def crear_mapa_calor(df):
+# Cada interacción con un widget re-ejecuta el script completo. Los resultados
+# pesados se memorizan por huella del contenido del archivo (SHA-256), de modo
+# que cambiar un filtro sólo vuelve a filtrar.
+MAX_DATASETS_CACHE = 4
+# Mapas construidos (dataset, zoom y vista) que se conservan
+MAX_MAPAS_CACHE = 16
+
+# Opciones del selector de transformadores intervenidos (los de mayor prioridad)
+MAX_OPCIONES_INTERVENCION = 500
+TIPOS_INTERVENCION = ['Normalización', 'Cambio de transformador', 'Inspección técnica', 'Auditoría de red']
+
+# Filas de los reportes de rechazos y repetidos que se muestran (la descarga las incluye todas)
+MAX_RECHAZOS_VISIBLES = 1000
+
+def huella_contenido(contenido):
+    """
+    Huella SHA-256 del contenido del archivo subido
+    """
+    return hashlib.sha256(contenido).hexdigest()
+
+@st.cache_data(max_entries=MAX_DATASETS_CACHE, show_spinner="Procesando archivo...")
+def cargar_datos_cacheado(huella, nombres, regla, _contenidos):
+    """
+    Parsea, valida y fusiona los archivos una sola vez por contenido: devuelve (df, df_rechazos, df_conflictos)
     """
-    Crea mapa de calor con marcadores categorizados por pérdida
+    return cargar_y_validar_datos(list(zip(nombres, _contenidos)), regla)
+
+@st.cache_data(max_entries=MAX_DATASETS_CACHE, show_spinner="Procesando historial...")
+def incorporar_historial_cacheado(huella, huella_historial, nombre_historial, _contenido_historial, _df):
+    """
+    Calcula las métricas de historial mensual y las añade al dataset una sola vez por par (dataset, historial)
+    """
+    archivo = io.BytesIO(_contenido_historial)
+    archivo.name = nombre_historial
+    return incorporar_tendencias(_df, metricas_historial(leer_historial(archivo)))
+
+@st.cache_data(max_entries=MAX_DATASETS_CACHE, show_spinner="Tomando muestra para la vista previa...")
+def muestra_cacheado(huella, _df):
+    """
+    Muestra estratificada por sector y ponderada por pérdida, una sola vez por dataset
+    """
+    return muestra_estratificada(_df)
+
+@st.cache_data(max_entries=MAX_DATASETS_CACHE, show_spinner=False)
+def priorizar_cacheado(huella, _df):
+    """
+    Detecta anomalías y calcula prioridades una sola vez por dataset
+    """
+    return calcular_prioridades(detectar_anomalias(_df))
+
+@st.cache_data(max_entries=MAX_DATASETS_CACHE, show_spinner=False)
+def agregar_por_sector_cacheado(huella, _df_priorizado):
+    """
+    Agrega por sector una sola vez por dataset (ponderado por el peso muestral en la vista previa)
+    """
+    if COLUMNA_PESO in _df_priorizado:
+        return agregar_por_sector_ponderado(_df_priorizado)
+    return agregar_por_sector(_df_priorizado)
+
+@st.cache_data(max_entries=MAX_DATASETS_CACHE, show_spinner="Aplicando delta...")
+def aplicar_delta_cacheado(huella, huella_delta, nombre_delta, _contenido_delta, _df_priorizado, _df_sector):
+    """
+    Aplica el delta mensual al dataset priorizado una sola vez por par (dataset, delta)
+    """
+    archivo = io.BytesIO(_contenido_delta)
+    archivo.name = nombre_delta
+    return aplicar_delta(_df_priorizado, _df_sector, leer_delta(archivo))
+
+@st.cache_resource(show_spinner=False)
+def almacen_cacheado(ruta):
+    """
+    Abre (y crea si hace falta) el almacén persistente de periodos una sola vez por proceso
+    """
+    return Almacen(ruta)
+
+@st.cache_resource(max_entries=MAX_DATASETS_CACHE, show_spinner=False)
+def indice_espacial_cacheado(huella, _df_priorizado):
+    """
+    Construye el índice espacial una sola vez por dataset (objeto compartido, de sólo lectura)
+    """
+    return IndiceEspacial(_df_priorizado)
+
+@st.cache_resource(max_entries=MAX_DATASETS_CACHE, show_spinner=False)
+def indice_filtros_cacheado(huella, _df_priorizado):
+    """
+    Construye el índice de filtros del listado una sola vez por dataset (objeto compartido, de sólo lectura)
+    """
+    return IndiceFiltros(_df_priorizado)
+
+@st.cache_data(max_entries=MAX_DATASETS_CACHE, show_spinner=False)
+def hotspots_cacheado(huella, _df_priorizado):
     """
-    # Centro del mapa: Corredor Este RD
-    mapa = folium.Map(
-        location=[18.48, -69.65],
-        zoom_start=11,
-        tiles='OpenStreetMap'
+    Agrupa los hotspots de pérdida una sola vez por dataset
+    """
+    return agrupar_hotspots(_df_priorizado)[1]
+
+@st.cache_data(max_entries=MAX_DATASETS_CACHE * 4, show_spinner="Planificando rutas...")
+def planificar_rutas_cacheado(huella, cuadrillas, dias, top_k, horas_jornada, base, _df_priorizado):
+    """
+    Planifica rutas de cuadrillas una sola vez por dataset y parámetros
+    """
+    return planificar_rutas(_df_priorizado, cuadrillas, dias, base=base, top_k=top_k, horas_jornada=horas_jornada)
+
+@st.cache_data(max_entries=MAX_DATASETS_CACHE * 2, show_spinner=False)
+def exportar_cacheado(huella, formato, reporte, _df):
+    """
+    Serializa una exportación sólo al descargarla y una sola vez por dataset, formato y reporte
+    """
+    return FORMATOS_EXPORTACION[formato][2](_df)
+
+@st.cache_data(max_entries=MAX_DATASETS_CACHE, show_spinner=False)
+def reporte_excel_cacheado(huella, _df_priorizado, _df_sector):
+    """
+    Genera el reporte Excel de varias hojas sólo al descargarlo y una sola vez por dataset
+    """
+    return exportar_xlsx(hojas_reporte(_df_priorizado, _df_sector))
+
+@st.cache_data(max_entries=MAX_DATASETS_CACHE * 4, show_spinner="Evaluando escenarios...")
+def evaluar_escenarios_cacheado(huella, escenarios, top_k, _df_priorizado):
+    """
+    Evalúa los escenarios una sola vez por dataset, tabla de escenarios y K
+    """
+    return evaluar_escenarios(_df_priorizado, escenarios, top_k)
+
+@st.cache_data(max_entries=MAX_DATASETS_CACHE * (ZOOM_MAXIMO - ZOOM_MINIMO + 1), show_spinner=False)
+def agregar_calor_cacheado(huella, zoom, _df_priorizado):
+    """
+    Preagrega la capa de calor una sola vez por dataset y nivel de zoom (con la pérdida expandida en la vista previa)
+    """
+    if COLUMNA_PERDIDA_EXPANDIDA in _df_priorizado:
+        return agregar_calor_para_zoom(_df_priorizado, zoom, COLUMNA_PERDIDA_EXPANDIDA)
+    return agregar_calor_para_zoom(_df_priorizado, zoom)
+
+@st.cache_data(max_entries=MAX_MAPAS_CACHE, show_spinner="Construyendo mapa...")
+def mapa_calor_cacheado(huella, zoom, caja_vista, _df_priorizado, _posiciones_vista):
+    """
+    Construye el mapa de calor una sola vez por dataset, zoom y vista.
+
+    Cada llamada devuelve una copia (deserializar es mucho más barato que
+    construir): st_folium modifica el mapa al renderizarlo.
+    """
+    return crear_mapa_calor(
+        _df_priorizado.iloc[_posiciones_vista],
+        agregar_calor_cacheado(huella, zoom, _df_priorizado),
+        hotspots_cacheado(huella, _df_priorizado)
     )
+
+@st.cache_data(max_entries=MAX_DATASETS_CACHE, show_spinner=False)
+def figuras_sector_cacheado(huella, _df_sector):
+    """
+    Gráficos por sector (pérdida e impacto) como JSON de Plotly, una sola vez por dataset
+    """
+    fig1 = px.bar(
+        _df_sector,
+        x='Sector',
+        y='kWh_Perdido_Total',
+        title='Energía Perdida por Sector (kWh)',
+        color='Perdida_%_Promedio',
+        color_continuous_scale='RdYlGn_r',
+        labels={'kWh_Perdido_Total': 'kWh Perdidos', 'Perdida_%_Promedio': '% Pérdida Promedio'}
+    )
+    fig1.update_layout(xaxis_tickangle=-45, height=400)
     
-    # Agregar capa de calor
-    heat_data = [[row['Latitud'], row['Longitud'], row['kWh_Perdido']] 
-                 for idx, row in df.iterrows()]
-    HeatMap(heat_data, radius=15, blur=25, max_zoom=13, gradient={
-        0.0: 'green', 0.3: 'yellow', 0.5: 'orange', 0.7: 'red', 1.0: 'darkred'
-    }).add_to(mapa)
-    
-    # Agregar marcadores con categorización por color
-    for idx, row in df.iterrows():
-        perdida = row['Perdida_%']
-        
-        # Determinar color y tamaño
-        if perdida > 50:
-            color = 'red'
-            radius = 12
-            icono = '🔴'
-        elif perdida > 30:
-            color = 'orange'
-            radius = 10
-            icono = '🟠'
-        else:
-            color = 'green'
-            radius = 8
-            icono = '🟢'
-        
-        # Crear popup con información detallada
-        popup_html = f"""
-        <div style="font-family: Arial; width: 250px;">
-            <h4 style="margin:0; color:{color};">{icono} {row['ID_Trafo']}</h4>
-            <hr style="margin:5px 0;">
-            <b>Sector:</b> {row['Sector']}<br>
-            <b>Pérdida:</b> {perdida:.1f}%<br>
-            <b>Energía Perdida:</b> {row['kWh_Perdido']:,.0f} kWh<br>
-            <b>Impacto Monetario:</b> RD$ {row['Perdida_Monetaria_RD$']:,.2f}<br>
-            <b>Capacidad:</b> {row['Capacidad_kVA']} kVA<br>
-            <b>Carga:</b> {row['Carga_%']:.0f}%
-        </div>
-        """
-        
-        folium.CircleMarker(
-            location=[row['Latitud'], row['Longitud']],
-            radius=radius,
-            popup=folium.Popup(popup_html, max_width=300),
-            color=color,
-            fill=True,
-            fillColor=color,
-            fillOpacity=0.7,
-            weight=2
-        ).add_to(mapa)
-    
-    # Agregar leyenda
-    legend_html = """
-    <div style="position: fixed; 
-                bottom: 50px; right: 50px; width: 180px; height: 120px; 
-                background-color: white; border:2px solid grey; z-index:9999; 
-                font-size:14px; padding: 10px">
-        <p style="margin:0;"><b>Nivel de Pérdida</b></p>
-        <p style="margin:5px 0;"><span style="color:red;">🔴</span> > 50% - CRÍTICO</p>
-        <p style="margin:5px 0;"><span style="color:orange;">🟠</span> 30-50% - ALTO</p>
-        <p style="margin:5px 0;"><span style="color:green;">🟢</span> < 30% - NORMAL</p>
-    </div>
-    """
-    mapa.get_root().html.add_child(folium.Element(legend_html))
-    
-    return mapa
+    fig2 = px.pie(
+        _df_sector,
+        values='Impacto_Monetario',
+        names='Sector',
+        title='Distribución de Impacto Monetario por Sector',
+        hole=0.4
+    )
+    fig2.update_traces(textposition='inside', textinfo='percent+label')
+    return json.loads(fig1.to_json()), json.loads(fig2.to_json())
 
 # =============================================
 # INTERFAZ PRINCIPAL
@@ -306,24 +397,92 @@ with st.sidebar:
         help="Use el modo demo para ver el funcionamiento o cargue su archivo"
     )
     
+    # Mediciones por etapa; desactivado no toma tiempos ni renderiza el mapa aparte
+    mostrar_diagnostico = st.checkbox(
+        "🩺 Panel de diagnóstico",
+        value=False,
+        help=f"Tiempo, filas y memoria de cada etapa; también se registran en {RUTA_LOG_DIAGNOSTICO}"
+    )
+    diagnostico = Diagnostico(mostrar_diagnostico, modo=modo)
+    if mostrar_diagnostico:
+        configurar_log()
+    
     st.markdown("---")
     
     if modo == "📁 Cargar Datos Reales":
         st.markdown("### 📤 Subir Archivo")
-        archivo = st.file_uploader(
-            "Seleccione archivo Excel (.xlsx) o CSV",
-            type=['xlsx', 'csv'],
-            help="El archivo debe contener: ID_Trafo, Sector, Latitud, Longitud, Capacidad_kVA, kWh_Entregado, kWh_Facturado"
+        archivos = st.file_uploader(
+            "Seleccione archivos Excel (.xlsx), CSV, Parquet o Arrow",
+            type=['xlsx', 'csv', 'parquet', 'arrow', 'feather'],
+            accept_multiple_files=True,
+            help="Uno o varios archivos regionales (DN, SDE, San Pedro...) con: ID_Trafo, Sector, Latitud, Longitud, Capacidad_kVA, kWh_Entregado, kWh_Facturado"
         )
         
-        if archivo:
-            df = cargar_y_validar_datos(archivo)
+        if archivos:
+            contenidos = [archivo.getvalue() for archivo in archivos]
+            nombres = [archivo.name for archivo in archivos]
+            if len(archivos) > 1:
+                regla = st.selectbox(
+                    "Transformadores repetidos entre archivos",
+                    options=list(REGLAS_CONFLICTO),
+                    format_func=lambda r: REGLAS_CONFLICTO[r][0],
+                    index=list(REGLAS_CONFLICTO).index(REGLA_CONFLICTO)
+                )
+                huella_datos = huella_contenido(
+                    '|'.join(huella_contenido(contenido) for contenido in contenidos).encode() + regla.encode()
+                )
+            else:
+                regla = REGLA_CONFLICTO
+                huella_datos = huella_contenido(contenidos[0])
+            with diagnostico.etapa('Carga y validación') as medida:
+                df, df_rechazos, df_conflictos = cargar_datos_cacheado(huella_datos, nombres, regla, contenidos)
+                medida['filas'] = None if df is None else len(df)
+                medida['bytes'] = sum(len(contenido) for contenido in contenidos)
+            
+            if df_conflictos is not None and len(df_conflictos):
+                with st.expander(f"🔀 Transformadores repetidos ({len(df_conflictos)})"):
+                    st.dataframe(df_conflictos.head(MAX_RECHAZOS_VISIBLES), hide_index=True)
+                    st.download_button(
+                        label="📥 Descargar reporte de repetidos",
+                        data=df_conflictos.to_csv(index=False).encode('utf-8'),
+                        file_name=f"repetidos_{datetime.now().strftime('%Y%m%d')}.csv",
+                        mime="text/csv"
+                    )
+            
+            if df_rechazos is not None and len(df_rechazos):
+                with st.expander(f"🚫 Filas rechazadas ({len(df_rechazos)})"):
+                    st.dataframe(df_rechazos.head(MAX_RECHAZOS_VISIBLES), hide_index=True)
+                    st.download_button(
+                        label="📥 Descargar reporte de rechazos",
+                        data=df_rechazos.to_csv(index=False).encode('utf-8'),
+                        file_name=f"rechazos_{datetime.now().strftime('%Y%m%d')}.csv",
+                        mime="text/csv"
+                    )
+            
+            # Historial mensual: pérdida móvil, tendencia y saltos como factor del score
+            archivo_historial = st.file_uploader(
+                "Historial mensual (opcional)",
+                type=['xlsx', 'csv', 'parquet', 'arrow', 'feather'],
+                help="Lecturas de 24-36 meses: ID_Trafo, Periodo, kWh_Entregado, kWh_Facturado"
+            )
+            
+            # Delta mensual: sólo se recalculan los transformadores con nuevas lecturas
+            archivo_delta = st.file_uploader(
+                "Actualización mensual (opcional)",
+                type=['xlsx', 'csv', 'parquet', 'arrow', 'feather'],
+                help="Archivo con nuevas lecturas: ID_Trafo, kWh_Entregado, kWh_Facturado"
+            )
         else:
             df = None
+            archivo_historial = None
+            archivo_delta = None
             st.info("⬆️ Suba un archivo para comenzar el análisis")
     else:
         st.success("✅ Usando datos de demostración")
         df = generar_datos_demo()
+        huella_datos = 'demo'
+        archivo_historial = None
+        archivo_delta = None
         
         with st.expander("ℹ️ Sobre los Datos Demo"):
             st.markdown("""
@@ -342,223 +501,618 @@ with st.sidebar:
 # Contenido principal
 if df is not None and len(df) > 0:
     
-    # Calcular prioridades
-    df_priorizado = calcular_prioridades(df)
+    if archivo_historial:
+        contenido_historial = archivo_historial.getvalue()
+        huella_historial = huella_contenido(contenido_historial)
+        try:
+            with diagnostico.etapa('Historial', filas=len(df)) as medida:
+                df = incorporar_historial_cacheado(
+                    huella_datos, huella_historial, archivo_historial.name, contenido_historial, df
+                )
+                medida['bytes'] = len(contenido_historial)
+        except Exception as e:
+            st.sidebar.error(f"❌ Error al procesar el historial: {str(e)}")
+        else:
+            huella_datos = f"{huella_datos}+{huella_historial}"
+            st.sidebar.success(
+                f"✅ Historial aplicado: {(df['Meses_Historial'] > 0).sum()} transformadores con lecturas mensuales"
+            )
+    
+    # Vista previa aproximada: en datasets muy grandes (sin delta, que actualiza
+    # transformadores concretos) el pipeline corre sobre una muestra estratificada
+    n_total = len(df)
+    vista_previa = False
+    if n_total > UMBRAL_VISTA_PREVIA and not archivo_delta:
+        vista_previa = st.sidebar.toggle(
+            "⚡ Vista previa aproximada",
+            value=True,
+            help="Analiza una muestra estratificada por sector y ponderada por pérdida (incluye todos los "
+                 "transformadores CRÍTICA); desactívela para el cálculo exacto"
+        )
+    if vista_previa:
+        with diagnostico.etapa('Muestra de vista previa', filas=n_total) as medida:
+            df = muestra_cacheado(huella_datos, df)
+            medida['filas'] = len(df)
+        huella_datos = f"{huella_datos}+muestra"
+    
+    # Calcular prioridades y agregados (memorizados por huella del dataset)
+    diagnostico.contexto['huella'] = huella_datos[:16]
+    with diagnostico.etapa('Anomalías y prioridades', filas=len(df)):
+        df_priorizado = priorizar_cacheado(huella_datos, df)
+    with diagnostico.etapa('Agregado por sector') as medida:
+        df_sector = agregar_por_sector_cacheado(huella_datos, df_priorizado)
+        medida['filas'] = len(df_sector)
+    
+    if archivo_delta:
+        contenido_delta = archivo_delta.getvalue()
+        huella_delta = huella_contenido(contenido_delta)
+        try:
+            with diagnostico.etapa('Delta mensual') as medida:
+                df_priorizado, df_sector, resumen_delta = aplicar_delta_cacheado(
+                    huella_datos, huella_delta, archivo_delta.name, contenido_delta, df_priorizado, df_sector
+                )
+                medida['filas'] = resumen_delta['actualizados']
+                medida['bytes'] = len(contenido_delta)
+        except Exception as e:
+            st.sidebar.error(f"❌ Error al aplicar la actualización: {str(e)}")
+        else:
+            # Los cálculos posteriores (índice, calor) se memorizan por dataset actualizado
+            huella_datos = f"{huella_datos}+{huella_delta}"
+            st.sidebar.success(
+                f"✅ Actualización aplicada: {resumen_delta['actualizados']} transformadores recalculados"
+            )
+            if resumen_delta['no_encontrados']:
+                st.sidebar.warning(f"⚠️ {resumen_delta['no_encontrados']} ID_Trafo del delta no existen en el dataset")
     
     # Métricas globales
     st.markdown("## 📈 Indicadores Generales")
     col1, col2, col3, col4 = st.columns(4)
     
+    if vista_previa:
+        # Totales estimados desde la muestra, con su intervalo de confianza del 95%
+        totales = estimar_totales(df_priorizado)
+        (total_entregado, margen_entregado), (total_facturado, margen_facturado) = (
+            totales['kWh_Entregado'], totales['kWh_Facturado']
+        )
+        (perdida_total, margen_perdida), (perdida_pct, margen_pct) = totales['kWh_Perdido'], totales['Perdida_%']
+        impacto_monetario, margen_impacto = totales['Perdida_Monetaria_RD$']
+        prefijo = "≈ "
+    else:
+        total_entregado = df_priorizado['kWh_Entregado'].sum()
+        total_facturado = df_priorizado['kWh_Facturado'].sum()
+        perdida_total = df_priorizado['kWh_Perdido'].sum()
+        perdida_pct = (perdida_total / total_entregado) * 100
+        impacto_monetario = df_priorizado['Perdida_Monetaria_RD$'].sum()
+        prefijo = ""
+    
     with col1:
-        total_entregado = df['kWh_Entregado'].sum()
         st.metric(
             "Energía Entregada",
-            f"{total_entregado/1e6:.2f} MWh",
+            f"{prefijo}{total_entregado/1e6:.2f} MWh",
+            f"± {margen_entregado/1e6:.2f} MWh (IC 95%)" if vista_previa else None,
+            delta_color="off",
             help="Total de energía distribuida"
         )
     
     with col2:
-        total_facturado = df['kWh_Facturado'].sum()
         st.metric(
             "Energía Facturada",
-            f"{total_facturado/1e6:.2f} MWh",
+            f"{prefijo}{total_facturado/1e6:.2f} MWh",
+            f"± {margen_facturado/1e6:.2f} MWh (IC 95%)" if vista_previa else None,
+            delta_color="off",
             help="Total de energía cobrada"
         )
     
     with col3:
-        perdida_total = df['kWh_Perdido'].sum()
-        perdida_pct = (perdida_total / total_entregado) * 100
         st.metric(
             "Pérdida Total",
-            f"{perdida_pct:.1f}%",
-            f"-{perdida_total/1e6:.2f} MWh",
+            f"{prefijo}{perdida_pct:.1f}%" + (f" ± {margen_pct:.1f}" if vista_previa else ""),
+            f"-{perdida_total/1e6:.2f} MWh" + (f" ± {margen_perdida/1e6:.2f}" if vista_previa else ""),
             delta_color="inverse"
         )
     
     with col4:
-        impacto_monetario = df['Perdida_Monetaria_RD$'].sum()
         st.metric(
             "Impacto Monetario",
-            f"RD$ {impacto_monetario/1e6:.2f}M",
+            f"{prefijo}RD$ {impacto_monetario/1e6:.2f}M",
+            f"± RD$ {margen_impacto/1e6:.2f}M (IC 95%)" if vista_previa else None,
+            delta_color="off",
             help="Pérdida estimada en pesos dominicanos"
         )
     
+    if vista_previa:
+        st.caption(
+            f"⚡ Vista previa aproximada: {len(df_priorizado):,} de {n_total:,} transformadores "
+            "(muestra estratificada por sector, ponderada por pérdida, con todos los CRÍTICA). "
+            "Totales, sectores y mapa de calor se expanden por el peso muestral; el listado y las "
+            "exportaciones contienen sólo la muestra. Desactive la vista previa para el cálculo exacto."
+        )
+    
     st.markdown("---")
     
     # Panel de priorización
     st.markdown("## 🎯 Panel de Priorización de Intervenciones")
     
-    tab1, tab2, tab3 = st.tabs(["🗺️ Mapa de Calor", "📊 Análisis por Sector", "📋 Lista Priorizada"])
+    # Índice espacial y vista actual del mapa (devuelta por st_folium en la interacción anterior)
+    with diagnostico.etapa('Índice espacial', filas=len(df_priorizado)):
+        indice_espacial = indice_espacial_cacheado(huella_datos, df_priorizado)
+    vista_mapa = st.session_state.get('mapa_calor') or {}
+    zoom_mapa = min(max(int(vista_mapa.get('zoom') or ZOOM_INICIAL), ZOOM_MINIMO), ZOOM_MAXIMO)
+    centro_vista = vista_mapa.get('center')
+    centro_mapa = (centro_vista['lat'], centro_vista['lng']) if centro_vista else CENTRO_MAPA
+    limites = vista_mapa.get('bounds') or {}
+    if limites.get('_southWest') and limites.get('_northEast'):
+        caja_vista = (
+            limites['_southWest']['lat'], limites['_northEast']['lat'],
+            limites['_southWest']['lng'], limites['_northEast']['lng']
+        )
+    else:
+        caja_vista = limites_vista(centro_mapa, zoom_mapa, ANCHO_MAPA_PX, ALTO_MAPA_PX)
+    with diagnostico.etapa('Consulta de la vista') as medida:
+        posiciones_vista = indice_espacial.consultar_caja(*caja_vista)
+        medida['filas'] = len(posiciones_vista)
+    
+    # Vistas perezosas: sólo se ejecuta el contenido de la pestaña activa (cambiar
+    # de pestaña re-ejecuta el script). Los widgets de las pestañas ocultas
+    # conservan su valor con persist_state.
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(
+        ["🗺️ Mapa de Calor", "📊 Análisis por Sector", "📋 Lista Priorizada", "🧪 Escenarios", "📈 Seguimiento"],
+        key='vista_principal',
+        on_change='rerun'
+    )
     
     with tab1:
-        st.markdown("### Visualización Geoespacial de Pérdidas")
-        
-        # Crear y mostrar mapa
-        mapa = crear_mapa_calor(df_priorizado)
-        st_folium(mapa, width=1400, height=600)
-        
-        st.info("""
-        **Cómo interpretar el mapa:**
-        - Las zonas **rojas intensas** en el mapa de calor indican alta concentración de pérdidas
-        - Los marcadores **🔴 rojos** representan transformadores con >50% de pérdida (CRÍTICO)
-        - Los marcadores **🟠 naranjas** indican pérdidas entre 30-50% (ATENCIÓN)
-        - Los marcadores **🟢 verdes** muestran operación normal (<30% pérdida)
-        - Haga clic en cualquier marcador para ver detalles específicos
-        """)
+        if tab1.open:
+            st.markdown("### Visualización Geoespacial de Pérdidas")
+            
+            # Crear y mostrar mapa: calor de todo el dataset a la resolución del zoom
+            # actual, marcadores sólo para los transformadores dentro de la vista
+            with diagnostico.etapa('Mapa de la vista', filas=len(posiciones_vista)) as medida:
+                mapa = mapa_calor_cacheado(huella_datos, zoom_mapa, caja_vista, df_priorizado, posiciones_vista)
+                if diagnostico.activo:
+                    # Tamaño del HTML que se envía al navegador (sobre otra copia: renderizar la modifica)
+                    medida['bytes'] = len(
+                        mapa_calor_cacheado(huella_datos, zoom_mapa, caja_vista, df_priorizado, posiciones_vista)
+                        .get_root().render().encode('utf-8')
+                    )
+            with diagnostico.etapa('Envío del mapa (st_folium)'):
+                st_folium(
+                    mapa,
+                    width=ANCHO_MAPA_PX,
+                    height=ALTO_MAPA_PX,
+                    zoom=zoom_mapa,
+                    center=centro_mapa,
+                    key='mapa_calor',
+                    returned_objects=['zoom', 'center', 'bounds']
+                )
+            st.caption(f"Marcadores en la vista actual: {len(posiciones_vista):,} de {len(df_priorizado):,} transformadores")
+            
+            st.info("""
+            **Cómo interpretar el mapa:**
+            - Las zonas **rojas intensas** en el mapa de calor indican alta concentración de pérdidas
+            - Los marcadores **🔴 rojos** representan transformadores con >50% de pérdida (CRÍTICO)
+            - Los marcadores **🟠 naranjas** indican pérdidas entre 30-50% (ATENCIÓN)
+            - Los marcadores **🟢 verdes** muestran operación normal (<30% pérdida)
+            - Las zonas con **borde rojo punteado** son hotspots: concentraciones de pérdida que pueden cruzar sectores
+            - Haga clic en cualquier marcador para ver detalles específicos
+            """)
     
     with tab2:
-        st.markdown("### Análisis Comparativo por Sector")
-        
-        # Agrupar por sector
-        df_sector = df_priorizado.groupby('Sector').agg({
-            'kWh_Perdido': 'sum',
-            'Perdida_%': 'mean',
-            'Perdida_Monetaria_RD$': 'sum',
-            'ID_Trafo': 'count'
-        }).reset_index()
-        df_sector.columns = ['Sector', 'kWh_Perdido_Total', 'Perdida_%_Promedio', 'Impacto_Monetario', 'Num_Transformadores']
-        df_sector = df_sector.sort_values('kWh_Perdido_Total', ascending=False)
-        
-        col_g1, col_g2 = st.columns(2)
-        
-        with col_g1:
-            # Gráfico de barras: Pérdida por sector
-            fig1 = px.bar(
-                df_sector,
-                x='Sector',
-                y='kWh_Perdido_Total',
-                title='Energía Perdida por Sector (kWh)',
-                color='Perdida_%_Promedio',
-                color_continuous_scale='RdYlGn_r',
-                labels={'kWh_Perdido_Total': 'kWh Perdidos', 'Perdida_%_Promedio': '% Pérdida Promedio'}
-            )
-            fig1.update_layout(xaxis_tickangle=-45, height=400)
-            st.plotly_chart(fig1, use_container_width=True)
-        
-        with col_g2:
-            # Gráfico circular: Distribución de impacto monetario
-            fig2 = px.pie(
-                df_sector,
-                values='Impacto_Monetario',
-                names='Sector',
-                title='Distribución de Impacto Monetario por Sector',
-                hole=0.4
-            )
-            fig2.update_traces(textposition='inside', textinfo='percent+label')
-            st.plotly_chart(fig2, use_container_width=True)
-        
-        # Tabla resumen por sector
-        st.markdown("#### 📊 Resumen Detallado por Sector")
-        df_sector_display = df_sector.copy()
-        df_sector_display['kWh_Perdido_Total'] = df_sector_display['kWh_Perdido_Total'].apply(lambda x: f"{x:,.0f}")
-        df_sector_display['Perdida_%_Promedio'] = df_sector_display['Perdida_%_Promedio'].apply(lambda x: f"{x:.1f}%")
-        df_sector_display['Impacto_Monetario'] = df_sector_display['Impacto_Monetario'].apply(lambda x: f"RD$ {x:,.2f}")
-        
-        st.dataframe(df_sector_display, use_container_width=True, hide_index=True)
+        if tab2.open:
+            st.markdown("### Análisis Comparativo por Sector")
+            
+            with diagnostico.etapa('Gráficos por sector', filas=len(df_sector)):
+                figura_perdida, figura_impacto = figuras_sector_cacheado(huella_datos, df_sector)
+                col_g1, col_g2 = st.columns(2)
+                
+                with col_g1:
+                    st.plotly_chart(figura_perdida, use_container_width=True)
+                
+                with col_g2:
+                    st.plotly_chart(figura_impacto, use_container_width=True)
+            
+            # Tabla resumen por sector
+            st.markdown("#### 📊 Resumen Detallado por Sector")
+            df_sector_display = df_sector.copy()
+            df_sector_display['kWh_Perdido_Total'] = df_sector_display['kWh_Perdido_Total'].apply(lambda x: f"{x:,.0f}")
+            df_sector_display['Perdida_%_Promedio'] = df_sector_display['Perdida_%_Promedio'].apply(lambda x: f"{x:.1f}%")
+            df_sector_display['Impacto_Monetario'] = df_sector_display['Impacto_Monetario'].apply(lambda x: f"RD$ {x:,.2f}")
+            
+            st.dataframe(df_sector_display, use_container_width=True, hide_index=True)
+            
+            # Hotspots espaciales: agrupamiento por ubicación, independiente del sector
+            st.markdown("#### 🔥 Hotspots de Pérdida (agrupamiento espacial)")
+            df_hotspots = hotspots_cacheado(huella_datos, df_priorizado)
+            if len(df_hotspots):
+                df_hotspots_display = df_hotspots.drop(columns=['Poligono'])
+                df_hotspots_display['kWh_Perdido_Total'] = df_hotspots_display['kWh_Perdido_Total'].apply(lambda x: f"{x:,.0f}")
+                df_hotspots_display['Perdida_%'] = df_hotspots_display['Perdida_%'].apply(lambda x: f"{x:.1f}%")
+                df_hotspots_display['Impacto_Monetario'] = df_hotspots_display['Impacto_Monetario'].apply(lambda x: f"RD$ {x:,.2f}")
+                st.dataframe(df_hotspots_display, use_container_width=True, hide_index=True)
+            else:
+                st.info("No se detectaron concentraciones de pérdida significativas")
     
     with tab3:
-        st.markdown("### Lista de Transformadores Priorizados")
-        
-        # Filtros
-        col_f1, col_f2, col_f3 = st.columns(3)
-        
-        with col_f1:
-            filtro_prioridad = st.multiselect(
-                "Filtrar por Prioridad:",
-                options=df_priorizado['Categoria_Prioridad'].unique(),
-                default=df_priorizado['Categoria_Prioridad'].unique()
-            )
-        
-        with col_f2:
-            filtro_sector = st.multiselect(
-                "Filtrar por Sector:",
-                options=df_priorizado['Sector'].unique(),
-                default=df_priorizado['Sector'].unique()
+        if tab3.open:
+            st.markdown("### Lista de Transformadores Priorizados")
+            
+            # Filtros (opciones tomadas del índice precalculado, sin recorrer el dataset)
+            indice_filtros = indice_filtros_cacheado(huella_datos, df_priorizado)
+            col_f1, col_f2, col_f3 = st.columns(3)
+            
+            with col_f1:
+                filtro_prioridad = st.multiselect(
+                    "Filtrar por Prioridad:",
+                    options=indice_filtros.valores['Categoria_Prioridad'],
+                    default=indice_filtros.valores['Categoria_Prioridad'],
+                    key='filtro_prioridad', persist_state="page"
+                )
+            
+            with col_f2:
+                filtro_sector = st.multiselect(
+                    "Filtrar por Sector:",
+                    options=indice_filtros.valores['Sector'],
+                    default=indice_filtros.valores['Sector'],
+                    key='filtro_sector', persist_state="page"
+                )
+            
+            with col_f3:
+                min_perdida = st.slider(
+                    "Pérdida Mínima (%):",
+                    0, 100, 30,
+                    key='min_perdida', persist_state="page"
+                )
+            
+            solo_vista = st.checkbox(
+                "Sólo transformadores visibles en el mapa", value=False,
+                key='solo_vista', persist_state="page"
             )
-        
-        with col_f3:
-            min_perdida = st.slider(
-                "Pérdida Mínima (%):",
-                0, 100, 30
+            
+            # Aplicar filtros por intersección de bitmaps (opcionalmente sobre la vista del mapa)
+            with diagnostico.etapa('Filtros del listado') as medida:
+                posiciones_filtradas = indice_filtros.consultar(
+                    categorias=filtro_prioridad,
+                    sectores=filtro_sector,
+                    perdida_min=min_perdida,
+                    posiciones=posiciones_vista if solo_vista else None
+                )
+                medida['filas'] = len(posiciones_filtradas)
+            
+            # Búsqueda de críticos cercanos para cuadrillas de campo
+            with st.expander("📍 Transformadores críticos más cercanos a un punto"):
+                col_c1, col_c2, col_c3 = st.columns(3)
+                with col_c1:
+                    lat_punto = st.number_input(
+                        "Latitud:", value=float(centro_mapa[0]), format="%.5f",
+                        key='lat_punto', persist_state="page"
+                    )
+                with col_c2:
+                    lon_punto = st.number_input(
+                        "Longitud:", value=float(centro_mapa[1]), format="%.5f",
+                        key='lon_punto', persist_state="page"
+                    )
+                with col_c3:
+                    n_cercanos = st.number_input(
+                        "Cantidad:", min_value=1, max_value=100, value=5,
+                        key='n_cercanos', persist_state="page"
+                    )
+                
+                es_critico = df_priorizado['Categoria_Prioridad'].str.startswith('CRÍTICA').to_numpy()
+                posiciones, distancias = indice_espacial.vecinos_mas_cercanos(
+                    lat_punto, lon_punto, int(n_cercanos), mascara=es_critico
+                )
+                df_cercanos = df_priorizado.iloc[posiciones][
+                    ['ID_Trafo', 'Sector', 'Categoria_Prioridad', 'Perdida_%', 'Latitud', 'Longitud']
+                ].assign(Distancia_km=distancias.round(2))
+                st.dataframe(df_cercanos, use_container_width=True, hide_index=True)
+            
+            # Rutas diarias de cuadrillas sobre los transformadores de mayor prioridad
+            with st.expander("🚚 Planificación de rutas de cuadrillas"):
+                col_r1, col_r2, col_r3, col_r4 = st.columns(4)
+                with col_r1:
+                    top_k = st.number_input(
+                        "Top transformadores:", min_value=10, max_value=5000, value=TOP_K_RUTAS, step=50,
+                        key='top_k', persist_state="page"
+                    )
+                with col_r2:
+                    n_cuadrillas = st.number_input(
+                        "Cuadrillas:", min_value=1, max_value=50, value=4,
+                        key='n_cuadrillas', persist_state="page"
+                    )
+                with col_r3:
+                    n_dias = st.number_input(
+                        "Días:", min_value=1, max_value=30, value=5,
+                        key='n_dias', persist_state="page"
+                    )
+                with col_r4:
+                    horas_jornada = st.number_input(
+                        "Horas por jornada:", min_value=1.0, max_value=12.0, value=HORAS_JORNADA, step=0.5,
+                        key='horas_jornada', persist_state="page"
+                    )
+                col_b1, col_b2 = st.columns(2)
+                with col_b1:
+                    lat_base = st.number_input(
+                        "Latitud de la base:", value=float(CENTRO_MAPA[0]), format="%.5f",
+                        key='lat_base', persist_state="page"
+                    )
+                with col_b2:
+                    lon_base = st.number_input(
+                        "Longitud de la base:", value=float(CENTRO_MAPA[1]), format="%.5f",
+                        key='lon_base', persist_state="page"
+                    )
+                
+                if st.checkbox("Generar rutas", value=False, key='generar_rutas', persist_state="page"):
+                    base = (lat_base, lon_base)
+                    with diagnostico.etapa('Rutas de cuadrillas') as medida:
+                        df_paradas, df_rutas = planificar_rutas_cacheado(
+                            huella_datos, int(n_cuadrillas), int(n_dias), int(top_k), float(horas_jornada), base,
+                            df_priorizado
+                        )
+                        medida['filas'] = len(df_paradas)
+                    if len(df_rutas):
+                        st.dataframe(df_rutas.round(2), use_container_width=True, hide_index=True)
+                        st_folium(crear_mapa_rutas(df_paradas, base), width=ANCHO_MAPA_PX, height=450, key='mapa_rutas', returned_objects=[])
+                        st.download_button(
+                            label="📥 Descargar hoja de ruta (CSV)",
+                            data=df_paradas.to_csv(index=False).encode('utf-8'),
+                            file_name=f"rutas_cuadrillas_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+                            mime='text/csv'
+                        )
+                    else:
+                        st.info("Ningún transformador es alcanzable desde la base dentro de la jornada")
+            
+            st.markdown(f"**Transformadores encontrados:** {len(posiciones_filtradas):,}")
+            
+            # Listado paginado: sólo se renderiza la página visible
+            col_p1, col_p2, col_p3, col_p4 = st.columns(4)
+            with col_p1:
+                columna_orden = st.selectbox("Ordenar por:", COLUMNAS_ORDEN, key='columna_orden', persist_state="page")
+            with col_p2:
+                descendente = st.radio(
+                    "Orden:", ["Descendente", "Ascendente"], horizontal=True, key='descendente', persist_state="page"
+                ) == "Descendente"
+            with col_p3:
+                tamano_pagina = st.selectbox(
+                    "Filas por página:", TAMANOS_PAGINA,
+                    key='tamano_pagina', persist_state="page"
+                )
+            with col_p4:
+                total_paginas = numero_paginas(len(posiciones_filtradas), tamano_pagina)
+                pagina = st.number_input(
+                    f"Página (de {total_paginas:,}):", min_value=1, max_value=total_paginas, value=1,
+                    key='pagina', persist_state="page"
+                )
+            
+            # df_priorizado ya viene ordenado por score descendente: no hace falta reordenar
+            orden_natural = columna_orden == 'Prioridad_Score' and descendente
+            with diagnostico.etapa('Página del listado') as medida:
+                df_pagina = obtener_pagina(
+                    df_priorizado, int(pagina), tamano_pagina,
+                    columna=None if orden_natural else columna_orden, descendente=descendente,
+                    posiciones=posiciones_filtradas
+                )
+                medida['filas'] = len(df_pagina)
+            st.dataframe(
+                df_pagina[COLUMNAS_LISTADO],
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    'Prioridad_Score': st.column_config.NumberColumn('Score', format="%.0f"),
+                    'Perdida_%': st.column_config.NumberColumn('Pérdida %', format="%.1f"),
+                    'kWh_Perdido': st.column_config.NumberColumn('kWh Perdido', format="%.0f"),
+                    'Perdida_Monetaria_RD$': st.column_config.NumberColumn('Impacto RD$', format="%.2f"),
+                    'Carga_%': st.column_config.NumberColumn('Carga %', format="%.0f")
+                }
             )
+            
+            # Detalle bajo demanda de un transformador de la página
+            if len(df_pagina):
+                id_detalle = st.selectbox(
+                    "🔸 Ver detalle del transformador:", df_pagina['ID_Trafo'].tolist(),
+                    key='id_detalle', persist_state="page"
+                )
+                row = df_pagina.loc[df_pagina['ID_Trafo'] == id_detalle].iloc[0]
+                st.markdown(f"#### {row['ID_Trafo']} - {row['Sector']} | Prioridad: {row['Categoria_Prioridad']} (Score: {row['Prioridad_Score']:.0f})")
+                mostrar_detalle_transformador(row)
+    
+    with tab4:
+        st.markdown("### Simulador de Escenarios (tarifa, factor de carga y pesos del score)")
+        st.caption(
+            "Cada fila es un escenario; la fila Base reproduce los parámetros vigentes. "
+            "Todos se evalúan juntos sobre las métricas ya calculadas."
+        )
         
-        # Aplicar filtros
-        df_filtrado = df_priorizado[
-            (df_priorizado['Categoria_Prioridad'].isin(filtro_prioridad)) &
-            (df_priorizado['Sector'].isin(filtro_sector)) &
-            (df_priorizado['Perdida_%'] >= min_perdida)
-        ]
+        escenarios = st.data_editor(
+            escenarios_ejemplo(),
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            key='tabla_escenarios'
+        )
+        top_k_escenarios = st.number_input(
+            "Top K para comparar rankings",
+            min_value=10, max_value=5000, value=TOP_K_ESCENARIOS, step=10
+        )
         
-        st.markdown(f"**Transformadores encontrados:** {len(df_filtrado)}")
+        escenarios = escenarios.dropna(subset=['Escenario'] + PARAMETROS_ESCENARIO)
+        escenarios = escenarios[escenarios['Horas_Mes'] * escenarios['Factor_Carga'] > 0]
+        if escenarios['Escenario'].duplicated().any():
+            st.warning("⚠️ Hay nombres de escenario repetidos: se usa la primera fila de cada nombre")
+            escenarios = escenarios.drop_duplicates('Escenario')
         
-        # Mostrar tabla priorizada
-        for idx, row in df_filtrado.head(20).iterrows():
-            with st.expander(f"🔸 {row['ID_Trafo']} - {row['Sector']} | Prioridad: {row['Categoria_Prioridad']} (Score: {row['Prioridad_Score']:.0f})"):
-                col_d1, col_d2 = st.columns([1, 2])
-                
-                with col_d1:
-                    st.markdown(f"""
-                    **Datos Técnicos:**
-                    - Capacidad: {row['Capacidad_kVA']} kVA
-                    - Carga: {row['Carga_%']:.0f}%
-                    - Entregado: {row['kWh_Entregado']:,.0f} kWh
-                    - Facturado: {row['kWh_Facturado']:,.0f} kWh
-                    """)
-                    
-                    st.markdown(f"""
-                    **Pérdidas:**
-                    - Porcentaje: **{row['Perdida_%']:.1f}%**
-                    - Volumen: {row['kWh_Perdido']:,.0f} kWh
-                    - Impacto: RD$ {row['Perdida_Monetaria_RD$']:,.2f}
-                    """)
-                
-                with col_d2:
-                    st.markdown("**🎯 Plan de Intervención Sugerido:**")
-                    st.warning(row['Sugerencia_Intervencion'])
-                    
-                    # Indicador visual de prioridad
-                    if 'CRÍTICA' in row['Categoria_Prioridad']:
-                        st.error("⚠️ **ACCIÓN INMEDIATA REQUERIDA**")
-                    elif row['Categoria_Prioridad'] == 'ALTA':
-                        st.warning("⚡ **INTERVENCIÓN PRIORITARIA**")
+        if len(escenarios):
+            with diagnostico.etapa('Escenarios', filas=len(escenarios) * len(df_priorizado)):
+                df_totales, df_ranking = evaluar_escenarios_cacheado(
+                    huella_datos, escenarios.reset_index(drop=True), int(top_k_escenarios), df_priorizado
+                )
+            
+            col_s1, col_s2 = st.columns(2)
+            with col_s1:
+                fig_esc1 = px.bar(
+                    df_totales,
+                    x='Escenario',
+                    y='Perdida_Monetaria_Total_RD$',
+                    title='Pérdida Monetaria Total por Escenario (RD$)',
+                    labels={'Perdida_Monetaria_Total_RD$': 'RD$'}
+                )
+                st.plotly_chart(fig_esc1, use_container_width=True)
+            with col_s2:
+                fig_esc2 = px.bar(
+                    df_totales,
+                    x='Escenario',
+                    y='Cambio_Rango_Medio',
+                    color='Nuevos_en_TopK',
+                    title=f'Cambio Medio de Rango en el Top {int(top_k_escenarios)} vs. Base',
+                    labels={'Cambio_Rango_Medio': 'Posiciones', 'Nuevos_en_TopK': 'Nuevos en top K'}
+                )
+                st.plotly_chart(fig_esc2, use_container_width=True)
+            
+            st.markdown("#### 📊 Totales por Escenario")
+            st.dataframe(df_totales, use_container_width=True, hide_index=True)
+            
+            st.markdown("#### 🔀 Cambios en el Ranking")
+            escenario_detalle = st.selectbox("Escenario:", df_totales['Escenario'].tolist())
+            st.dataframe(
+                df_ranking[df_ranking['Escenario'] == escenario_detalle].drop(columns='Escenario'),
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.info("Agregue al menos un escenario con todos sus parámetros")
+    
+    with tab5:
+        if tab5.open:
+            st.markdown("### Seguimiento Histórico y Recuperación de Pérdidas")
+            st.caption(f"Almacén local: {RUTA_ALMACEN}")
+            almacen = almacen_cacheado(RUTA_ALMACEN)
+            
+            col_h1, col_h2 = st.columns(2)
+            
+            with col_h1:
+                st.markdown("#### 💾 Guardar este análisis")
+                periodo_analisis = st.text_input(
+                    "Periodo del análisis (AAAA-MM):", value=datetime.now().strftime('%Y-%m'),
+                    key='periodo_analisis', persist_state="page"
+                )
+                if vista_previa:
+                    st.info("Desactive la vista previa aproximada para guardar el periodo completo")
+                elif st.button("Guardar periodo en el almacén"):
+                    try:
+                        guardados = almacen.guardar_periodo(df_priorizado, periodo_analisis)
+                    except ValueError:
+                        st.error("❌ Periodo inválido: use el formato AAAA-MM")
                     else:
-                        st.info("📋 Programar revisión")
+                        st.success(f"✅ {guardados:,} transformadores guardados en {periodo_analisis}")
+            
+            with col_h2:
+                st.markdown("#### 🛠️ Registrar intervención")
+                ids_intervenidos = st.multiselect(
+                    "Transformadores intervenidos:",
+                    options=df_priorizado['ID_Trafo'].head(MAX_OPCIONES_INTERVENCION).tolist(),
+                    key='ids_intervenidos', persist_state="page"
+                )
+                col_i1, col_i2 = st.columns(2)
+                with col_i1:
+                    periodo_intervencion = st.text_input(
+                        "Periodo de la intervención (AAAA-MM):", value=datetime.now().strftime('%Y-%m'),
+                        key='periodo_intervencion', persist_state="page"
+                    )
+                with col_i2:
+                    tipo_intervencion = st.selectbox(
+                        "Tipo:", TIPOS_INTERVENCION,
+                        key='tipo_intervencion', persist_state="page"
+                    )
+                if st.button("Registrar intervención", disabled=not ids_intervenidos):
+                    try:
+                        almacen.registrar_intervencion(ids_intervenidos, periodo_intervencion, tipo_intervencion)
+                    except ValueError:
+                        st.error("❌ Periodo inválido: use el formato AAAA-MM")
+                    else:
+                        st.success(f"✅ {len(ids_intervenidos)} intervenciones registradas")
+            
+            periodos_guardados = almacen.periodos()
+            if periodos_guardados:
+                st.markdown(f"#### 📉 Tendencia por Sector ({periodos_guardados[0]} → {periodos_guardados[-1]})")
+                df_tendencia = almacen.tendencia_sectores()
+                fig_tendencia = px.line(
+                    df_tendencia,
+                    x='Periodo',
+                    y='Perdida_%',
+                    color='Sector',
+                    markers=True,
+                    labels={'Perdida_%': '% Pérdida del sector'}
+                )
+                st.plotly_chart(fig_tendencia, use_container_width=True)
+                
+                st.markdown("#### ✅ Recuperación tras Intervenciones (antes / después)")
+                df_recuperacion = almacen.reporte_recuperacion()
+                if len(df_recuperacion):
+                    col_r1, col_r2 = st.columns(2)
+                    with col_r1:
+                        st.metric("Intervenciones con datos posteriores", f"{(df_recuperacion['Meses_Despues'] > 0).sum():,}")
+                    with col_r2:
+                        st.metric(
+                            "Recuperación mensual estimada",
+                            f"RD$ {df_recuperacion['Recuperacion_RD$_Mes'].sum() / 1e6:.2f}M"
+                        )
+                    st.dataframe(df_recuperacion, use_container_width=True, hide_index=True)
+                else:
+                    st.info("Aún no hay intervenciones registradas")
+            else:
+                st.info("Guarde el análisis de cada periodo para ver tendencias y recuperación")
     
     # Sección de exportación
     st.markdown("---")
     st.markdown("## 📥 Exportar Resultados")
     
+    formato_export = st.radio(
+        "Formato de exportación:",
+        list(FORMATOS_EXPORTACION),
+        horizontal=True
+    )
+    extension, mime, _ = FORMATOS_EXPORTACION[formato_export]
+    if vista_previa:
+        st.caption(
+            f"⚡ Vista previa: se exporta la muestra ({len(df_priorizado):,} de {n_total:,} transformadores, "
+            f"con su {COLUMNA_PESO}); el resumen por sector está expandido al dataset"
+        )
+    
+    # Los archivos se generan al pulsar cada botón (no en cada rerun) y se memorizan por dataset
     col_e1, col_e2, col_e3 = st.columns(3)
     
     with col_e1:
-        csv_completo = df_priorizado.to_csv(index=False).encode('utf-8')
         st.download_button(
-            label="📊 Descargar Análisis Completo (CSV)",
-            data=csv_completo,
-            file_name=f"analisis_completo_puntorojo_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-            mime="text/csv"
+            label=f"📊 Descargar Análisis Completo ({formato_export})",
+            data=partial(exportar_cacheado, huella_datos, formato_export, 'completo', df_priorizado),
+            file_name=f"analisis_completo_puntorojo_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}",
+            mime=mime
         )
     
     with col_e2:
         # Top 10 críticos
         df_top10 = df_priorizado.head(10)
-        csv_top10 = df_top10.to_csv(index=False).encode('utf-8')
         st.download_button(
-            label="🔴 Top 10 Transformadores Críticos (CSV)",
-            data=csv_top10,
-            file_name=f"top10_criticos_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-            mime="text/csv"
+            label=f"🔴 Top 10 Transformadores Críticos ({formato_export})",
+            data=partial(exportar_cacheado, huella_datos, formato_export, 'top10', df_top10),
+            file_name=f"top10_criticos_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}",
+            mime=mime
         )
     
     with col_e3:
         # Resumen por sector
-        csv_sector = df_sector.to_csv(index=False).encode('utf-8')
         st.download_button(
-            label="📍 Resumen por Sector (CSV)",
-            data=csv_sector,
-            file_name=f"resumen_sectores_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-            mime="text/csv"
+            label=f"📍 Resumen por Sector ({formato_export})",
+            data=partial(exportar_cacheado, huella_datos, formato_export, 'sectores', df_sector),
+            file_name=f"resumen_sectores_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}",
+            mime=mime
         )
+    
+    st.download_button(
+        label="📑 Reporte Excel para gerencia (análisis completo, críticos y sectores)",
+        data=partial(reporte_excel_cacheado, huella_datos, df_priorizado, df_sector),
+        file_name=f"reporte_puntorojo_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
+        mime=MIME_XLSX
+    )
 
 else:
     # Estado inicial sin datos
@@ -567,7 +1121,7 @@ else:
     
     **Para comenzar:**
     1. Seleccione el "Modo Demostración" en el panel lateral para ver datos de ejemplo
-    2. O cargue su propio archivo Excel/CSV con datos de transformadores
+    2. O cargue sus archivos Excel/CSV/Parquet con datos de transformadores (uno o varios por región)
     
     **Columnas requeridas en el archivo:**
     - `ID_Trafo` - Identificador del transformador
@@ -608,6 +1162,27 @@ else:
         - Exportación de resultados
         """)
 
+# Panel de diagnóstico (al final: incluye todas las etapas de este rerun)
+if diagnostico.activo:
+    diagnostico.cerrar('Total del rerun')
+    with st.sidebar:
+        st.markdown("---")
+        st.markdown("### 🩺 Diagnóstico")
+        st.caption(
+            "Tiempo de pared de cada etapa en este rerun (las memorizadas sólo cuestan la consulta a la caché). "
+            "RSS pico es el máximo del proceso hasta esa etapa."
+        )
+        st.dataframe(
+            diagnostico.resumen(),
+            hide_index=True,
+            column_config={
+                'Segundos': st.column_config.NumberColumn('Segundos', format="%.3f"),
+                'Filas': st.column_config.NumberColumn('Filas', format="%d"),
+                'Bytes': st.column_config.NumberColumn('Bytes', format="%d"),
+                'RSS_Pico_MB': st.column_config.NumberColumn('RSS pico (MB)', format="%.0f")
+            }
+        )
+
 # Footer
 st.markdown("---")
 st.markdown("""
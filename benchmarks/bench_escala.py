@@ -0,0 +1,169 @@
+"""
+Suite de benchmarks a escala sobre fixtures sintéticos (puntorojo.sintetico).
+
+Mide, para cada tamaño, la carga (CSV, Parquet y XLSX), la priorización
+(anomalías + score), el agregado por sector, la construcción del mapa (como
+en la app: calor preagregado + marcadores de la vista inicial, renderizado
+a HTML) y la exportación (CSV, Parquet y XLSX). Compara cada tiempo con una
+línea base guardada y marca como regresión lo que la supere en más de la
+tolerancia; en ese caso termina con código 1.
+
+Uso:
+    python benchmarks/bench_escala.py [--filas 10000 100000 1000000] [--fixtures datos/sinteticos]
+                                      [--linea-base benchmarks/linea_base.json] [--guardar-linea-base]
+                                      [--tolerancia 0.25] [--xlsx-max 200000]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from puntorojo.anomalias import detectar_anomalias  # noqa: E402
+from puntorojo.columnar import exportar_parquet  # noqa: E402
+from puntorojo.diagnostico import rss_pico_mb  # noqa: E402
+from puntorojo.espacial import IndiceEspacial, agregar_calor_para_zoom, limites_vista  # noqa: E402
+from puntorojo.excel import exportar_xlsx  # noqa: E402
+from puntorojo.mapa import CENTRO_MAPA, ZOOM_INICIAL, crear_mapa_calor  # noqa: E402
+from puntorojo.motor import cargar_archivo  # noqa: E402
+from puntorojo.prioridad import agregar_por_sector, calcular_prioridades  # noqa: E402
+from puntorojo.sintetico import MAX_FILAS_XLSX, escribir_fixture, ruta_fixture  # noqa: E402
+
+LINEA_BASE = os.path.join(os.path.dirname(__file__), 'linea_base.json')
+FIXTURES = os.path.join('datos', 'sinteticos')
+
+# Diferencias menores a este umbral (s) se consideran ruido aunque superen la tolerancia
+UMBRAL_RUIDO = 0.05
+
+# Viewport de la app (px) para los marcadores del mapa
+ANCHO_MAPA_PX = 1400
+ALTO_MAPA_PX = 600
+
+
+def medir(funcion, repeticiones):
+    """
+    Devuelve el mejor tiempo (s) de varias ejecuciones y el último resultado
+    """
+    mejor = float('inf')
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def construir_mapa(df_priorizado, indice):
+    """
+    Mapa de la vista inicial como lo arma la app; devuelve los bytes del HTML
+    """
+    caja = limites_vista(CENTRO_MAPA, ZOOM_INICIAL, ANCHO_MAPA_PX, ALTO_MAPA_PX)
+    posiciones = indice.consultar_caja(*caja)
+    mapa = crear_mapa_calor(df_priorizado.iloc[posiciones], agregar_calor_para_zoom(df_priorizado, ZOOM_INICIAL))
+    return len(mapa.get_root().render().encode('utf-8'))
+
+
+def medir_escala(n, directorio, repeticiones, xlsx_max):
+    """
+    Mide todas las etapas para n transformadores: {etapa: (segundos, RSS pico MB)}
+    """
+    usar_xlsx = n <= min(xlsx_max, MAX_FILAS_XLSX)
+    formatos = ['csv', 'parquet'] + (['xlsx'] if usar_xlsx else [])
+    for formato in formatos:
+        ruta = ruta_fixture(directorio, n, formato)
+        if not os.path.exists(ruta):
+            print(f"  generando {ruta}...", file=sys.stderr)
+            escribir_fixture(ruta, n)
+
+    resultados = {}
+
+    def registrar(etapa, funcion, veces=repeticiones):
+        segundos, resultado = medir(funcion, veces)
+        resultados[etapa] = (segundos, rss_pico_mb())
+        return resultado
+
+    for formato in formatos:
+        # La carga de XLSX es la más lenta: una sola vez
+        df = registrar(
+            f'carga_{formato}', lambda: cargar_archivo(ruta_fixture(directorio, n, formato)),
+            1 if formato == 'xlsx' else repeticiones
+        )
+    df_priorizado = registrar('prioridades', lambda: calcular_prioridades(detectar_anomalias(df)))
+    registrar('sectores', lambda: agregar_por_sector(df_priorizado))
+    indice = IndiceEspacial(df_priorizado)
+    registrar('mapa', lambda: construir_mapa(df_priorizado, indice))
+    registrar('exportar_csv', lambda: df_priorizado.to_csv(index=False).encode('utf-8'))
+    registrar('exportar_parquet', lambda: exportar_parquet(df_priorizado))
+    if usar_xlsx:
+        registrar('exportar_xlsx', lambda: exportar_xlsx({'Datos': df_priorizado}), 1)
+    return resultados
+
+
+def comparar(segundos, base, tolerancia):
+    """
+    Cambio relativo frente a la línea base y si es una regresión
+    """
+    if not base:
+        return None, False
+    cambio = segundos / base - 1
+    return cambio, cambio > tolerancia and segundos - base > UMBRAL_RUIDO
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--fixtures', default=FIXTURES, help='Directorio de fixtures (se generan si faltan)')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--linea-base', default=LINEA_BASE)
+    parser.add_argument('--guardar-linea-base', action='store_true',
+                        help='Guarda los tiempos de esta corrida como nueva línea base')
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help='Aumento relativo tolerado antes de marcar una regresión (0.25 = 25%%)')
+    parser.add_argument('--xlsx-max', type=int, default=200_000,
+                        help='Tamaño máximo para medir carga y exportación XLSX')
+    args = parser.parse_args()
+
+    linea_base = {}
+    if os.path.exists(args.linea_base):
+        with open(args.linea_base, encoding='utf-8') as f:
+            linea_base = json.load(f)['resultados']
+
+    print(f"{'Filas':>10} | {'Etapa':<17} | {'Tiempo (s)':>10} | {'Base (s)':>9} | {'Cambio':>7} | {'RSS (MB)':>8} |")
+    print('-' * 80)
+    tiempos, regresiones = {}, []
+    for n in args.filas:
+        for etapa, (segundos, rss) in medir_escala(n, args.fixtures, args.repeticiones, args.xlsx_max).items():
+            clave = f'{etapa}@{n}'
+            tiempos[clave] = segundos
+            base = linea_base.get(clave)
+            cambio, regresion = comparar(segundos, base, args.tolerancia)
+            if regresion:
+                regresiones.append(clave)
+            print(
+                f"{n:>10,} | {etapa:<17} | {segundos:>10.3f} | "
+                f"{f'{base:.3f}' if base else '-':>9} | {f'{cambio:+.0%}' if cambio is not None else '-':>7} | "
+                f"{f'{rss:.0f}' if rss else '-':>8} | {'⚠️ REGRESIÓN' if regresion else ''}"
+            )
+
+    if args.guardar_linea_base:
+        with open(args.linea_base, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'maquina': platform.node(),
+                'python': platform.python_version(),
+                'resultados': {**linea_base, **tiempos}
+            }, f, indent=2, ensure_ascii=False)
+        print(f"Línea base guardada en {args.linea_base}")
+
+    if regresiones:
+        print(f"⚠️ {len(regresiones)} regresiones (> {args.tolerancia:.0%}): {', '.join(regresiones)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Benchmark de construcción del mapa: marcadores CircleMarker por fila
+(original) frente a la capa GeoJSON única de puntorojo.mapa.
+
+Mide el tiempo de construcción + renderizado HTML y el tamaño del HTML.
+
+Uso:
+    python benchmarks/bench_mapa.py [--filas 1000 10000 100000] [--referencia-max 10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import folium
+from folium.plugins import HeatMap
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_prioridades import generar_datos  # noqa: E402
+from puntorojo.espacial import agregar_calor_para_zoom  # noqa: E402
+from puntorojo.mapa import CENTRO_MAPA, LEYENDA_HTML, ZOOM_INICIAL, crear_mapa_calor  # noqa: E402
+
+
+def crear_mapa_por_filas(df):
+    """
+    Implementación original: un punto de calor, un CircleMarker y un Popup por fila
+    """
+    mapa = folium.Map(location=CENTRO_MAPA, zoom_start=ZOOM_INICIAL, tiles='OpenStreetMap')
+
+    heat_data = [[row['Latitud'], row['Longitud'], row['kWh_Perdido']]
+                 for idx, row in df.iterrows()]
+    HeatMap(heat_data, radius=15, blur=25, max_zoom=13, gradient={
+        0.0: 'green', 0.3: 'yellow', 0.5: 'orange', 0.7: 'red', 1.0: 'darkred'
+    }).add_to(mapa)
+
+    for idx, row in df.iterrows():
+        perdida = row['Perdida_%']
+        if perdida > 50:
+            color, radius, icono = 'red', 12, '🔴'
+        elif perdida > 30:
+            color, radius, icono = 'orange', 10, '🟠'
+        else:
+            color, radius, icono = 'green', 8, '🟢'
+
+        popup_html = f"""
+        <div style="font-family: Arial; width: 250px;">
+            <h4 style="margin:0; color:{color};">{icono} {row['ID_Trafo']}</h4>
+            <hr style="margin:5px 0;">
+            <b>Sector:</b> {row['Sector']}<br>
+            <b>Pérdida:</b> {perdida:.1f}%<br>
+            <b>Energía Perdida:</b> {row['kWh_Perdido']:,.0f} kWh<br>
+            <b>Impacto Monetario:</b> RD$ {row['Perdida_Monetaria_RD$']:,.2f}<br>
+            <b>Capacidad:</b> {row['Capacidad_kVA']} kVA<br>
+            <b>Carga:</b> {row['Carga_%']:.0f}%
+        </div>
+        """
+        folium.CircleMarker(
+            location=[row['Latitud'], row['Longitud']],
+            radius=radius,
+            popup=folium.Popup(popup_html, max_width=300),
+            color=color,
+            fill=True,
+            fillColor=color,
+            fillOpacity=0.7,
+            weight=2
+        ).add_to(mapa)
+
+    mapa.get_root().html.add_child(folium.Element(LEYENDA_HTML))
+    return mapa
+
+
+def medir(construir):
+    """
+    Devuelve (segundos, bytes de HTML) de construir y renderizar el mapa
+    """
+    inicio = time.perf_counter()
+    html = construir().get_root().render()
+    return time.perf_counter() - inicio, len(html.encode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--referencia-max', type=int, default=10_000,
+                        help='Tamaño máximo para medir la versión por filas (muy lenta)')
+    parser.add_argument('--zoom', type=int, default=ZOOM_INICIAL)
+    args = parser.parse_args()
+
+    print(f"{'Filas':>10} | {'Por filas (s)':>13} | {'HTML (MB)':>9} | {'GeoJSON (s)':>11} | {'HTML (MB)':>9}")
+    print('-' * 66)
+    for n in args.filas:
+        df = generar_datos(n)
+        t_geo, b_geo = medir(lambda: crear_mapa_calor(df, agregar_calor_para_zoom(df, args.zoom)))
+
+        if n <= args.referencia_max:
+            t_ref, b_ref = medir(lambda: crear_mapa_por_filas(df))
+            ref = f"{t_ref:>13.2f} | {b_ref / 1e6:>9.1f}"
+        else:
+            ref = f"{'-':>13} | {'-':>9}"
+        print(f"{n:>10,} | {ref} | {t_geo:>11.2f} | {b_geo / 1e6:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark del motor de priorización: evaluación fila por fila (original)
+frente a la versión vectorizada de puntorojo.prioridad.
+
+Uso:
+    python benchmarks/bench_prioridades.py [--filas 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from puntorojo.prioridad import calcular_prioridades  # noqa: E402
+
+SECTORES = [
+    'Gazcue', 'Ensanche Luperón', 'San Isidro', 'San Isidro Labrador',
+    'Boca Chica', 'San Pedro de Macorís', 'Santo Domingo Este'
+]
+
+
+def calcular_prioridades_por_filas(df):
+    """
+    Implementación original con DataFrame.apply(axis=1), usada como referencia
+    """
+    df_prioridad = df.copy()
+
+    df_prioridad['Score_Volumen'] = (df_prioridad['kWh_Perdido'] / df_prioridad['kWh_Perdido'].max()) * 40
+    df_prioridad['Score_Porcentaje'] = (df_prioridad['Perdida_%'] / 100) * 30
+    df_prioridad['Score_Sobrecarga'] = df_prioridad['Carga_%'].apply(lambda x: 30 if x > 100 else (x/100)*15)
+
+    df_prioridad['Prioridad_Score'] = (
+        df_prioridad['Score_Volumen'] +
+        df_prioridad['Score_Porcentaje'] +
+        df_prioridad['Score_Sobrecarga']
+    )
+
+    def categorizar_prioridad(row):
+        score = row['Prioridad_Score']
+        perdida = row['Perdida_%']
+        sector = row['Sector']
+        carga = row['Carga_%']
+
+        if sector in ['Ensanche Luperón', 'San Isidro'] and perdida > 50:
+            return 'CRÍTICA - Operativo Urgente'
+        elif carga > 100 and perdida > 40:
+            return 'CRÍTICA - Cambio Transformador'
+        elif score > 70:
+            return 'ALTA'
+        elif score > 40:
+            return 'MEDIA'
+        else:
+            return 'BAJA'
+
+    df_prioridad['Categoria_Prioridad'] = df_prioridad.apply(categorizar_prioridad, axis=1)
+
+    def generar_sugerencia(row):
+        sector = row['Sector']
+        perdida = row['Perdida_%']
+        carga = row['Carga_%']
+
+        sugerencias = []
+
+        if sector in ['Ensanche Luperón', 'San Isidro'] and perdida > 50:
+            sugerencias.append("🔴 OPERATIVO DE NORMALIZACIÓN: Blindaje de red y regularización de conexiones directas")
+
+        if carga > 100:
+            sugerencias.append(f"⚡ CAMBIO DE TRANSFORMADOR: Sobrecarga del {carga:.0f}% - Capacidad insuficiente")
+
+        if perdida > 60:
+            sugerencias.append("🔍 INSPECCIÓN TÉCNICA: Posible fraude masivo o falla en medición")
+        elif perdida > 40:
+            sugerencias.append("📋 AUDITORÍA DE RED: Revisar conexiones no autorizadas")
+
+        if perdida > 30 and carga < 70:
+            sugerencias.append("🔧 MANTENIMIENTO PREVENTIVO: Revisar estado de conductores y empalmes")
+
+        return ' | '.join(sugerencias) if sugerencias else 'Monitoreo regular'
+
+    df_prioridad['Sugerencia_Intervencion'] = df_prioridad.apply(generar_sugerencia, axis=1)
+
+    return df_prioridad.sort_values('Prioridad_Score', ascending=False)
+
+
+def generar_datos(n, semilla=0):
+    """
+    Genera n transformadores aleatorios con las columnas que espera el motor
+    """
+    rng = np.random.default_rng(semilla)
+    capacidad = rng.choice([150, 225, 300], size=n)
+    entregado = rng.uniform(50_000, 350_000, size=n).round()
+    facturado = (entregado * rng.uniform(0.2, 0.95, size=n)).round()
+
+    df = pd.DataFrame({
+        'ID_Trafo': [f'TF-{i:07d}' for i in range(n)],
+        'Sector': rng.choice(SECTORES, size=n),
+        'Latitud': rng.uniform(18.43, 18.51, size=n),
+        'Longitud': rng.uniform(-69.94, -69.28, size=n),
+        'Capacidad_kVA': capacidad,
+        'kWh_Entregado': entregado,
+        'kWh_Facturado': facturado
+    })
+    df['kWh_Perdido'] = df['kWh_Entregado'] - df['kWh_Facturado']
+    df['Perdida_%'] = (df['kWh_Perdido'] / df['kWh_Entregado']) * 100
+    df['Perdida_Monetaria_RD$'] = df['kWh_Perdido'] * 12.5
+    df['Carga_%'] = (df['kWh_Entregado'] / (df['Capacidad_kVA'] * 730 * 0.8)) * 100
+    return df
+
+
+def medir(funcion, df, repeticiones):
+    """
+    Devuelve el mejor tiempo (s) de varias ejecuciones y el último resultado
+    """
+    mejor = float('inf')
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(df)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--sin-referencia', action='store_true',
+                        help='Omite la versión fila por fila (lenta en tamaños grandes)')
+    args = parser.parse_args()
+
+    print(f"{'Filas':>10} | {'Por filas (s)':>14} | {'Vectorizado (s)':>15} | {'Aceleración':>11}")
+    print('-' * 60)
+    for n in args.filas:
+        df = generar_datos(n)
+        t_vec, res_vec = medir(calcular_prioridades, df, args.repeticiones)
+
+        if args.sin_referencia:
+            print(f"{n:>10,} | {'-':>14} | {t_vec:>15.3f} | {'-':>11}")
+            continue
+
+        t_ref, res_ref = medir(calcular_prioridades_por_filas, df, 1)
+        pd.testing.assert_frame_equal(res_vec, res_ref)
+        print(f"{n:>10,} | {t_ref:>14.3f} | {t_vec:>15.3f} | {t_ref / t_vec:>10.0f}x")
+
+
+if __name__ == '__main__':
+    main()
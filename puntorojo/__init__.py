@@ -0,0 +1,11 @@
+"""
+PuntoRojo - Motor de análisis de pérdidas energéticas EDE Este
+"""
+from puntorojo.fusion import cargar_archivos
+from puntorojo.motor import cargar_archivo, cargar_archivo_validado, procesar
+from puntorojo.prioridad import agregar_por_sector, calcular_prioridades
+
+__all__ = [
+    'agregar_por_sector', 'calcular_prioridades', 'cargar_archivo', 'cargar_archivo_validado', 'cargar_archivos',
+    'procesar'
+]
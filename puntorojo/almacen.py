@@ -0,0 +1,280 @@
+import os
+import sqlite3
+from contextlib import closing, contextmanager
+
+import numpy as np
+import pandas as pd
+
+from puntorojo.ingesta import TARIFA_PROMEDIO_RD
+
+# =============================================
+# ALMACÉN PERSISTENTE DE PERIODOS (SQLITE)
+# =============================================
+RUTA_ALMACEN = os.path.join('datos', 'puntorojo.sqlite')
+
+# Columnas del resultado priorizado que se guardan por transformador y periodo
+COLUMNAS_ALMACEN = [
+    'ID_Trafo', 'Sector', 'Latitud', 'Longitud', 'Capacidad_kVA', 'kWh_Entregado', 'kWh_Facturado',
+    'kWh_Perdido', 'Perdida_%', 'Perdida_Monetaria_RD$', 'Carga_%', 'Prioridad_Score', 'Categoria_Prioridad',
+    'Anomalia'
+]
+
+# Ventanas (meses) antes y después de una intervención para medir la recuperación
+MESES_ANTES = 3
+MESES_DESPUES = 3
+
+FILAS_POR_LOTE = 50_000
+
+# Lecturas agrupadas físicamente por transformador (clave primaria sin rowid):
+# la historia de un transformador es un tramo contiguo del árbol. El
+# resumen por sector y mes se mantiene al guardar cada periodo, de modo que
+# las tendencias no recorren las lecturas.
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS lecturas (
+    ID_Trafo TEXT NOT NULL,
+    Mes INTEGER NOT NULL,
+    Sector TEXT,
+    Latitud REAL,
+    Longitud REAL,
+    Capacidad_kVA REAL,
+    kWh_Entregado REAL,
+    kWh_Facturado REAL,
+    kWh_Perdido REAL,
+    "Perdida_%" REAL,
+    "Perdida_Monetaria_RD$" REAL,
+    "Carga_%" REAL,
+    Prioridad_Score REAL,
+    Categoria_Prioridad TEXT,
+    Anomalia INTEGER,
+    PRIMARY KEY (ID_Trafo, Mes)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_lecturas_sector_mes ON lecturas (Sector, Mes);
+CREATE INDEX IF NOT EXISTS ix_lecturas_mes ON lecturas (Mes);
+
+CREATE TABLE IF NOT EXISTS sectores_mes (
+    Sector TEXT NOT NULL,
+    Mes INTEGER NOT NULL,
+    Num_Transformadores INTEGER,
+    kWh_Entregado REAL,
+    kWh_Facturado REAL,
+    kWh_Perdido REAL,
+    "Perdida_Monetaria_RD$" REAL,
+    Criticos INTEGER,
+    PRIMARY KEY (Sector, Mes)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS intervenciones (
+    ID_Trafo TEXT NOT NULL,
+    Mes INTEGER NOT NULL,
+    Tipo TEXT,
+    Nota TEXT,
+    PRIMARY KEY (ID_Trafo, Mes)
+) WITHOUT ROWID;
+"""
+
+
+def mes_de_periodo(periodo):
+    """
+    Periodo ('2024-03', fecha o Timestamp) a entero de mes (año*12 + mes - 1), como en puntorojo.series.
+
+    Los textos deben tener exactamente el formato AAAA-MM; lanza ValueError
+    con cualquier otro ('', '2024', '03/2024', '2024-03-01').
+    """
+    fecha = pd.to_datetime(periodo, format='%Y-%m', errors='coerce')
+    if pd.isna(fecha):
+        raise ValueError(f"Periodo inválido: {periodo!r}. Use el formato AAAA-MM")
+    return fecha.year * 12 + fecha.month - 1
+
+
+def periodo_de_mes(mes):
+    """
+    Entero de mes a texto 'AAAA-MM'
+    """
+    anio, mes = divmod(int(mes), 12)
+    return f"{anio:04d}-{mes + 1:02d}"
+
+
+def _citar(columna):
+    return f'"{columna}"'
+
+
+class Almacen:
+    """
+    Almacén local en SQLite de los resultados priorizados de cada periodo.
+
+    Guarda una fila por (ID_Trafo, periodo) con las métricas y el score, un
+    resumen por sector y periodo y las intervenciones registradas (p. ej. una
+    normalización de cuadrilla). Cada operación abre su propia conexión, por
+    lo que una instancia se puede compartir entre sesiones de la app.
+    """
+
+    def __init__(self, ruta=RUTA_ALMACEN):
+        self.ruta = ruta
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with self._conexion() as conexion:
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.executescript(_ESQUEMA)
+
+    @contextmanager
+    def _conexion(self):
+        """
+        Conexión con transacción: confirma al salir sin errores y siempre se cierra
+        """
+        with closing(sqlite3.connect(self.ruta)) as conexion:
+            conexion.execute('PRAGMA synchronous=NORMAL')
+            with conexion:
+                yield conexion
+
+    def _consultar(self, sql, parametros=()):
+        with self._conexion() as conexion:
+            return pd.read_sql_query(sql, conexion, params=parametros)
+
+    # -----------------------------------------
+    # Escritura
+    # -----------------------------------------
+    def guardar_periodo(self, df_priorizado, periodo):
+        """
+        Guarda (o reemplaza) el resultado priorizado de un periodo y actualiza su resumen por sector.
+
+        Devuelve el número de transformadores guardados.
+        """
+        mes = mes_de_periodo(periodo)
+        columnas = [c for c in COLUMNAS_ALMACEN if c in df_priorizado]
+        # En el orden de la clave primaria: las inserciones recorren el árbol en secuencia
+        datos = df_priorizado[columnas].sort_values('ID_Trafo').astype({'Sector': str})
+        if 'Anomalia' in datos:
+            datos['Anomalia'] = datos['Anomalia'].astype(int)
+        datos = datos.astype(object).where(datos.notna(), None)
+
+        sql = (
+            f"INSERT OR REPLACE INTO lecturas (Mes, {', '.join(map(_citar, columnas))}) "
+            f"VALUES (?, {', '.join('?' * len(columnas))})"
+        )
+        with self._conexion() as conexion:
+            conexion.execute('DELETE FROM lecturas WHERE Mes = ?', (mes,))
+            for inicio in range(0, len(datos), FILAS_POR_LOTE):
+                lote = datos.iloc[inicio:inicio + FILAS_POR_LOTE]
+                conexion.executemany(sql, ((mes, *fila) for fila in lote.itertuples(index=False, name=None)))
+
+            conexion.execute('DELETE FROM sectores_mes WHERE Mes = ?', (mes,))
+            conexion.execute(
+                """
+                INSERT INTO sectores_mes
+                SELECT Sector, Mes, COUNT(*), SUM(kWh_Entregado), SUM(kWh_Facturado), SUM(kWh_Perdido),
+                       SUM("Perdida_Monetaria_RD$"), SUM(Categoria_Prioridad LIKE 'CRÍTICA%')
+                FROM lecturas WHERE Mes = ? GROUP BY Sector
+                """,
+                (mes,)
+            )
+        return len(datos)
+
+    def registrar_intervencion(self, ids_trafo, periodo, tipo='Normalización', nota=''):
+        """
+        Registra una intervención en los transformadores dados durante el periodo
+        """
+        mes = mes_de_periodo(periodo)
+        with self._conexion() as conexion:
+            conexion.executemany(
+                'INSERT OR REPLACE INTO intervenciones (ID_Trafo, Mes, Tipo, Nota) VALUES (?, ?, ?, ?)',
+                [(str(id_trafo), mes, tipo, nota) for id_trafo in ids_trafo]
+            )
+        return len(ids_trafo)
+
+    # -----------------------------------------
+    # Consultas
+    # -----------------------------------------
+    def periodos(self):
+        """
+        Periodos guardados ('AAAA-MM'), del más antiguo al más reciente
+        """
+        meses = self._consultar('SELECT DISTINCT Mes FROM sectores_mes ORDER BY Mes')['Mes']
+        return [periodo_de_mes(m) for m in meses]
+
+    def intervenciones(self):
+        df = self._consultar('SELECT ID_Trafo, Mes, Tipo, Nota FROM intervenciones ORDER BY Mes DESC, ID_Trafo')
+        df.insert(1, 'Periodo', [periodo_de_mes(m) for m in df.pop('Mes')])
+        return df
+
+    def historial_transformador(self, id_trafo):
+        """
+        Serie de periodos guardados de un transformador (búsqueda por clave primaria)
+        """
+        df = self._consultar('SELECT * FROM lecturas WHERE ID_Trafo = ? ORDER BY Mes', (str(id_trafo),))
+        df.insert(1, 'Periodo', [periodo_de_mes(m) for m in df.pop('Mes')])
+        return df
+
+    def tendencia_sectores(self, sectores=None, desde=None, hasta=None):
+        """
+        Pérdida por sector y periodo a partir del resumen por sector (no recorre las lecturas).
+
+        Perdida_% es la pérdida agregada del sector (kWh perdidos / entregados).
+        """
+        condiciones, parametros = [], []
+        if sectores:
+            condiciones.append(f"Sector IN ({', '.join('?' * len(sectores))})")
+            parametros += list(sectores)
+        if desde is not None:
+            condiciones.append('Mes >= ?')
+            parametros.append(mes_de_periodo(desde))
+        if hasta is not None:
+            condiciones.append('Mes <= ?')
+            parametros.append(mes_de_periodo(hasta))
+        donde = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+
+        df = self._consultar(f'SELECT * FROM sectores_mes {donde} ORDER BY Sector, Mes', parametros)
+        df.insert(1, 'Periodo', [periodo_de_mes(m) for m in df.pop('Mes')])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            df['Perdida_%'] = df['kWh_Perdido'] / df['kWh_Entregado'] * 100
+        return df
+
+    def reporte_recuperacion(self, meses_antes=MESES_ANTES, meses_despues=MESES_DESPUES):
+        """
+        Antes/después de cada intervención registrada.
+
+        Compara la pérdida agregada de los `meses_antes` periodos previos al
+        de la intervención con la de los `meses_despues` posteriores (el mes
+        de la intervención se excluye). Cada intervención sólo lee el tramo de
+        su transformador por la clave primaria. Reduccion_pp > 0 indica que la
+        pérdida bajó; kWh_Recuperados_Mes compara los promedios mensuales de
+        kWh perdidos. Las intervenciones sin periodos posteriores quedan con
+        NaN en las columnas de después.
+        """
+        df = self._consultar(
+            """
+            SELECT i.ID_Trafo, i.Mes, i.Tipo, MAX(l.Sector) AS Sector,
+                   SUM(CASE WHEN l.Mes < i.Mes THEN l.kWh_Perdido END) AS Perdido_Antes,
+                   SUM(CASE WHEN l.Mes < i.Mes THEN l.kWh_Entregado END) AS Entregado_Antes,
+                   COUNT(CASE WHEN l.Mes < i.Mes THEN 1 END) AS Meses_Antes,
+                   SUM(CASE WHEN l.Mes > i.Mes THEN l.kWh_Perdido END) AS Perdido_Despues,
+                   SUM(CASE WHEN l.Mes > i.Mes THEN l.kWh_Entregado END) AS Entregado_Despues,
+                   COUNT(CASE WHEN l.Mes > i.Mes THEN 1 END) AS Meses_Despues
+            FROM intervenciones i
+            LEFT JOIN lecturas l
+                ON l.ID_Trafo = i.ID_Trafo AND l.Mes BETWEEN i.Mes - ? AND i.Mes + ?
+            GROUP BY i.ID_Trafo, i.Mes
+            ORDER BY i.Mes DESC, i.ID_Trafo
+            """,
+            (meses_antes, meses_despues)
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            antes = df['Perdido_Antes'] / df['Entregado_Antes'] * 100
+            despues = df['Perdido_Despues'] / df['Entregado_Despues'] * 100
+            recuperados = (
+                df['Perdido_Antes'] / df['Meses_Antes'].replace(0, np.nan) -
+                df['Perdido_Despues'] / df['Meses_Despues'].replace(0, np.nan)
+            )
+        return pd.DataFrame({
+            'ID_Trafo': df['ID_Trafo'],
+            'Sector': df['Sector'],
+            'Periodo_Intervencion': [periodo_de_mes(m) for m in df['Mes']],
+            'Tipo': df['Tipo'],
+            'Meses_Antes': df['Meses_Antes'],
+            'Meses_Despues': df['Meses_Despues'],
+            'Perdida_%_Antes': antes,
+            'Perdida_%_Despues': despues,
+            'Reduccion_pp': antes - despues,
+            'kWh_Recuperados_Mes': recuperados,
+            'Recuperacion_RD$_Mes': recuperados * TARIFA_PROMEDIO_RD
+        })
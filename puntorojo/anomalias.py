@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+
+from puntorojo.espacial import LATITUD_REFERENCIA, _a_metros, sumar_ventanas
+
+# =============================================
+# DETECCIÓN ESTADÍSTICA DE ANOMALÍAS
+# =============================================
+# Z robusto (mediana/MAD) a partir del cual un transformador es atípico en su
+# sector; 3.5 es el umbral habitual de Iglewicz y Hoaglin
+UMBRAL_Z_ROBUSTO = 3.5
+MIN_TRAFOS_SECTOR = 5
+
+# Vecindad espacial: ventana de celdas de aproximadamente este radio
+RADIO_VECINDAD_M = 1000.0
+UMBRAL_Z_ESPACIAL = 3.0
+MIN_VECINOS = 5
+# Desviación mínima de la vecindad (pp), evita puntajes enormes en zonas homogéneas
+DESVIACION_MINIMA_PP = 2.0
+
+# Factor de escala de MAD a desviación estándar bajo normalidad
+_ESCALA_MAD = 0.6745
+
+
+def z_robusto_por_sector(sector, perdida, min_trafos=MIN_TRAFOS_SECTOR):
+    """
+    Z robusto de Perdida_% respecto a la distribución de su sector.
+
+    z = 0.6745 * (x - mediana) / MAD. Vale NaN en sectores con menos de
+    `min_trafos` valores o con MAD nula.
+    """
+    perdida = pd.Series(np.asarray(perdida, dtype=float))
+    grupos = perdida.groupby(np.asarray(sector), sort=False)
+    mediana = grupos.transform('median')
+    mad = (perdida - mediana).abs().groupby(np.asarray(sector), sort=False).transform('median')
+    conteo = grupos.transform('count')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = _ESCALA_MAD * (perdida - mediana) / mad
+    z[(conteo < min_trafos) | ~(mad > 0)] = np.nan
+    return z.to_numpy()
+
+
+def _celdas(lat, lon, tamano_celda):
+    """
+    Celda (cx, cy) de la rejilla de lado `tamano_celda` metros, anclada en el mínimo de las coordenadas dadas
+    """
+    x, y = _a_metros(lat, lon, LATITUD_REFERENCIA)
+    return ((x - x.min()) // tamano_celda).astype(np.int64), ((y - y.min()) // tamano_celda).astype(np.int64)
+
+
+def _z_ventanas(valores, cx, cy, min_vecinos):
+    """
+    Z de cada valor frente a los de la ventana de 5x5 celdas que lo rodea (celdas enteras >= 0)
+    """
+    forma = (int(cy.max()) + 1, int(cx.max()) + 1)
+    celda = cy * forma[1] + cx
+
+    sumas = []
+    for pesos in (None, valores, valores ** 2):
+        cuadricula = np.bincount(celda, weights=pesos, minlength=forma[0] * forma[1]).reshape(forma)
+        sumas.append(sumar_ventanas(cuadricula, cy, cx, 2))
+    # Se excluye el propio transformador
+    conteo = sumas[0] - 1
+    suma = sumas[1] - valores
+    suma_cuadrados = sumas[2] - valores ** 2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = suma / conteo
+        desviacion = np.sqrt(np.maximum(suma_cuadrados / conteo - media ** 2, 0.0))
+        z = (valores - media) / np.maximum(desviacion, DESVIACION_MINIMA_PP)
+    z[conteo < min_vecinos] = np.nan
+    return z
+
+
+def z_espacial(df, radio_m=RADIO_VECINDAD_M, min_vecinos=MIN_VECINOS):
+    """
+    Puntaje de atípico local: Perdida_% frente a sus vecinos a unos `radio_m` metros.
+
+    z = (x - media_vecinos) / max(desviación_vecinos, DESVIACION_MINIMA_PP).
+    La vecindad es la ventana de 5x5 celdas de lado radio_m/2 centrada en la
+    celda del transformador (un cuadrado de ~2.5 radios de lado); la rejilla
+    sólo depende de las coordenadas. Conteos, sumas y sumas de cuadrados se
+    acumulan por celda con bincount y se suman por ventana con una imagen
+    integral, de modo que el costo es lineal en el número de transformadores
+    aunque la densidad sea alta. Vale NaN con menos de `min_vecinos` vecinos
+    con pérdida conocida.
+    """
+    perdida = df['Perdida_%'].to_numpy(dtype=float)
+    lat = df['Latitud'].to_numpy(dtype=float)
+    lon = df['Longitud'].to_numpy(dtype=float)
+    z = np.full(len(perdida), np.nan)
+    ubicadas = np.isfinite(lat) & np.isfinite(lon)
+    validas = ubicadas & np.isfinite(perdida)
+    if not validas.any():
+        return z
+
+    cx, cy = _celdas(lat[ubicadas], lon[ubicadas], radio_m / 2)
+    con_valor = validas[ubicadas]
+    z[validas] = _z_ventanas(perdida[validas], cx[con_valor], cy[con_valor], min_vecinos)
+    return z
+
+
+def _marcar_anomalias(df):
+    df['Anomalia'] = (
+        (np.nan_to_num(df['Z_Robusto_Sector'].to_numpy(dtype=float), nan=0.0) >= UMBRAL_Z_ROBUSTO) |
+        (np.nan_to_num(df['Z_Espacial'].to_numpy(dtype=float), nan=0.0) >= UMBRAL_Z_ESPACIAL)
+    )
+    return df
+
+
+def detectar_anomalias(df, radio_m=RADIO_VECINDAD_M):
+    """
+    Añade Z_Robusto_Sector, Z_Espacial y Anomalia al dataset.
+
+    Anomalia marca pérdidas atípicamente altas (sólo desviaciones al alza)
+    en su sector o en su vecindad; calcular_prioridades la usa para elevar
+    la categoría cuando la columna está presente.
+    """
+    df = df.copy()
+    df['Z_Robusto_Sector'] = z_robusto_por_sector(df['Sector'], df['Perdida_%'])
+    df['Z_Espacial'] = z_espacial(df, radio_m)
+    return _marcar_anomalias(df)
+
+
+def _celdas_cercanas(cx, cy, ancho, distancia):
+    """
+    Identificadores (cy * ancho + cx) de las celdas a `distancia` celdas o menos (Chebyshev) de las dadas
+    """
+    desplazamientos = np.arange(-distancia, distancia + 1)
+    dx, dy = np.meshgrid(desplazamientos, desplazamientos)
+    vx = (cx[:, None] + dx.ravel()).ravel()
+    vy = (cy[:, None] + dy.ravel()).ravel()
+    dentro = (vx >= 0) & (vx < ancho) & (vy >= 0)
+    return np.unique(vy[dentro] * ancho + vx[dentro])
+
+
+def actualizar_anomalias(df, posiciones, radio_m=RADIO_VECINDAD_M, min_vecinos=MIN_VECINOS):
+    """
+    Recalcula Z_Robusto_Sector, Z_Espacial y Anomalia tras cambiar la Perdida_% de las filas `posiciones`.
+
+    Modifica `df` (que ya tiene las tres columnas) y lo devuelve. El z de
+    sector se recalcula completo sólo en los sectores de esas filas. El z
+    espacial cambia únicamente en las celdas a 2 o menos de una celda
+    modificada (su ventana la contiene); se recalcula para ellas con las
+    sumas de la franja de 4 celdas alrededor, que cubre sus ventanas. El
+    resultado coincide con detectar_anomalias sobre el dataset completo.
+    """
+    posiciones = np.asarray(posiciones)
+    sector = df['Sector']
+    en_sectores = sector.isin(pd.unique(sector.iloc[posiciones])).to_numpy()
+    z_sector = df['Z_Robusto_Sector'].to_numpy(dtype=float, copy=True)
+    z_sector[en_sectores] = z_robusto_por_sector(
+        sector.to_numpy()[en_sectores], df['Perdida_%'].to_numpy(dtype=float)[en_sectores]
+    )
+    df['Z_Robusto_Sector'] = z_sector
+
+    perdida = df['Perdida_%'].to_numpy(dtype=float)
+    lat = df['Latitud'].to_numpy(dtype=float)
+    lon = df['Longitud'].to_numpy(dtype=float)
+    z = df['Z_Espacial'].to_numpy(dtype=float, copy=True)
+    ubicadas = np.isfinite(lat) & np.isfinite(lon)
+    cambiadas = np.zeros(len(df), dtype=bool)
+    cambiadas[posiciones] = True
+    if (cambiadas & ubicadas).any():
+        cx, cy = _celdas(lat[ubicadas], lon[ubicadas], radio_m / 2)
+        ancho = int(cx.max()) + 1
+        celda = cy * ancho + cx
+        origen = cambiadas[ubicadas]
+        objetivo = np.isin(celda, _celdas_cercanas(cx[origen], cy[origen], ancho, 2))
+        banda = np.isin(celda, _celdas_cercanas(cx[origen], cy[origen], ancho, 4))
+        banda &= np.isfinite(perdida[ubicadas])
+
+        z_ubicadas = z[ubicadas]
+        z_ubicadas[objetivo] = np.nan
+        if banda.any():
+            bx, by = cx[banda], cy[banda]
+            z_banda = _z_ventanas(perdida[ubicadas][banda], bx - bx.min(), by - by.min(), min_vecinos)
+            recalcular = objetivo[banda]
+            z_ubicadas[np.flatnonzero(banda)[recalcular]] = z_banda[recalcular]
+        z[ubicadas] = z_ubicadas
+    df['Z_Espacial'] = z
+    return _marcar_anomalias(df)
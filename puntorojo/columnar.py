@@ -0,0 +1,186 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from puntorojo.ingesta import resolver_columnas, resolver_fecha
+
+# =============================================
+# FORMATOS COLUMNARES (PARQUET / ARROW IPC)
+# =============================================
+EXTENSIONES_PARQUET = ('.parquet', '.pq')
+EXTENSIONES_ARROW = ('.arrow', '.feather', '.ipc')
+_COLUMNA_POSICION = '__posicion'
+
+
+def formato_columnar(nombre):
+    """
+    Devuelve 'parquet', 'arrow' o None según la extensión del archivo
+    """
+    nombre = nombre.lower()
+    if nombre.endswith(EXTENSIONES_PARQUET):
+        return 'parquet'
+    if nombre.endswith(EXTENSIONES_ARROW):
+        return 'arrow'
+    return None
+
+
+def _es_ruta_local(origen):
+    return isinstance(origen, (str, os.PathLike))
+
+
+def _esquema(origen, formato):
+    """
+    Lee sólo el esquema (metadatos) del archivo, sin cargar datos
+    """
+    if formato == 'parquet':
+        esquema = pq.read_schema(origen)
+    else:
+        with _abrir_arrow(origen) as fuente:
+            esquema = pa.ipc.open_file(fuente).schema
+    if not _es_ruta_local(origen):
+        origen.seek(0)
+    return esquema
+
+
+def _abrir_arrow(origen):
+    """
+    Abre un archivo Arrow IPC: mapeado en memoria si es local, sin copia si está en memoria
+    """
+    if _es_ruta_local(origen):
+        return pa.memory_map(os.fspath(origen), 'r')
+    return pa.BufferReader(pa.py_buffer(origen.getbuffer()))
+
+
+def _escalar_fecha(valor, tipo):
+    """
+    Límite de fecha como escalar del tipo temporal de la columna
+    """
+    return pa.scalar(pd.Timestamp(valor).to_pydatetime()).cast(tipo)
+
+
+def _filtro(esquema, mapa_columnas, sectores, fecha_desde, fecha_hasta):
+    """
+    Expresión de filtro para el lector, o None.
+
+    Sólo incluye lo que se puede evaluar en Arrow sin cambiar el resultado:
+    Sector si la columna es texto y límites de fecha si la columna es
+    temporal. El filtro exacto lo vuelve a aplicar la validación
+    (ingesta.filtro_lectura), de modo que una columna de fecha en texto sólo
+    pierde el descarte anticipado.
+    """
+    columna = {col_std: variante for variante, col_std in mapa_columnas.items()}
+    condiciones = []
+    if sectores is not None:
+        tipo = esquema.field(columna['Sector']).type
+        if pa.types.is_dictionary(tipo):
+            tipo = tipo.value_type
+        if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+            condiciones.append(ds.field(columna['Sector']).isin([str(s) for s in sectores]))
+    if 'Periodo' in columna:
+        tipo = esquema.field(columna['Periodo']).type
+        if pa.types.is_temporal(tipo):
+            if fecha_desde is not None:
+                condiciones.append(ds.field(columna['Periodo']) >= _escalar_fecha(fecha_desde, tipo))
+            if fecha_hasta is not None:
+                condiciones.append(ds.field(columna['Periodo']) <= _escalar_fecha(fecha_hasta, tipo))
+    if not condiciones:
+        return None
+    expresion = condiciones[0]
+    for condicion in condiciones[1:]:
+        expresion = expresion & condicion
+    return expresion
+
+
+def _leer_parquet_filtrado(origen, columnas, filtro):
+    """
+    Lee sólo los grupos de filas que pueden cumplir `filtro` según sus estadísticas.
+
+    Devuelve (tabla, posiciones): las filas leídas y su posición en el
+    archivo, para que los rechazos conserven la numeración original.
+    """
+    tablas, posiciones = [], []
+    with _abrir_arrow(origen) as fuente:
+        fragmento = ds.ParquetFileFormat().make_fragment(fuente)
+        metadatos = fragmento.metadata
+        inicios = np.cumsum([0] + [metadatos.row_group(i).num_rows for i in range(metadatos.num_row_groups)])
+        for grupo in fragmento.split_by_row_group(filtro):
+            inicio = inicios[grupo.row_groups[0].id]
+            tabla = grupo.to_table(columns=columnas)
+            tablas.append(tabla)
+            posiciones.append(np.arange(inicio, inicio + tabla.num_rows))
+    if not tablas:
+        vacia = fragmento.physical_schema
+        return pa.schema([vacia.field(c) for c in columnas]).empty_table(), np.empty(0, dtype=np.int64)
+    return pa.concat_tables(tablas), np.concatenate(posiciones)
+
+
+def leer_columnar(origen, formato, sectores=None, fecha_desde=None, fecha_hasta=None):
+    """
+    Lee un archivo Parquet o Arrow IPC con columnas estándar, sin métricas.
+
+    Sólo se leen las columnas requeridas y la de periodo, si existe
+    (proyección en el lector: en Arrow IPC se decodifican únicamente esos
+    campos de cada lote). El filtro de Sector y fechas se empuja al lector:
+    en Parquet se descartan sin decodificar los grupos de filas que, según
+    sus estadísticas, no pueden cumplirlo, y las filas restantes se filtran
+    en Arrow. El índice del resultado es la posición de cada fila en el
+    archivo. Las rutas locales se leen mapeadas en memoria. La conversión,
+    la validación y las métricas quedan a cargo de
+    motor.cargar_archivo_validado, igual que en CSV y XLSX.
+    """
+    esquema = _esquema(origen, formato)
+    mapa_columnas = resolver_columnas(esquema.names)
+    col_fecha = resolver_fecha(esquema.names)
+    if col_fecha is not None:
+        mapa_columnas[col_fecha] = 'Periodo'
+    columnas = list(mapa_columnas)
+    filtro = _filtro(esquema, mapa_columnas, sectores, fecha_desde, fecha_hasta)
+
+    if formato == 'parquet' and filtro is None:
+        tabla = pq.read_table(origen, columns=columnas, memory_map=_es_ruta_local(origen))
+        posiciones = np.arange(tabla.num_rows)
+    elif formato == 'parquet':
+        tabla, posiciones = _leer_parquet_filtrado(origen, columnas, filtro)
+    else:
+        opciones = pa.ipc.IpcReadOptions(included_fields=[esquema.get_field_index(c) for c in columnas])
+        with _abrir_arrow(origen) as fuente:
+            tabla = pa.ipc.open_file(fuente, options=opciones).read_all()
+        tabla = tabla.select(columnas)
+        posiciones = np.arange(tabla.num_rows)
+
+    if filtro is not None:
+        # La posición viaja como columna para sobrevivir al filtro
+        tabla = tabla.append_column(_COLUMNA_POSICION, pa.array(posiciones)).filter(filtro)
+        posiciones = tabla.column(_COLUMNA_POSICION).to_numpy()
+        tabla = tabla.drop_columns([_COLUMNA_POSICION])
+    df = tabla.rename_columns([mapa_columnas[c] for c in columnas]).to_pandas()
+    df.index = posiciones
+    return df
+
+
+# =============================================
+# EXPORTACIÓN COLUMNAR
+# =============================================
+def exportar_parquet(df):
+    """
+    Serializa un DataFrame a bytes Parquet (compresión zstd)
+    """
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False, compression='zstd')
+    return buffer.getvalue()
+
+
+def exportar_arrow(df):
+    """
+    Serializa un DataFrame a bytes Arrow IPC (formato de archivo / Feather v2)
+    """
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    sumidero = pa.BufferOutputStream()
+    with pa.ipc.new_file(sumidero, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    return sumidero.getvalue().to_pybytes()
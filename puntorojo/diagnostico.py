@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage, el pico de RSS queda vacío
+    resource = None
+
+# =============================================
+# DIAGNÓSTICO DEL PIPELINE (TIEMPOS Y MEMORIA)
+# =============================================
+RUTA_LOG_DIAGNOSTICO = os.path.join('datos', 'diagnostico.jsonl')
+
+COLUMNAS_DIAGNOSTICO = ['Etapa', 'Segundos', 'Filas', 'Bytes', 'RSS_Pico_MB']
+
+logger = logging.getLogger('puntorojo.diagnostico')
+
+
+def rss_pico_mb():
+    """
+    Pico de memoria residente del proceso (MB) desde su inicio, o None si no se puede medir
+    """
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return pico / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def configurar_log(ruta=RUTA_LOG_DIAGNOSTICO):
+    """
+    Envía los registros de diagnóstico a `ruta` como JSON por línea (una sola vez por proceso)
+    """
+    if any(getattr(h, 'baseFilename', None) == os.path.abspath(ruta) for h in logger.handlers):
+        return
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    manejador = logging.FileHandler(ruta, encoding='utf-8')
+    manejador.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(manejador)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class Diagnostico:
+    """
+    Mide tiempo de pared, filas, bytes y pico de RSS de cada etapa del pipeline.
+
+    Inactivo (el caso normal) cada medición se reduce a un `with` vacío: no
+    se toma el tiempo ni se consulta la memoria, y las mediciones caras (p.
+    ej. el tamaño del HTML del mapa) deben condicionarse a `activo`. Activo,
+    cada etapa se guarda en `registros` y se emite al logger
+    'puntorojo.diagnostico' como un objeto JSON con `contexto` (p. ej. la
+    huella del dataset).
+    """
+
+    def __init__(self, activo=False, **contexto):
+        self.activo = activo
+        self.contexto = contexto
+        self.registros = []
+        self.inicio = time.perf_counter()
+
+    @contextmanager
+    def etapa(self, nombre, filas=None):
+        """
+        Mide el bloque como la etapa `nombre`.
+
+        Entrega un dict donde el bloque puede anotar 'filas' y 'bytes' del resultado.
+        """
+        medida = {'filas': filas}
+        if not self.activo:
+            yield medida
+            return
+        inicio = time.perf_counter()
+        try:
+            yield medida
+        finally:
+            self.registrar(nombre, time.perf_counter() - inicio, medida.get('filas'), medida.get('bytes'))
+
+    def registrar(self, nombre, segundos=None, filas=None, bytes_=None):
+        """
+        Agrega una medición (sin efecto si el diagnóstico está inactivo)
+        """
+        if not self.activo:
+            return
+        registro = {
+            'Etapa': nombre,
+            'Segundos': segundos,
+            'Filas': filas,
+            'Bytes': bytes_,
+            'RSS_Pico_MB': rss_pico_mb()
+        }
+        self.registros.append(registro)
+        logger.info(json.dumps({
+            'fecha': datetime.now().isoformat(timespec='milliseconds'),
+            **self.contexto,
+            **{clave.lower(): valor for clave, valor in registro.items()}
+        }, ensure_ascii=False, default=str))
+
+    def cerrar(self, nombre='Total'):
+        """
+        Registra el tiempo total desde la creación (p. ej. el rerun completo de la app)
+        """
+        self.registrar(nombre, time.perf_counter() - self.inicio)
+
+    def resumen(self):
+        return pd.DataFrame(self.registros, columns=COLUMNAS_DIAGNOSTICO)
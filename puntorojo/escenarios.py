@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+from puntorojo.ingesta import FACTOR_CARGA, HORAS_MES, TARIFA_PROMEDIO_RD
+from puntorojo.muestreo import COLUMNA_PESO
+from puntorojo.prioridad import (
+    CATEGORIAS_PRIORIDAD, PESO_PORCENTAJE, PESO_SOBRECARGA, PESO_VOLUMEN, SECTORES_OPERATIVO
+)
+
+# =============================================
+# SIMULADOR DE ESCENARIOS (WHAT-IF)
+# =============================================
+PARAMETROS_ESCENARIO = ['Tarifa_RD', 'Horas_Mes', 'Factor_Carga', 'Peso_Volumen', 'Peso_Porcentaje', 'Peso_Sobrecarga']
+
+# Parámetros vigentes: el escenario base reproduce calcular_prioridades
+ESCENARIO_BASE = {
+    'Escenario': 'Base',
+    'Tarifa_RD': TARIFA_PROMEDIO_RD,
+    'Horas_Mes': HORAS_MES,
+    'Factor_Carga': FACTOR_CARGA,
+    'Peso_Volumen': PESO_VOLUMEN,
+    'Peso_Porcentaje': PESO_PORCENTAJE,
+    'Peso_Sobrecarga': PESO_SOBRECARGA
+}
+
+TOP_K_ESCENARIOS = 100
+
+# Celdas (escenarios x transformadores) que se evalúan a la vez; acota la memoria
+CELDAS_POR_BLOQUE = 20_000_000
+
+COLUMNAS_RANKING = ['Escenario', 'Rango', 'ID_Trafo', 'Sector', 'Prioridad_Score', 'Rango_Base', 'Cambio_Rango']
+
+
+def escenarios_ejemplo():
+    """
+    Tabla de escenarios de partida: el base y variaciones de tarifa, carga y pesos
+    """
+    variaciones = [
+        ('Base', {}),
+        ('Tarifa +10%', {'Tarifa_RD': TARIFA_PROMEDIO_RD * 1.1}),
+        ('Tarifa -10%', {'Tarifa_RD': TARIFA_PROMEDIO_RD * 0.9}),
+        ('Factor de carga 0.7', {'Factor_Carga': 0.7}),
+        ('Pesos 50/25/25', {'Peso_Volumen': 50, 'Peso_Porcentaje': 25, 'Peso_Sobrecarga': 25}),
+        ('Pesos 30/30/40', {'Peso_Volumen': 30, 'Peso_Porcentaje': 30, 'Peso_Sobrecarga': 40})
+    ]
+    return pd.DataFrame([{**ESCENARIO_BASE, **cambios, 'Escenario': nombre} for nombre, cambios in variaciones])
+
+
+def _matriz_scores(volumen, porcentaje, carga_base, tendencia, parametros):
+    """
+    Scores (escenarios x transformadores) y carga % por escenario, en float32.
+
+    La carga se reescala desde la carga base: depende de horas x factor sólo
+    a través del denominador.
+    """
+    escala_carga = (HORAS_MES * FACTOR_CARGA) / (parametros['Horas_Mes'] * parametros['Factor_Carga'])
+    carga = np.outer(escala_carga, carga_base).astype(np.float32)
+    peso_sobrecarga = parametros['Peso_Sobrecarga'][:, None].astype(np.float32)
+
+    score = np.where(carga > 100, peso_sobrecarga, carga / 100 * (peso_sobrecarga / 2))
+    score += np.outer(parametros['Peso_Volumen'], volumen).astype(np.float32)
+    score += np.outer(parametros['Peso_Porcentaje'], porcentaje).astype(np.float32)
+    score += tendencia
+    return score, carga
+
+
+def _top_k(score, k):
+    """
+    Índices de los k mayores scores de cada fila, en orden descendente (empates por posición)
+    """
+    clave = np.where(np.isnan(score), -np.inf, score)
+    k = min(k, clave.shape[1])
+    indices = np.sort(np.argpartition(-clave, k - 1, axis=1)[:, :k], axis=1)
+    orden = np.argsort(-np.take_along_axis(clave, indices, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(indices, orden, axis=1)
+
+
+def evaluar_escenarios(df_priorizado, escenarios, top_k=TOP_K_ESCENARIOS):
+    """
+    Evalúa N escenarios de parámetros sobre el mismo dataset en pasadas NumPy por lotes.
+
+    `escenarios` es una tabla con Escenario y PARAMETROS_ESCENARIO (tarifa
+    RD$/kWh, horas x factor de carga y pesos del score). Reutiliza las
+    métricas ya calculadas (kWh_Perdido, Perdida_% y Carga_%): por escenario
+    sólo cambian la carga (reescalada), el score y la categoría, que se
+    calculan como matrices escenarios x transformadores por bloques de
+    CELDAS_POR_BLOQUE celdas. Score_Tendencia y Anomalia se respetan si
+    están presentes. Sobre una muestra (con COLUMNA_PESO) la pérdida
+    monetaria y los conteos se expanden por el peso de cada fila.
+
+    Devuelve (df_totales, df_ranking): por escenario, pérdida monetaria,
+    transformadores por categoría, sobrecargados e impacto del top K y cuánto
+    cambia el top K respecto al escenario base (parámetros vigentes); y el
+    top K de cada escenario con su rango base y el cambio de rango.
+    """
+    escenarios = escenarios.reset_index(drop=True)
+    parametros = {p: escenarios[p].to_numpy(dtype=np.float64) for p in PARAMETROS_ESCENARIO}
+    n = len(df_priorizado)
+    k = min(top_k, n)
+
+    perdido = df_priorizado['kWh_Perdido'].to_numpy(dtype=float)
+    perdida = df_priorizado['Perdida_%'].to_numpy(dtype=float)
+    volumen = perdido / np.nanmax(perdido)
+    porcentaje = perdida / 100
+    carga_base = df_priorizado['Carga_%'].to_numpy(dtype=float)
+    tendencia = (
+        df_priorizado['Score_Tendencia'].to_numpy(dtype=np.float32) if 'Score_Tendencia' in df_priorizado
+        else np.float32(0)
+    )
+    operativo = df_priorizado['Sector'].isin(SECTORES_OPERATIVO).to_numpy() & (perdida > 50)
+    atipico = (
+        df_priorizado['Anomalia'].to_numpy(dtype=bool) if 'Anomalia' in df_priorizado
+        else np.zeros(n, dtype=bool)
+    )
+    perdida_alta = perdida > 40
+    peso = (
+        df_priorizado[COLUMNA_PESO].to_numpy(dtype=float) if COLUMNA_PESO in df_priorizado
+        else np.ones(n, dtype=np.int64)
+    )
+
+    # Ranking completo del escenario base, para medir desplazamientos
+    base = {p: np.array([ESCENARIO_BASE[p]], dtype=np.float64) for p in PARAMETROS_ESCENARIO}
+    score_base, _ = _matriz_scores(volumen, porcentaje, carga_base, tendencia, base)
+    clave_base = np.where(np.isnan(score_base[0]), -np.inf, score_base[0])
+    rango_base = np.empty(n, dtype=np.int64)
+    rango_base[np.argsort(-clave_base, kind='stable')] = np.arange(1, n + 1)
+
+    totales, top = [], []
+    por_bloque = max(1, CELDAS_POR_BLOQUE // max(n, 1))
+    for inicio in range(0, len(escenarios), por_bloque):
+        bloque = {p: v[inicio:inicio + por_bloque] for p, v in parametros.items()}
+        score, carga = _matriz_scores(volumen, porcentaje, carga_base, tendencia, bloque)
+
+        # Misma regla que categorizar_prioridad, sobre la matriz
+        sobrecarga = carga > 100
+        codigo = np.select(
+            [operativo, sobrecarga & perdida_alta, atipico | (score > 70), score > 40],
+            [0, 1, 2, 3],
+            default=4
+        ).astype(np.int8)
+        conteos = np.stack([(codigo == c) @ peso for c in range(len(CATEGORIAS_PRIORIDAD))], axis=1)
+
+        indices = _top_k(score, k)
+        rangos_base = rango_base[indices]
+        topk_perdido = np.nansum(perdido[indices], axis=1)
+        totales.append(pd.DataFrame({
+            'Perdida_Monetaria_Total_RD$': bloque['Tarifa_RD'] * np.nansum(perdido * peso),
+            'Sobrecargados': np.rint(sobrecarga @ peso).astype(np.int64),
+            **{categoria: np.rint(conteos[:, c]).astype(np.int64) for c, categoria in enumerate(CATEGORIAS_PRIORIDAD)},
+            'TopK_kWh_Perdido': topk_perdido,
+            'TopK_Monetario_RD$': bloque['Tarifa_RD'] * topk_perdido,
+            'Nuevos_en_TopK': (rangos_base > k).sum(axis=1),
+            'Cambio_Rango_Medio': np.abs(rangos_base - np.arange(1, k + 1)).mean(axis=1),
+            'Cambio_Rango_Max': np.abs(rangos_base - np.arange(1, k + 1)).max(axis=1)
+        }))
+        top.append((indices, np.take_along_axis(score, indices, axis=1)))
+
+    df_totales = pd.concat([escenarios[['Escenario'] + PARAMETROS_ESCENARIO], pd.concat(totales, ignore_index=True)],
+                           axis=1)
+
+    indices = np.concatenate([i for i, _ in top])
+    scores = np.concatenate([s for _, s in top])
+    posiciones = indices.ravel()
+    df_ranking = pd.DataFrame({
+        'Escenario': np.repeat(escenarios['Escenario'].to_numpy(), k),
+        'Rango': np.tile(np.arange(1, k + 1), len(escenarios)),
+        'ID_Trafo': df_priorizado['ID_Trafo'].to_numpy()[posiciones],
+        'Sector': df_priorizado['Sector'].to_numpy()[posiciones],
+        'Prioridad_Score': scores.ravel(),
+        'Rango_Base': rango_base[posiciones]
+    })
+    df_ranking['Cambio_Rango'] = df_ranking['Rango_Base'] - df_ranking['Rango']
+    return df_totales, df_ranking[COLUMNAS_RANKING]
@@ -0,0 +1,258 @@
+import numpy as np
+import pandas as pd
+
+# =============================================
+# PROYECCIÓN LOCAL
+# =============================================
+# Metros por grado en latitud y en longitud (en el ecuador)
+METROS_POR_GRADO_LAT = 110_540.0
+METROS_POR_GRADO_LON = 111_320.0
+
+# Latitud de referencia del corredor Este (DN - SDE - San Pedro de Macorís)
+LATITUD_REFERENCIA = 18.48
+
+# Metros por píxel en zoom 0 de la proyección Web Mercator (en el ecuador)
+METROS_POR_PIXEL_Z0 = 156_543.03
+
+# Niveles de zoom para los que se preagrega la capa de calor
+ZOOM_MINIMO = 8
+ZOOM_MAXIMO = 16
+
+_RAIZ_3 = np.sqrt(3.0)
+
+
+def _a_metros(lat, lon, lat_ref):
+    escala_lon = METROS_POR_GRADO_LON * np.cos(np.radians(lat_ref))
+    return lon * escala_lon, lat * METROS_POR_GRADO_LAT
+
+
+def _a_grados(x, y, lat_ref):
+    escala_lon = METROS_POR_GRADO_LON * np.cos(np.radians(lat_ref))
+    return y / METROS_POR_GRADO_LAT, x / escala_lon
+
+
+# =============================================
+# AGREGACIÓN HEXAGONAL
+# =============================================
+def tamano_celda_para_zoom(zoom, pixeles=8, latitud=LATITUD_REFERENCIA):
+    """
+    Radio de celda (m) que ocupa aproximadamente `pixeles` en pantalla al zoom dado
+    """
+    zoom = min(max(int(round(zoom)), ZOOM_MINIMO), ZOOM_MAXIMO)
+    metros_por_pixel = METROS_POR_PIXEL_Z0 * np.cos(np.radians(latitud)) / (2 ** zoom)
+    return metros_por_pixel * pixeles
+
+
+def agregar_hexagonos(lat, lon, peso, tamano_m, lat_ref=LATITUD_REFERENCIA):
+    """
+    Agrega puntos ponderados en celdas hexagonales de radio `tamano_m` metros.
+
+    Usa una rejilla hexagonal (coordenadas axiales, hexágonos con vértice
+    arriba) sobre una proyección equirectangular local. Devuelve un DataFrame
+    con el centro de cada celda, la suma de pesos y el número de puntos.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    peso = np.asarray(peso, dtype=float)
+
+    validos = np.isfinite(lat) & np.isfinite(lon) & np.isfinite(peso)
+    lat, lon, peso = lat[validos], lon[validos], peso[validos]
+    if len(lat) == 0:
+        return pd.DataFrame({'Latitud': [], 'Longitud': [], 'Peso': [], 'Num_Transformadores': []})
+
+    x, y = _a_metros(lat, lon, lat_ref)
+
+    # Coordenadas axiales fraccionarias
+    q = (_RAIZ_3 / 3 * x - y / 3) / tamano_m
+    r = (2 / 3 * y) / tamano_m
+
+    # Redondeo cúbico al hexágono más cercano
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    corregir_q = (dq > dr) & (dq > ds)
+    corregir_r = ~corregir_q & (dr > ds)
+    rq = np.where(corregir_q, -rr - rs, rq)
+    rr = np.where(corregir_r, -rq - rs, rr)
+
+    celdas = np.stack([rq.astype(np.int64), rr.astype(np.int64)], axis=1)
+    unicas, inversa = np.unique(celdas, axis=0, return_inverse=True)
+    inversa = inversa.ravel()
+
+    peso_celda = np.bincount(inversa, weights=peso, minlength=len(unicas))
+    conteo_celda = np.bincount(inversa, minlength=len(unicas))
+
+    cq, cr = unicas[:, 0].astype(float), unicas[:, 1].astype(float)
+    cx = tamano_m * _RAIZ_3 * (cq + cr / 2)
+    cy = tamano_m * 1.5 * cr
+    clat, clon = _a_grados(cx, cy, lat_ref)
+
+    return pd.DataFrame({
+        'Latitud': clat,
+        'Longitud': clon,
+        'Peso': peso_celda,
+        'Num_Transformadores': conteo_celda
+    })
+
+
+def agregar_calor_para_zoom(df, zoom, columna_peso='kWh_Perdido'):
+    """
+    Agrega la capa de calor al nivel de detalle apropiado para el zoom dado
+    """
+    return agregar_hexagonos(
+        df['Latitud'].to_numpy(),
+        df['Longitud'].to_numpy(),
+        df[columna_peso].to_numpy(),
+        tamano_celda_para_zoom(zoom)
+    )
+
+
+def sumar_ventanas(cuadricula, cy, cx, medio):
+    """
+    Suma de la ventana (2*medio+1)^2 de celdas alrededor de (cy, cx), vía imagen integral
+    """
+    integral = np.zeros((cuadricula.shape[0] + 1, cuadricula.shape[1] + 1))
+    integral[1:, 1:] = cuadricula.cumsum(axis=0).cumsum(axis=1)
+    y0 = np.clip(cy - medio, 0, cuadricula.shape[0])
+    y1 = np.clip(cy + medio + 1, 0, cuadricula.shape[0])
+    x0 = np.clip(cx - medio, 0, cuadricula.shape[1])
+    x1 = np.clip(cx + medio + 1, 0, cuadricula.shape[1])
+    return integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+
+
+# =============================================
+# ÍNDICE ESPACIAL (REJILLA ORDENADA)
+# =============================================
+RADIO_TIERRA_KM = 6371.0088
+
+
+def distancia_haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Distancia de gran círculo en km (vectorizada, admite broadcasting)
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def limites_vista(centro, zoom, ancho_px, alto_px, latitud=LATITUD_REFERENCIA):
+    """
+    Caja (lat_min, lat_max, lon_min, lon_max) visible para un centro, zoom y tamaño de mapa
+    """
+    metros_por_pixel = METROS_POR_PIXEL_Z0 * np.cos(np.radians(latitud)) / (2 ** zoom)
+    medio_alto = alto_px / 2 * metros_por_pixel / METROS_POR_GRADO_LAT
+    medio_ancho = ancho_px / 2 * metros_por_pixel / (METROS_POR_GRADO_LON * np.cos(np.radians(latitud)))
+    lat, lon = centro
+    return lat - medio_alto, lat + medio_alto, lon - medio_ancho, lon + medio_ancho
+
+
+class IndiceEspacial:
+    """
+    Índice de rejilla ordenada sobre Latitud/Longitud.
+
+    Los puntos se proyectan a metros, se asignan a celdas cuadradas y se
+    ordenan por clave de celda (fila * columnas + columna), de modo que cada
+    fila de celdas de una consulta es un tramo contiguo que se localiza con
+    búsqueda binaria. Las consultas devuelven posiciones (iloc) en el
+    DataFrame con el que se construyó el índice.
+    """
+
+    def __init__(self, df, tamano_celda_m=500.0, lat_ref=LATITUD_REFERENCIA):
+        self.lat = df['Latitud'].to_numpy(dtype=float)
+        self.lon = df['Longitud'].to_numpy(dtype=float)
+        self.tamano_celda_m = float(tamano_celda_m)
+        self.lat_ref = lat_ref
+
+        validos = np.flatnonzero(np.isfinite(self.lat) & np.isfinite(self.lon))
+        x, y = _a_metros(self.lat[validos], self.lon[validos], lat_ref)
+        if len(validos):
+            self.x0, self.y0 = x.min(), y.min()
+            self.columnas = int((x.max() - self.x0) // self.tamano_celda_m) + 1
+            self.filas = int((y.max() - self.y0) // self.tamano_celda_m) + 1
+        else:
+            self.x0 = self.y0 = 0.0
+            self.columnas = self.filas = 1
+
+        cx, cy = self._celda(x, y)
+        claves = cy * self.columnas + cx
+        orden = np.argsort(claves, kind='stable')
+        self.claves = claves[orden]
+        self.posiciones = validos[orden]
+
+    def __len__(self):
+        return len(self.posiciones)
+
+    def _celda(self, x, y):
+        cx = np.clip(((x - self.x0) // self.tamano_celda_m).astype(np.int64), 0, self.columnas - 1)
+        cy = np.clip(((y - self.y0) // self.tamano_celda_m).astype(np.int64), 0, self.filas - 1)
+        return cx, cy
+
+    def _candidatos(self, cx0, cx1, cy0, cy1):
+        """
+        Posiciones de los puntos en el rectángulo de celdas [cx0, cx1] x [cy0, cy1]
+        """
+        cx0, cx1 = max(cx0, 0), min(cx1, self.columnas - 1)
+        cy0, cy1 = max(cy0, 0), min(cy1, self.filas - 1)
+        if cx0 > cx1 or cy0 > cy1:
+            return np.empty(0, dtype=np.int64)
+
+        filas = np.arange(cy0, cy1 + 1, dtype=np.int64) * self.columnas
+        inicios = np.searchsorted(self.claves, filas + cx0, side='left')
+        fines = np.searchsorted(self.claves, filas + cx1, side='right')
+        if len(inicios) == 1:
+            return self.posiciones[inicios[0]:fines[0]]
+        return np.concatenate([self.posiciones[i:f] for i, f in zip(inicios, fines)])
+
+    def consultar_caja(self, lat_min, lat_max, lon_min, lon_max):
+        """
+        Posiciones de los transformadores dentro de la caja dada, ordenadas
+        """
+        x0, y0 = _a_metros(lat_min, lon_min, self.lat_ref)
+        x1, y1 = _a_metros(lat_max, lon_max, self.lat_ref)
+        cx0 = int(np.floor((x0 - self.x0) / self.tamano_celda_m))
+        cx1 = int(np.floor((x1 - self.x0) / self.tamano_celda_m))
+        cy0 = int(np.floor((y0 - self.y0) / self.tamano_celda_m))
+        cy1 = int(np.floor((y1 - self.y0) / self.tamano_celda_m))
+
+        candidatos = self._candidatos(cx0, cx1, cy0, cy1)
+        lat, lon = self.lat[candidatos], self.lon[candidatos]
+        dentro = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+        return np.sort(candidatos[dentro])
+
+    def vecinos_mas_cercanos(self, lat, lon, k, mascara=None):
+        """
+        Los k transformadores más cercanos a (lat, lon).
+
+        `mascara` (booleana, alineada con el DataFrame) restringe los
+        candidatos, p. ej. a los críticos. La búsqueda expande anillos de
+        celdas hasta que el k-ésimo vecino queda dentro del radio cubierto.
+        Devuelve (posiciones, distancias_km) ordenadas por distancia.
+        """
+        vacio = (np.empty(0, dtype=np.int64), np.empty(0))
+        if k <= 0 or len(self) == 0:
+            return vacio
+
+        x, y = _a_metros(lat, lon, self.lat_ref)
+        cx = int(np.floor((x - self.x0) / self.tamano_celda_m))
+        cy = int(np.floor((y - self.y0) / self.tamano_celda_m))
+        # Anillo que cubre toda la rejilla desde la celda del punto
+        anillo_max = max(abs(cx), abs(cy), abs(self.columnas - 1 - cx), abs(self.filas - 1 - cy))
+
+        anillo = 1
+        while True:
+            candidatos = self._candidatos(cx - anillo, cx + anillo, cy - anillo, cy + anillo)
+            if mascara is not None:
+                candidatos = candidatos[mascara[candidatos]]
+
+            if len(candidatos) >= k or anillo >= anillo_max:
+                px, py = _a_metros(self.lat[candidatos], self.lon[candidatos], self.lat_ref)
+                d_plana = np.hypot(px - x, py - y)
+                orden = np.argsort(d_plana, kind='stable')[:k]
+                # Todo punto a menos de `anillo` celdas está ya entre los candidatos
+                if anillo >= anillo_max or (len(orden) == k and d_plana[orden[-1]] <= anillo * self.tamano_celda_m):
+                    break
+            anillo = min(anillo * 2, anillo_max)
+
+        distancias = distancia_haversine_km(lat, lon, self.lat[candidatos], self.lon[candidatos])
+        orden = np.argsort(distancias, kind='stable')[:k]
+        return candidatos[orden], distancias[orden]
@@ -0,0 +1,246 @@
+import io
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+from puntorojo.prioridad import CATEGORIAS_PRIORIDAD
+
+# =============================================
+# REPORTE EXCEL (XLSX) DE VARIAS HOJAS
+# =============================================
+CATEGORIAS_CRITICAS = CATEGORIAS_PRIORIDAD[:2]
+
+# Formato numérico por columna (las no listadas quedan con el formato general)
+FORMATOS_COLUMNA = {
+    'Latitud': '0.000000',
+    'Longitud': '0.000000',
+    'Capacidad_kVA': '#,##0',
+    'kWh_Entregado': '#,##0',
+    'kWh_Facturado': '#,##0',
+    'kWh_Perdido': '#,##0',
+    'kWh_Perdido_Total': '#,##0',
+    'Perdida_%': '0.0',
+    'Perdida_%_Promedio': '0.0',
+    'Carga_%': '0.0',
+    'Perdida_Monetaria_RD$': '"RD$" #,##0',
+    'Impacto_Monetario': '"RD$" #,##0',
+    'Prioridad_Score': '0.0',
+    'Z_Robusto_Sector': '0.00',
+    'Z_Espacial': '0.00'
+}
+
+ANCHO_MINIMO = 10
+ANCHO_MAXIMO = 60
+# Filas que se serializan a la vez: la memoria depende de este valor, no del total
+FILAS_POR_BLOQUE = 10_000
+
+COLOR_ENCABEZADO = 'C0392B'
+
+_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_NS_R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_DECLARACION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+# Caracteres de control no admitidos en XML 1.0
+_CONTROL = r'[\x00-\x08\x0b\x0c\x0e-\x1f]'
+
+# Índices de estilo (cellXfs): 0 general, 1 encabezado, 2.. un formato numérico cada uno
+_ESTILO_ENCABEZADO = 1
+_FORMATOS = sorted(set(FORMATOS_COLUMNA.values()))
+_ESTILO_FORMATO = {formato: 2 + i for i, formato in enumerate(_FORMATOS)}
+
+
+def hojas_reporte(df_priorizado, df_sector):
+    """
+    Hojas del reporte de gerencia: {nombre de hoja: DataFrame}
+    """
+    criticos = df_priorizado['Categoria_Prioridad'].isin(CATEGORIAS_CRITICAS)
+    return {
+        'Análisis completo': df_priorizado,
+        'Transformadores críticos': df_priorizado[criticos],
+        'Resumen por sector': df_sector
+    }
+
+
+def _letra_columna(indice):
+    """
+    Letra de columna de Excel para un índice base 0 (0 -> A, 26 -> AA)
+    """
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _ancho_columna(nombre, serie):
+    """
+    Ancho aproximado (caracteres) a partir del encabezado y de una muestra de valores
+    """
+    largo = max((len(str(v)) for v in serie.head(200).tolist()), default=0)
+    return min(max(len(nombre), largo, ANCHO_MINIMO - 2) + 2, ANCHO_MAXIMO)
+
+
+def _celdas_columna(serie, letra, filas):
+    """
+    XML de las celdas de una columna para un bloque de filas.
+
+    Los faltantes (NaN, None, inf) no generan celda.
+    """
+    estilo = _ESTILO_FORMATO.get(FORMATOS_COLUMNA.get(serie.name))
+    atributo_estilo = f' s="{estilo}"' if estilo else ''
+
+    if serie.dtype.kind == 'b':
+        return [f'<c r="{letra}{n}" t="b"><v>{v:d}</v></c>' for n, v in zip(filas, serie.tolist())]
+    if serie.dtype.kind in 'iuf':
+        # v - v == 0 descarta NaN e infinitos
+        return [
+            f'<c r="{letra}{n}"{atributo_estilo}><v>{v!r}</v></c>' if v - v == 0 else ''
+            for n, v in zip(filas, serie.tolist())
+        ]
+
+    presentes = serie.notna().tolist()
+    texto = (
+        serie.astype(str)
+        .str.replace('&', '&amp;', regex=False)
+        .str.replace('<', '&lt;', regex=False)
+        .str.replace('>', '&gt;', regex=False)
+        .str.replace(_CONTROL, '', regex=True)
+        .tolist()
+    )
+    return [
+        f'<c r="{letra}{n}" t="inlineStr"><is><t xml:space="preserve">{v}</t></is></c>' if presente else ''
+        for n, v, presente in zip(filas, texto, presentes)
+    ]
+
+
+def _escribir_hoja(salida, df):
+    """
+    Escribe el XML de una hoja por bloques de filas en el flujo `salida`
+    """
+    columnas = [str(c) for c in df.columns]
+    letras = [_letra_columna(i) for i in range(len(columnas))]
+    anchos = ''.join(
+        f'<col min="{i}" max="{i}" width="{_ancho_columna(columna, df[columna])}" customWidth="1"/>'
+        for i, columna in enumerate(columnas, start=1)
+    )
+    encabezado = ''.join(
+        f'<c r="{letra}1" s="{_ESTILO_ENCABEZADO}" t="inlineStr"><is><t>{escape(columna)}</t></is></c>'
+        for letra, columna in zip(letras, columnas)
+    )
+    salida.write((
+        f'{_DECLARACION}<worksheet xmlns="{_NS}" xmlns:r="{_NS_R}">'
+        '<sheetViews><sheetView workbookViewId="0">'
+        '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+        '</sheetView></sheetViews>'
+        f'<cols>{anchos}</cols><sheetData><row r="1">{encabezado}</row>'
+    ).encode('utf-8'))
+
+    for inicio in range(0, len(df), FILAS_POR_BLOQUE):
+        bloque = df.iloc[inicio:inicio + FILAS_POR_BLOQUE]
+        filas = [str(n) for n in range(inicio + 2, inicio + 2 + len(bloque))]
+        celdas = [_celdas_columna(bloque[columna], letra, filas) for columna, letra in zip(columnas, letras)]
+        xml = ''.join(f'<row r="{n}">{"".join(fila)}</row>' for n, fila in zip(filas, zip(*celdas)))
+        salida.write(xml.encode('utf-8'))
+
+    salida.write(b'</sheetData></worksheet>')
+
+
+def _estilos():
+    formatos = ''.join(
+        f'<numFmt numFmtId="{164 + i}" formatCode={quoteattr(formato)}/>' for i, formato in enumerate(_FORMATOS)
+    )
+    xfs_formato = ''.join(
+        f'<xf numFmtId="{164 + i}" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        for i in range(len(_FORMATOS))
+    )
+    return (
+        f'{_DECLARACION}<styleSheet xmlns="{_NS}">'
+        f'<numFmts count="{len(_FORMATOS)}">{formatos}</numFmts>'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><color rgb="FFFFFFFF"/><name val="Calibri"/></font></fonts>'
+        '<fills count="3"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill>'
+        f'<fill><patternFill patternType="solid"><fgColor rgb="FF{COLOR_ENCABEZADO}"/>'
+        '<bgColor indexed="64"/></patternFill></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        f'<cellXfs count="{2 + len(_FORMATOS)}">'
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1" '
+        'applyAlignment="1"><alignment horizontal="center" vertical="center" wrapText="1"/></xf>'
+        f'{xfs_formato}</cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    )
+
+
+def _partes_libro(nombres):
+    """
+    Partes fijas del paquete XLSX: tipos de contenido, relaciones y libro
+    """
+    n = len(nombres)
+    tipos = (
+        f'{_DECLARACION}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        + ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, n + 1)
+        )
+        + '</Types>'
+    )
+    relaciones = (
+        f'{_DECLARACION}<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{_NS_R}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    )
+    libro = (
+        f'{_DECLARACION}<workbook xmlns="{_NS}" xmlns:r="{_NS_R}"><sheets>'
+        + ''.join(
+            f'<sheet name={quoteattr(nombre[:31])} sheetId="{i}" r:id="rId{i}"/>'
+            for i, nombre in enumerate(nombres, start=1)
+        )
+        + '</sheets></workbook>'
+    )
+    relaciones_libro = (
+        f'{_DECLARACION}<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + ''.join(
+            f'<Relationship Id="rId{i}" Type="{_NS_R}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, n + 1)
+        )
+        + f'<Relationship Id="rId{n + 1}" Type="{_NS_R}/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    )
+    return {
+        '[Content_Types].xml': tipos,
+        '_rels/.rels': relaciones,
+        'xl/workbook.xml': libro,
+        'xl/_rels/workbook.xml.rels': relaciones_libro,
+        'xl/styles.xml': _estilos()
+    }
+
+
+def exportar_xlsx(hojas):
+    """
+    Serializa {nombre de hoja: DataFrame} a bytes XLSX con formato.
+
+    Escritor en flujo: el XML de cada hoja se genera por bloques de
+    FILAS_POR_BLOQUE filas (texto construido por columna, sin un objeto por
+    celda) y se comprime directamente en el ZIP, de modo que la memoria no
+    crece con el número de filas (salvo el archivo final comprimido).
+    Encabezado en negrita con la fila congelada, anchos de columna y
+    formatos numéricos (kWh, %, RD$).
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as paquete:
+        for nombre, contenido in _partes_libro(list(hojas)).items():
+            paquete.writestr(nombre, contenido)
+        for i, df in enumerate(hojas.values(), start=1):
+            with paquete.open(f'xl/worksheets/sheet{i}.xml', 'w', force_zip64=True) as salida:
+                _escribir_hoja(salida, df)
+    return buffer.getvalue()
+
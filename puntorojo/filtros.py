@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from puntorojo.prioridad import CATEGORIAS_PRIORIDAD
+
+# =============================================
+# ÍNDICE DE FILTROS DEL LISTADO PRIORIZADO
+# =============================================
+COLUMNAS_FILTRO = ['Categoria_Prioridad', 'Sector']
+
+# Orden fijo de las opciones por columna; las demás, por orden de aparición
+ORDEN_VALORES = {'Categoria_Prioridad': CATEGORIAS_PRIORIDAD}
+
+
+class IndiceFiltros:
+    """
+    Índice precalculado para filtrar por categoría, sector y rango de Perdida_%.
+
+    Se construye una vez por dataset: para cada valor de Categoria_Prioridad
+    y de Sector guarda un bitmap empaquetado (np.packbits, 1 bit por fila) y
+    para Perdida_% el orden de las filas y los valores ordenados. Una
+    consulta une (OR) los bitmaps de los valores elegidos de cada columna,
+    intersecta (AND) las columnas y el tramo de Perdida_% localizado con
+    búsqueda binaria. Devuelve posiciones (iloc) en el orden del DataFrame
+    original, que para df_priorizado es por score descendente. `valores`
+    lista las opciones presentes de cada columna: categorías por severidad
+    (ORDEN_VALORES) y sectores por orden de aparición.
+    """
+
+    def __init__(self, df):
+        self.n = len(df)
+        self.bitmaps = {}
+        self.valores = {}
+        for columna in COLUMNAS_FILTRO:
+            if columna in ORDEN_VALORES:
+                valores = ORDEN_VALORES[columna]
+                codigos = pd.Categorical(df[columna], categories=valores).codes
+            else:
+                codigos, valores = pd.factorize(df[columna])
+            # Sólo los valores presentes, en el orden de `valores`
+            presentes = np.bincount(codigos[codigos >= 0], minlength=len(valores)) > 0
+            self.valores[columna] = [valor for valor, hay in zip(valores, presentes) if hay]
+            self.bitmaps[columna] = {
+                valor: np.packbits(codigos == codigo)
+                for codigo, (valor, hay) in enumerate(zip(valores, presentes)) if hay
+            }
+
+        perdida = df['Perdida_%'].to_numpy(dtype=float)
+        orden = np.argsort(perdida, kind='stable')  # NaN al final
+        self.perdida_ordenada = perdida[orden]
+        self.n_perdida_valida = int(np.isfinite(perdida).sum())
+        # Rango de cada fila en el orden por pérdida
+        self.rango_perdida = np.empty(self.n, dtype=np.int64)
+        self.rango_perdida[orden] = np.arange(self.n)
+
+    def _union(self, columna, seleccion):
+        bitmaps = self.bitmaps[columna]
+        resultado = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        for valor in seleccion:
+            if valor in bitmaps:
+                resultado |= bitmaps[valor]
+        return resultado
+
+    def _tramo_perdida(self, minimo=None, maximo=None):
+        """
+        Bitmap de las filas con minimo <= Perdida_% <= maximo (binaria sobre el orden)
+        """
+        validos = self.perdida_ordenada[:self.n_perdida_valida]
+        inicio = 0 if minimo is None else int(np.searchsorted(validos, minimo, side='left'))
+        fin = self.n_perdida_valida if maximo is None else int(np.searchsorted(validos, maximo, side='right'))
+        return np.packbits((self.rango_perdida >= inicio) & (self.rango_perdida < fin))
+
+    def consultar(self, categorias=None, sectores=None, perdida_min=None, perdida_max=None, posiciones=None):
+        """
+        Posiciones que cumplen todos los filtros; None en un filtro significa sin filtrar.
+
+        `posiciones` restringe además a un subconjunto (p. ej. la vista del mapa).
+        """
+        resultado = np.full((self.n + 7) // 8, 0xFF, dtype=np.uint8)
+        if categorias is not None:
+            resultado &= self._union('Categoria_Prioridad', categorias)
+        if sectores is not None:
+            resultado &= self._union('Sector', sectores)
+        if perdida_min is not None or perdida_max is not None:
+            resultado &= self._tramo_perdida(perdida_min, perdida_max)
+        if posiciones is not None:
+            subconjunto = np.zeros(self.n, dtype=bool)
+            subconjunto[posiciones] = True
+            resultado &= np.packbits(subconjunto)
+        return np.flatnonzero(np.unpackbits(resultado, count=self.n))
@@ -0,0 +1,127 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from puntorojo.ingesta import COLUMNAS_RECHAZO, COLUMNAS_REQUERIDAS
+from puntorojo.motor import _nombre, cargar_archivo_validado
+
+# =============================================
+# FUSIÓN DE ARCHIVOS REGIONALES
+# =============================================
+# Regla para un ID_Trafo repetido con valores distintos en varios archivos
+# -> (descripción, columnas de orden, ascendente). Gana la primera fila tras
+# ordenar; los empates se resuelven por orden de carga. Dentro de un mismo
+# archivo las filas repetidas son lecturas y ya llegan sumadas (ver
+# ingesta.consolidar_lecturas).
+REGLAS_CONFLICTO = {
+    'mayor_entregado': ('Mayor kWh entregado (lectura más completa)', ['kWh_Entregado'], [False]),
+    'primero': ('Primer archivo cargado', [], []),
+    'ultimo': ('Último archivo cargado', ['_Archivo'], [False])
+}
+REGLA_CONFLICTO = 'mayor_entregado'
+
+COLUMNAS_CONFLICTO = ['ID_Trafo', 'Archivos', 'Columnas_Distintas', 'Archivo_Elegido']
+
+
+def _cargar(origen):
+    """
+    Carga un archivo en un proceso del pool: ruta o (nombre, contenido en bytes)
+    """
+    if isinstance(origen, tuple):
+        nombre, contenido = origen
+        origen = io.BytesIO(contenido)
+        origen.name = nombre
+    return cargar_archivo_validado(origen)
+
+
+def _etiqueta(origen):
+    return origen[0] if isinstance(origen, tuple) else os.path.basename(_nombre(origen))
+
+
+def _resultado(etiqueta, obtener):
+    try:
+        return obtener()
+    except ValueError as e:
+        raise ValueError(f"{etiqueta}: {e}") from e
+
+
+def cargar_archivos(origenes, regla=REGLA_CONFLICTO, procesos=None):
+    """
+    Carga varios archivos regionales en paralelo y los fusiona en un dataset.
+
+    `origenes` son rutas o tuplas (nombre, contenido en bytes), p. ej. de un
+    file_uploader múltiple. El parseo (openpyxl usa CPU) se reparte en un
+    pool de procesos, de modo que el tiempo total se acerca al del archivo
+    más grande. Las filas idénticas repetidas se descartan sin más; un
+    ID_Trafo repetido con valores distintos se resuelve con `regla` (ver
+    REGLAS_CONFLICTO) y se reporta.
+
+    Devuelve (df, df_rechazos, df_conflictos); los rechazos llevan la columna
+    Archivo. Lanza ValueError, con el nombre del archivo, si alguno no se
+    puede cargar.
+    """
+    if regla not in REGLAS_CONFLICTO:
+        raise ValueError(f"Regla de conflicto desconocida: {regla}")
+    etiquetas = [_etiqueta(origen) for origen in origenes]
+
+    # Con un solo proceso útil el pool sólo añadiría el costo de serializar
+    procesos = min(procesos or os.cpu_count() or 1, len(origenes))
+    if procesos == 1:
+        cargas = [
+            _resultado(etiqueta, lambda origen=origen: _cargar(origen)) for etiqueta, origen in zip(etiquetas, origenes)
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            futuros = [pool.submit(_cargar, origen) for origen in origenes]
+            cargas = [_resultado(etiqueta, futuro.result) for etiqueta, futuro in zip(etiquetas, futuros)]
+
+    rechazos = [
+        df_rechazos.assign(Archivo=etiqueta)[['Archivo'] + COLUMNAS_RECHAZO]
+        for etiqueta, (_, df_rechazos) in zip(etiquetas, cargas) if len(df_rechazos)
+    ]
+    df_rechazos = (
+        pd.concat(rechazos, ignore_index=True) if rechazos
+        else pd.DataFrame(columns=['Archivo'] + COLUMNAS_RECHAZO)
+    )
+
+    df, df_conflictos = fusionar([df for df, _ in cargas], etiquetas, regla)
+    return df, df_rechazos, df_conflictos
+
+
+def fusionar(dfs, etiquetas, regla=REGLA_CONFLICTO):
+    """
+    Concatena datasets ya normalizados y deduplica por ID_Trafo.
+
+    Devuelve (df, df_conflictos), con el orden de filas de la carga.
+    """
+    df = pd.concat([d.assign(_Archivo=i) for i, d in enumerate(dfs)], ignore_index=True)
+    df['Sector'] = df['Sector'].astype(str).astype('category')
+    columnas = list(COLUMNAS_REQUERIDAS)
+
+    # Filas idénticas repetidas: no son conflicto
+    df = df.drop_duplicates(subset=columnas)
+    repetidos = df['ID_Trafo'].duplicated(keep=False)
+    if not repetidos.any():
+        return df.drop(columns='_Archivo').reset_index(drop=True), pd.DataFrame(columns=COLUMNAS_CONFLICTO)
+
+    _, orden, ascendente = REGLAS_CONFLICTO[regla]
+    df['_Posicion'] = range(len(df))
+    elegidos = (
+        df.sort_values(orden + ['_Posicion'], ascending=ascendente + [True], kind='stable')
+        .drop_duplicates('ID_Trafo')
+        .sort_values('_Posicion')
+    )
+
+    grupos = df[repetidos].groupby('ID_Trafo', sort=False, observed=True)
+    distintas = grupos[columnas[1:]].nunique(dropna=False) > 1
+    df_conflictos = pd.DataFrame({
+        'ID_Trafo': distintas.index,
+        'Archivos': grupos['_Archivo'].agg(lambda a: ', '.join(etiquetas[i] for i in sorted(set(a)))).to_numpy(),
+        'Columnas_Distintas': [', '.join(distintas.columns[fila]) for fila in distintas.to_numpy()],
+        'Archivo_Elegido': [
+            etiquetas[i] for i in elegidos.set_index('ID_Trafo').loc[distintas.index, '_Archivo']
+        ]
+    })
+    return elegidos.drop(columns=['_Archivo', '_Posicion']).reset_index(drop=True), df_conflictos
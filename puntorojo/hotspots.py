@@ -0,0 +1,243 @@
+import numpy as np
+import pandas as pd
+
+from puntorojo.espacial import LATITUD_REFERENCIA, _a_grados, _a_metros, sumar_ventanas
+
+# =============================================
+# HOTSPOTS ESPACIALES (AGRUPAMIENTO TIPO DBSCAN)
+# =============================================
+# Radio de vecindad (m) y mínimo de transformadores para un núcleo
+EPS_HOTSPOT_M = 500.0
+MIN_TRAFOS_HOTSPOT = 5
+# Un núcleo concentra al menos este múltiplo de la pérdida típica de una vecindad
+FACTOR_DENSIDAD_HOTSPOT = 3.0
+
+COLUMNAS_HOTSPOT = [
+    'ID_Hotspot', 'Latitud', 'Longitud', 'kWh_Perdido_Total', 'Perdida_%',
+    'Impacto_Monetario', 'Num_Transformadores', 'Sectores', 'Poligono'
+]
+
+# Desplazamientos de la ventana de 5x5 celdas, del centro hacia afuera
+_VECINDAD = sorted(
+    ((dy, dx) for dy in range(-2, 3) for dx in range(-2, 3) if (dy, dx) != (0, 0)),
+    key=lambda d: d[0] ** 2 + d[1] ** 2
+)
+
+
+def _componentes_conexas(n, origen, destino):
+    """
+    Etiqueta de componente conexa (mínimo índice del grupo) para un grafo no dirigido.
+
+    Propagación de la etiqueta mínima por las aristas con saltos de punteros,
+    todo vectorizado; converge en pocas iteraciones.
+    """
+    etiquetas = np.arange(n)
+    while True:
+        anterior = etiquetas.copy()
+        np.minimum.at(etiquetas, origen, etiquetas[destino])
+        np.minimum.at(etiquetas, destino, etiquetas[origen])
+        etiquetas = etiquetas[etiquetas]
+        if np.array_equal(etiquetas, anterior):
+            return etiquetas
+
+
+def _envolvente_convexa(x, y):
+    """
+    Vértices de la envolvente convexa (cadena monótona de Andrew), en orden antihorario
+    """
+    puntos = np.unique(np.column_stack([x, y]), axis=0)
+    if len(puntos) < 3:
+        return puntos
+
+    def cadena(pts):
+        resultado = []
+        for p in pts:
+            while len(resultado) >= 2:
+                (ax, ay), (bx, by) = resultado[-2], resultado[-1]
+                if (bx - ax) * (p[1] - ay) - (by - ay) * (p[0] - ax) > 0:
+                    break
+                resultado.pop()
+            resultado.append(p)
+        return resultado
+
+    inferior = cadena(puntos)
+    superior = cadena(puntos[::-1])
+    return np.array(inferior[:-1] + superior[:-1])
+
+
+def agrupar_hotspots(df, eps_m=EPS_HOTSPOT_M, min_trafos=MIN_TRAFOS_HOTSPOT, peso_minimo=None):
+    """
+    Agrupa transformadores en hotspots de pérdida con un DBSCAN sobre rejilla.
+
+    La rejilla tiene celdas de lado eps/√2, de modo que dos transformadores de
+    una misma celda siempre están a menos de eps. La densidad de cada celda se
+    mide en la ventana de 5x5 celdas a su alrededor (la vecindad eps,
+    aproximada por celdas) con una imagen integral: una celda es núcleo si su
+    ventana reúne al menos `min_trafos` transformadores y `peso_minimo` kWh
+    perdidos, por lo que la densidad se pondera por pérdida. Por defecto
+    peso_minimo es FACTOR_DENSIDAD_HOTSPOT veces la mediana de la pérdida por
+    ventana de las celdas ocupadas: donde hay transformadores en todas
+    partes, un hotspot es donde la pérdida se concentra más que en el resto.
+    Las celdas núcleo vecinas forman un hotspot (componentes conexas) y las
+    celdas no núcleo se asignan al hotspot de la celda núcleo vecina más
+    cercana; el resto es ruido.
+
+    Devuelve (etiquetas, df_hotspots): etiquetas alineadas con df (-1 = ruido)
+    y un resumen por hotspot con centroide ponderado por pérdida, totales,
+    sectores que abarca y polígono (envolvente convexa de sus celdas,
+    [[lat, lon], ...]), ordenado por kWh_Perdido_Total.
+    """
+    lat = df['Latitud'].to_numpy(dtype=float)
+    lon = df['Longitud'].to_numpy(dtype=float)
+    perdido = df['kWh_Perdido'].to_numpy(dtype=float)
+    peso = np.where(np.isfinite(perdido), np.maximum(perdido, 0.0), 0.0)
+    etiquetas = np.full(len(df), -1, dtype=np.int64)
+
+    validos = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+    if len(validos) == 0:
+        return etiquetas, pd.DataFrame(columns=COLUMNAS_HOTSPOT)
+
+    # Celdas ocupadas y densidad de su ventana
+    x, y = _a_metros(lat[validos], lon[validos], LATITUD_REFERENCIA)
+    lado = eps_m / np.sqrt(2)
+    cx = ((x - x.min()) // lado).astype(np.int64)
+    cy = ((y - y.min()) // lado).astype(np.int64)
+    forma = (int(cy.max()) + 1, int(cx.max()) + 1)
+    celdas, celda_punto = np.unique(cy * forma[1] + cx, return_inverse=True)
+    celda_punto = celda_punto.ravel()
+    ccy, ccx = celdas // forma[1], celdas % forma[1]
+
+    conteo = np.bincount(celda_punto, minlength=len(celdas)).astype(float)
+    peso_celda = np.bincount(celda_punto, weights=peso[validos], minlength=len(celdas))
+    rejilla_conteo = np.zeros(forma)
+    rejilla_peso = np.zeros(forma)
+    rejilla_conteo[ccy, ccx] = conteo
+    rejilla_peso[ccy, ccx] = peso_celda
+    peso_ventana = sumar_ventanas(rejilla_peso, ccy, ccx, 2)
+    if peso_minimo is None:
+        peso_minimo = FACTOR_DENSIDAD_HOTSPOT * np.median(peso_ventana)
+    nucleo = (
+        (sumar_ventanas(rejilla_conteo, ccy, ccx, 2) >= min_trafos) &
+        (peso_ventana >= peso_minimo) & (peso_ventana > 0)
+    )
+
+    # Índice de celda núcleo por posición de rejilla (-1 si no es núcleo)
+    indice_nucleo = np.full(forma, -1, dtype=np.int64)
+    indice_nucleo[ccy[nucleo], ccx[nucleo]] = np.arange(nucleo.sum())
+    ny, nx = ccy[nucleo], ccx[nucleo]
+
+    origen, destino = [], []
+    for dy, dx in _VECINDAD:
+        vy, vx = ny + dy, nx + dx
+        dentro = (vy >= 0) & (vy < forma[0]) & (vx >= 0) & (vx < forma[1])
+        vecino = np.full(len(ny), -1, dtype=np.int64)
+        vecino[dentro] = indice_nucleo[vy[dentro], vx[dentro]]
+        enlazadas = vecino >= 0
+        origen.append(np.flatnonzero(enlazadas))
+        destino.append(vecino[enlazadas])
+    componente = _componentes_conexas(len(ny), np.concatenate(origen), np.concatenate(destino))
+
+    # Etiqueta por celda: núcleos por componente, bordes por el núcleo vecino más cercano
+    etiqueta_celda = np.full(len(celdas), -1, dtype=np.int64)
+    etiqueta_celda[nucleo] = componente
+    borde = np.flatnonzero(~nucleo)
+    for dy, dx in _VECINDAD:
+        if len(borde) == 0:
+            break
+        vy, vx = ccy[borde] + dy, ccx[borde] + dx
+        dentro = (vy >= 0) & (vy < forma[0]) & (vx >= 0) & (vx < forma[1])
+        vecino = np.full(len(borde), -1, dtype=np.int64)
+        vecino[dentro] = indice_nucleo[vy[dentro], vx[dentro]]
+        asignadas = vecino >= 0
+        etiqueta_celda[borde[asignadas]] = componente[vecino[asignadas]]
+        borde = borde[~asignadas]
+
+    etiqueta_punto = etiqueta_celda[celda_punto]
+    if (etiqueta_punto < 0).all():
+        return etiquetas, pd.DataFrame(columns=COLUMNAS_HOTSPOT)
+
+    # Numeración compacta de hotspots por pérdida total descendente
+    en_hotspot = np.flatnonzero(etiqueta_punto >= 0)
+    unicas, grupo = np.unique(etiqueta_punto[en_hotspot], return_inverse=True)
+    grupo = grupo.ravel()
+    total_grupo = np.bincount(grupo, weights=peso[validos[en_hotspot]])
+    rango = np.empty(len(unicas), dtype=np.int64)
+    rango[np.argsort(-total_grupo, kind='stable')] = np.arange(len(unicas))
+    grupo = rango[grupo]
+    etiquetas[validos[en_hotspot]] = grupo
+
+    df_hotspots = _resumir_hotspots(df.iloc[validos[en_hotspot]], grupo, peso[validos[en_hotspot]])
+    df_hotspots['Poligono'] = _poligonos_celdas(
+        grupo, cy[en_hotspot], cx[en_hotspot], lado, x.min(), y.min(), len(unicas)
+    )
+    return etiquetas, df_hotspots
+
+
+def _poligonos_celdas(grupo, cy, cx, lado, x0, y0, n):
+    """
+    Envolvente convexa de las celdas de cada hotspot, como [[lat, lon], ...].
+
+    Dentro de una fila de celdas, toda celda queda entre la primera y la
+    última, así que basta con las esquinas de las celdas extremas de cada
+    fila: la envolvente es la misma con muchos menos puntos.
+    """
+    extremos = pd.DataFrame({'grupo': grupo, 'fila': cy, 'columna': cx}).groupby(['grupo', 'fila'])['columna'].agg(['min', 'max'])
+    g = np.repeat(extremos.index.get_level_values('grupo').to_numpy(), 2)
+    fila = np.repeat(extremos.index.get_level_values('fila').to_numpy(), 2)
+    columna = extremos.to_numpy().ravel()
+
+    # Cuatro esquinas por celda extrema
+    g = np.repeat(g, 4)
+    ex = x0 + (np.repeat(columna, 4) + np.tile([0, 1, 0, 1], len(columna))) * lado
+    ey = y0 + (np.repeat(fila, 4) + np.tile([0, 0, 1, 1], len(fila))) * lado
+
+    limites = np.r_[0, np.cumsum(np.bincount(g, minlength=n))]
+    poligonos = []
+    for h in range(n):
+        tramo = slice(limites[h], limites[h + 1])
+        vertices = _envolvente_convexa(ex[tramo], ey[tramo])
+        vlat, vlon = _a_grados(vertices[:, 0], vertices[:, 1], LATITUD_REFERENCIA)
+        poligonos.append(np.column_stack([vlat, vlon]).round(6).tolist())
+    return poligonos
+
+
+def _resumir_hotspots(miembros, grupo, peso):
+    """
+    Resumen por hotspot: centroide ponderado por pérdida, totales y sectores
+    """
+    n = int(grupo.max()) + 1
+    lat = miembros['Latitud'].to_numpy(dtype=float)
+    lon = miembros['Longitud'].to_numpy(dtype=float)
+    entregado = np.nan_to_num(miembros['kWh_Entregado'].to_numpy(dtype=float))
+    perdido = np.nan_to_num(miembros['kWh_Perdido'].to_numpy(dtype=float))
+    monto = np.nan_to_num(miembros['Perdida_Monetaria_RD$'].to_numpy(dtype=float))
+
+    conteo = np.bincount(grupo, minlength=n)
+    total_peso = np.bincount(grupo, weights=peso, minlength=n)
+    # Centroide ponderado por pérdida (simple si el hotspot no tiene pérdida positiva)
+    ponderar = total_peso[grupo] > 0
+    w = np.where(ponderar, peso, 1.0)
+    total_w = np.bincount(grupo, weights=w, minlength=n)
+    centro_lat = np.bincount(grupo, weights=lat * w, minlength=n) / total_w
+    centro_lon = np.bincount(grupo, weights=lon * w, minlength=n) / total_w
+    total_perdido = np.bincount(grupo, weights=perdido, minlength=n)
+    total_entregado = np.bincount(grupo, weights=entregado, minlength=n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        perdida_pct = total_perdido / total_entregado * 100
+
+    sectores = (
+        pd.Series(miembros['Sector'].astype(str).to_numpy())
+        .groupby(grupo).unique().map(lambda s: ', '.join(sorted(s)))
+        .reindex(range(n)).to_numpy()
+    )
+
+    return pd.DataFrame({
+        'ID_Hotspot': [f"HS-{h + 1:03d}" for h in range(n)],
+        'Latitud': centro_lat,
+        'Longitud': centro_lon,
+        'kWh_Perdido_Total': total_perdido,
+        'Perdida_%': perdida_pct,
+        'Impacto_Monetario': np.bincount(grupo, weights=monto, minlength=n),
+        'Num_Transformadores': conteo,
+        'Sectores': sectores
+    })
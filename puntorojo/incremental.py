@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+from puntorojo.anomalias import actualizar_anomalias
+from puntorojo.ingesta import calcular_metricas, resolver_columnas
+from puntorojo.motor import leer_tabla
+from puntorojo.prioridad import (
+    PESO_PORCENTAJE, PESO_VOLUMEN, categorizar_prioridad, generar_sugerencias, score_sobrecarga
+)
+
+# =============================================
+# ACTUALIZACIÓN INCREMENTAL (DELTA MENSUAL)
+# =============================================
+# Columnas mínimas de un archivo delta: nuevas lecturas por transformador
+COLUMNAS_DELTA = ['ID_Trafo', 'kWh_Entregado', 'kWh_Facturado']
+
+
+def leer_delta(archivo):
+    """
+    Lee un archivo delta (CSV, XLSX, Parquet o Arrow) con nuevas lecturas por ID_Trafo
+    """
+    df = leer_tabla(archivo)
+    mapa_columnas = resolver_columnas(df.columns, COLUMNAS_DELTA)
+    return df.rename(columns=mapa_columnas)[COLUMNAS_DELTA]
+
+
+def _columna(df, nombre, dtype=float):
+    return df[nombre].to_numpy(dtype=dtype, copy=True)
+
+
+def aplicar_delta(df_priorizado, df_sector, delta):
+    """
+    Aplica nuevas lecturas a un resultado ya priorizado sin recalcularlo todo.
+
+    Sólo se recalculan las métricas, puntajes, categoría y sugerencia de las
+    filas cuyo ID_Trafo aparece en el delta. Score_Volumen depende del máximo
+    global de kWh_Perdido: si el máximo no cambia, el resto de las filas
+    conserva su puntaje; si cambia, se renormaliza todo el volumen (una
+    operación vectorizada). Los puntajes de anomalía (si están presentes)
+    dependen del sector y de la vecindad de cada fila: se recalculan en los
+    sectores y vecindades de las filas modificadas (ver
+    anomalias.actualizar_anomalias) y se recategorizan las filas cuya marca
+    Anomalia cambia. Los agregados por sector se actualizan sumando y
+    restando la diferencia de las filas modificadas.
+
+    Devuelve (df_priorizado, df_sector, resumen).
+    """
+    delta = delta.drop_duplicates('ID_Trafo', keep='last')
+    posiciones = pd.Index(df_priorizado['ID_Trafo']).get_indexer(delta['ID_Trafo'])
+    encontrados = posiciones >= 0
+    resumen = {
+        'actualizados': int(encontrados.sum()),
+        'no_encontrados': int((~encontrados).sum()),
+        'renormalizado': False
+    }
+    posiciones = posiciones[encontrados]
+    delta = delta[encontrados]
+    if len(posiciones) == 0:
+        return df_priorizado, df_sector, resumen
+
+    # Métricas de las filas modificadas
+    anterior = df_priorizado.iloc[posiciones]
+    nuevo = anterior[['Sector', 'Capacidad_kVA']].copy()
+    nuevo['kWh_Entregado'] = delta['kWh_Entregado'].to_numpy(dtype=float)
+    nuevo['kWh_Facturado'] = delta['kWh_Facturado'].to_numpy(dtype=float)
+    nuevo = calcular_metricas(nuevo)
+
+    res = df_priorizado.copy()
+    for col in ['kWh_Entregado', 'kWh_Facturado', 'kWh_Perdido', 'Perdida_%', 'Perdida_Monetaria_RD$', 'Carga_%']:
+        valores = _columna(res, col)
+        valores[posiciones] = nuevo[col].to_numpy(dtype=float)
+        res[col] = valores
+
+    # Anomalías: el z de sector y el espacial dependen de los vecinos de cada fila
+    recategorizar = posiciones
+    if 'Anomalia' in res:
+        res = actualizar_anomalias(res, posiciones)
+        cambio_anomalia = res['Anomalia'].to_numpy() != df_priorizado['Anomalia'].to_numpy()
+        recategorizar = np.union1d(posiciones, np.flatnonzero(cambio_anomalia))
+
+    # Normalización de volumen: sólo se recalcula si el máximo global cambia
+    perdido = res['kWh_Perdido'].to_numpy(dtype=float)
+    max_anterior = df_priorizado['kWh_Perdido'].max()
+    max_cambiadas = nuevo['kWh_Perdido'].max()
+    if max_cambiadas > max_anterior:
+        max_nuevo = max_cambiadas
+    elif (anterior['kWh_Perdido'].to_numpy(dtype=float) == max_anterior).any():
+        # La fila que tenía el máximo cambió: hay que volver a buscarlo
+        max_nuevo = res['kWh_Perdido'].max()
+    else:
+        max_nuevo = max_anterior
+    renormalizar = max_nuevo != max_anterior
+    resumen['renormalizado'] = bool(renormalizar)
+
+    renormalizadas = slice(None) if renormalizar else posiciones
+    filas = slice(None) if renormalizar else recategorizar
+    volumen = _columna(res, 'Score_Volumen')
+    porcentaje = _columna(res, 'Score_Porcentaje')
+    sobrecarga = _columna(res, 'Score_Sobrecarga')
+    volumen[renormalizadas] = perdido[renormalizadas] / max_nuevo * PESO_VOLUMEN
+    porcentaje[posiciones] = nuevo['Perdida_%'].to_numpy(dtype=float) / 100 * PESO_PORCENTAJE
+    sobrecarga[posiciones] = score_sobrecarga(nuevo['Carga_%'])
+    res['Score_Volumen'] = volumen
+    res['Score_Porcentaje'] = porcentaje
+    res['Score_Sobrecarga'] = sobrecarga
+    res['Prioridad_Score'] = volumen + porcentaje + sobrecarga
+    if 'Score_Tendencia' in res:
+        res['Prioridad_Score'] += res['Score_Tendencia']
+
+    # Categoría (depende del score) y sugerencia (sólo de pérdida/carga)
+    sector = res['Sector'].to_numpy()
+    perdida = res['Perdida_%'].to_numpy(dtype=float)
+    carga = res['Carga_%'].to_numpy(dtype=float)
+    categorias = _columna(res, 'Categoria_Prioridad', dtype=object)
+    anomalia = res['Anomalia'].to_numpy()[filas] if 'Anomalia' in res else None
+    categorias[filas] = categorizar_prioridad(
+        sector[filas], perdida[filas], carga[filas], res['Prioridad_Score'].to_numpy()[filas], anomalia
+    )
+    sugerencias = _columna(res, 'Sugerencia_Intervencion', dtype=object)
+    sugerencias[posiciones] = generar_sugerencias(sector[posiciones], perdida[posiciones], carga[posiciones])
+    res['Categoria_Prioridad'] = categorias
+    res['Sugerencia_Intervencion'] = sugerencias
+
+    df_sector_nuevo = _actualizar_sectores(df_sector, res, anterior, nuevo)
+    return res.sort_values('Prioridad_Score', ascending=False), df_sector_nuevo, resumen
+
+
+def _actualizar_sectores(df_sector, res, anterior, nuevo):
+    """
+    Ajusta los agregados por sector con la diferencia de las filas modificadas
+    """
+    cambios = pd.DataFrame({
+        'Sector': anterior['Sector'].to_numpy(),
+        'kWh_Perdido_Total': nuevo['kWh_Perdido'].fillna(0).to_numpy() - anterior['kWh_Perdido'].fillna(0).to_numpy(),
+        'Impacto_Monetario': (
+            nuevo['Perdida_Monetaria_RD$'].fillna(0).to_numpy() - anterior['Perdida_Monetaria_RD$'].fillna(0).to_numpy()
+        ),
+        'Suma_Perdida_%': nuevo['Perdida_%'].fillna(0).to_numpy() - anterior['Perdida_%'].fillna(0).to_numpy(),
+        'Faltantes': nuevo['Perdida_%'].isna().to_numpy() | anterior['Perdida_%'].isna().to_numpy()
+    }).groupby('Sector', observed=True).agg({
+        'kWh_Perdido_Total': 'sum',
+        'Impacto_Monetario': 'sum',
+        'Suma_Perdida_%': 'sum',
+        'Faltantes': 'any'
+    })
+
+    sectores = df_sector.set_index('Sector')
+    afectados = cambios.index
+    sectores.loc[afectados, 'kWh_Perdido_Total'] += cambios['kWh_Perdido_Total']
+    sectores.loc[afectados, 'Impacto_Monetario'] += cambios['Impacto_Monetario']
+
+    # El promedio se ajusta vía la suma (promedio * n). Si hay valores faltantes
+    # el número de términos no es Num_Transformadores y se recalcula el sector
+    if res['Perdida_%'].hasnans or anterior['Perdida_%'].hasnans:
+        exactos = np.zeros(len(afectados), dtype=bool)
+    else:
+        exactos = ~cambios['Faltantes'].to_numpy()
+    n = sectores.loc[afectados[exactos], 'Num_Transformadores']
+    sectores.loc[afectados[exactos], 'Perdida_%_Promedio'] += cambios.loc[exactos, 'Suma_Perdida_%'] / n
+    for sector in afectados[~exactos]:
+        sectores.loc[sector, 'Perdida_%_Promedio'] = res.loc[res['Sector'] == sector, 'Perdida_%'].mean()
+
+    return sectores.reset_index().sort_values('kWh_Perdido_Total', ascending=False)
@@ -0,0 +1,456 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# =============================================
+# ESQUEMA DE COLUMNAS
+# =============================================
+# Columnas requeridas por nombre estándar. Los alias se comparan normalizados
+# (sin mayúsculas, acentos, espacios ni signos), p. ej. 'KWH ENTREGADO'
+COLUMNAS_REQUERIDAS = {
+    'ID_Trafo': ['ID_Trafo', 'id_trafo', 'ID_TRAFO', 'Trafo_ID', 'trafo_id'],
+    'Sector': ['Sector', 'sector', 'SECTOR', 'Zona', 'zona'],
+    'Latitud': ['Latitud', 'latitud', 'LATITUD', 'Lat', 'lat'],
+    'Longitud': ['Longitud', 'longitud', 'LONGITUD', 'Lon', 'lon', 'Long', 'long'],
+    'Capacidad_kVA': ['Capacidad_kVA', 'capacidad_kva', 'CAPACIDAD_KVA', 'kVA', 'kva'],
+    'kWh_Entregado': ['kWh_Entregado', 'kwh_entregado', 'KWH_ENTREGADO', 'Entregado', 'entregado'],
+    'kWh_Facturado': ['kWh_Facturado', 'kwh_facturado', 'KWH_FACTURADO', 'Facturado', 'facturado']
+}
+
+# Columna opcional de fecha/periodo (filtros por fecha e historial mensual)
+VARIANTES_FECHA = ['Fecha', 'fecha', 'FECHA', 'Periodo', 'periodo', 'PERIODO']
+
+# Alias de todas las columnas reconocidas, requeridas u opcionales
+_VARIANTES_COLUMNAS = {**COLUMNAS_REQUERIDAS, 'Periodo': VARIANTES_FECHA}
+
+# Tipos compactos usados al leer por bloques
+TIPOS_COMPACTOS = {
+    'ID_Trafo': str,
+    'Sector': 'category',
+    'Latitud': np.float32,
+    'Longitud': np.float32,
+    'Capacidad_kVA': np.float32,
+    'kWh_Entregado': np.float32,
+    'kWh_Facturado': np.float32
+}
+
+# Tipos explícitos de lectura (archivo completo): la energía en float64 para
+# que las diferencias no pierdan precisión
+TIPOS_LECTURA = {
+    'ID_Trafo': str,
+    'Sector': 'category',
+    'Latitud': np.float64,
+    'Longitud': np.float64,
+    'Capacidad_kVA': np.float32,
+    'kWh_Entregado': np.float64,
+    'kWh_Facturado': np.float64
+}
+
+COLUMNAS_TEXTO = ['ID_Trafo', 'Sector']
+COLUMNAS_NUMERICAS = ['Latitud', 'Longitud', 'Capacidad_kVA', 'kWh_Entregado', 'kWh_Facturado']
+
+# Rangos válidos (mínimo, máximo; None = sin límite). Coordenadas: República Dominicana
+RANGOS_VALIDOS = {
+    'Latitud': (17.3, 20.1),
+    'Longitud': (-72.1, -68.2),
+    'Capacidad_kVA': (1, 5000),
+    'kWh_Entregado': (0, None),
+    'kWh_Facturado': (0, None)
+}
+
+COLUMNAS_RECHAZO = ['Fila', 'ID_Trafo', 'Motivo']
+
+# Parámetros de cálculo de métricas
+TARIFA_PROMEDIO_RD = 12.5  # RD$/kWh
+HORAS_MES = 730
+FACTOR_CARGA = 0.8
+
+# Orden de columnas del dataset normalizado
+COLUMNAS_SALIDA = [
+    'ID_Trafo', 'Sector', 'Latitud', 'Longitud', 'Capacidad_kVA',
+    'kWh_Entregado', 'kWh_Facturado', 'kWh_Perdido', 'Perdida_%',
+    'Perdida_Monetaria_RD$', 'Carga_%'
+]
+
+TAMANO_BLOQUE = 500_000
+
+# Las sumas de energía se acumulan en float64 para no perder precisión
+_COLUMNAS_ENERGIA = ['kWh_Entregado', 'kWh_Facturado']
+
+# Agregación por transformador: energía acumulada, atributos fijos del primer registro
+_AGREGACION_LECTURAS = {
+    'Sector': 'first',
+    'Latitud': 'first',
+    'Longitud': 'first',
+    'Capacidad_kVA': 'first',
+    'kWh_Entregado': 'sum',
+    'kWh_Facturado': 'sum'
+}
+_AGREGACION_BLOQUE = {**_AGREGACION_LECTURAS, 'kWh_Perdido': 'sum'}
+
+
+def normalizar_nombre(nombre):
+    """
+    Forma canónica de un nombre de columna: minúsculas, sin acentos ni separadores
+    """
+    sin_acentos = unicodedata.normalize('NFKD', str(nombre)).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^0-9a-z]', '', sin_acentos.lower())
+
+
+def resolver_columnas(encabezado, columnas=None):
+    """
+    Resuelve los alias del encabezado a nombres estándar.
+
+    Sólo necesita los nombres de columna (se llama antes de leer los datos).
+    Se prefiere la coincidencia exacta; si no la hay, se compara la forma
+    normalizada (ver normalizar_nombre). Devuelve un diccionario
+    {columna_del_archivo: nombre_estándar} y lanza ValueError si falta alguna
+    columna requerida. `columnas` limita la resolución a un subconjunto de
+    nombres estándar (incluido 'Periodo').
+    """
+    encabezado = list(encabezado)
+    exactos = set(encabezado)
+    normalizados = {}
+    for nombre in encabezado:
+        normalizados.setdefault(normalizar_nombre(nombre), nombre)
+
+    mapa_columnas = {}
+    for col_std in columnas or COLUMNAS_REQUERIDAS:
+        variantes = _VARIANTES_COLUMNAS[col_std]
+        variante = next((v for v in variantes if v in exactos), None)
+        if variante is None:
+            variante = next(
+                (normalizados[normalizar_nombre(v)] for v in variantes if normalizar_nombre(v) in normalizados), None
+            )
+        if variante is None:
+            raise ValueError(
+                f"No se encontró la columna: {col_std.upper()}. Variantes buscadas: {', '.join(variantes)}"
+            )
+        mapa_columnas[variante] = col_std
+    return mapa_columnas
+
+
+def resolver_fecha(encabezado):
+    """
+    Columna de fecha/periodo del encabezado (alias de VARIANTES_FECHA), o None si no la hay
+    """
+    try:
+        return next(iter(resolver_columnas(encabezado, ['Periodo'])))
+    except ValueError:
+        return None
+
+
+def filtro_lectura(df, sectores=None, fecha_desde=None, fecha_hasta=None):
+    """
+    Máscara de las filas que pasan el filtro de lectura, o None si no hay filtro.
+
+    Sector en `sectores` y Periodo (interpretado como fecha) entre
+    `fecha_desde` y `fecha_hasta`, ambos incluidos; None = sin límite. Un
+    periodo que no es fecha no pasa un filtro de fechas. Lanza ValueError si
+    se filtra por fecha y el archivo no tiene columna de fecha.
+    """
+    if sectores is None and fecha_desde is None and fecha_hasta is None:
+        return None
+    incluidas = np.ones(len(df), dtype=bool)
+    if sectores is not None:
+        incluidas &= df['Sector'].astype(str).isin([str(s) for s in sectores]).to_numpy()
+    if fecha_desde is not None or fecha_hasta is not None:
+        if 'Periodo' not in df:
+            raise ValueError(f"No se encontró columna de fecha. Variantes buscadas: {', '.join(VARIANTES_FECHA)}")
+        fechas = pd.to_datetime(df['Periodo'], errors='coerce')
+        if fecha_desde is not None:
+            incluidas &= (fechas >= pd.Timestamp(fecha_desde)).to_numpy()
+        if fecha_hasta is not None:
+            incluidas &= (fechas <= pd.Timestamp(fecha_hasta)).to_numpy()
+    return incluidas
+
+
+def convertir_numericas(df, columnas=COLUMNAS_NUMERICAS):
+    """
+    Convierte a número las columnas dadas; devuelve {columna: máscara de valores no numéricos}
+    """
+    no_numericos = {}
+    for col in columnas:
+        if pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        convertida = pd.to_numeric(df[col], errors='coerce')
+        no_numericos[col] = (convertida.isna() & df[col].notna()).to_numpy()
+        df[col] = convertida.astype(TIPOS_LECTURA[col])
+    return no_numericos
+
+
+def marcar_duplicadas(df, vistas=None):
+    """
+    Filas idénticas (en COLUMNAS_REQUERIDAS y Periodo, si está) a una fila anterior: devuelve (máscara, vistas).
+
+    Compara huellas de 64 bits de cada fila. `vistas` son las huellas
+    (ordenadas) de los bloques anteriores, de modo que la lectura por bloques
+    detecta también los repetidos entre bloques; se devuelven ampliadas con
+    las del bloque. Ocupan 8 bytes por fila distinta.
+    """
+    columnas = list(COLUMNAS_REQUERIDAS) + (['Periodo'] if 'Periodo' in df else [])
+    huellas = pd.util.hash_pandas_object(df[columnas], index=False).to_numpy()
+    duplicadas = pd.Series(huellas).duplicated().to_numpy()
+    if vistas is not None and len(vistas):
+        posiciones = np.minimum(np.searchsorted(vistas, huellas), len(vistas) - 1)
+        duplicadas = duplicadas | (vistas[posiciones] == huellas)
+    nuevas = np.sort(huellas[~duplicadas])
+    if vistas is not None:
+        nuevas = np.sort(np.concatenate([vistas, nuevas]), kind='stable')
+    return duplicadas, nuevas
+
+
+def validar_filas(df, no_numericos=None, desplazamiento=0, duplicadas=None, incluidas=None):
+    """
+    Separa filas válidas y rechazadas según el esquema (vectorizado).
+
+    Reglas: identificador y sector no vacíos; columnas numéricas presentes,
+    numéricas y dentro de RANGOS_VALIDOS; fila no idéntica a una anterior
+    (`duplicadas`, de marcar_duplicadas). Las filas fuera de `incluidas`
+    (ver filtro_lectura) se descartan sin reportarse. `no_numericos` viene de
+    convertir_numericas y `desplazamiento` ajusta la numeración de filas
+    cuando se valida por bloques. Devuelve (df_validas, df_rechazos), con una
+    fila de reporte por fila rechazada: Fila (1 = primera fila de datos),
+    ID_Trafo y Motivo (todas las reglas incumplidas, separadas por '; ').
+    """
+    no_numericos = no_numericos or {}
+    reglas = []
+    for col in COLUMNAS_TEXTO:
+        texto = df[col].astype(str).str.strip()
+        reglas.append((df[col].isna().to_numpy() | (texto == '').to_numpy(), f"{col} vacío"))
+    for col in COLUMNAS_NUMERICAS:
+        valores = df[col].to_numpy(dtype=float)
+        invalido = no_numericos.get(col, np.zeros(len(df), dtype=bool))
+        reglas.append((invalido, f"{col} no numérico"))
+        reglas.append((np.isnan(valores) & ~invalido, f"{col} vacío"))
+        minimo, maximo = RANGOS_VALIDOS[col]
+        with np.errstate(invalid='ignore'):
+            fuera = np.zeros(len(df), dtype=bool)
+            if minimo is not None:
+                fuera |= valores < minimo
+            if maximo is not None:
+                fuera |= valores > maximo
+        limites = f"[{'-∞' if minimo is None else minimo}, {'∞' if maximo is None else maximo}]"
+        reglas.append((fuera, f"{col} fuera de rango {limites}"))
+    if duplicadas is not None:
+        reglas.append((duplicadas, "Fila duplicada"))
+
+    rechazada = np.zeros(len(df), dtype=bool)
+    for mascara, _ in reglas:
+        rechazada |= mascara
+    conservar = ~rechazada
+    if incluidas is not None:
+        # Las filas fuera del filtro no se reportan, pero sí cuentan en la numeración
+        rechazada &= incluidas
+        conservar &= incluidas
+    if conservar.all():
+        return df, pd.DataFrame(columns=COLUMNAS_RECHAZO)
+    return df[conservar].reset_index(drop=True), _reporte_rechazos(df, reglas, rechazada, desplazamiento)
+
+
+def _reporte_rechazos(df, reglas, rechazada, desplazamiento):
+    """
+    Una fila de reporte por fila rechazada, con todas las reglas incumplidas
+    """
+    if not rechazada.any():
+        return pd.DataFrame(columns=COLUMNAS_RECHAZO)
+
+    filas = np.flatnonzero(rechazada)
+    motivos = np.full(len(filas), '', dtype=object)
+    for mascara, texto in reglas:
+        aplica = mascara[filas]
+        motivos[aplica] = motivos[aplica] + texto + '; '
+    return pd.DataFrame({
+        'Fila': filas + desplazamiento + 1,
+        'ID_Trafo': df['ID_Trafo'].to_numpy()[filas],
+        'Motivo': pd.Series(motivos).str[:-2].to_numpy()
+    })
+
+
+def consolidar_lecturas(df):
+    """
+    Suma las lecturas repetidas de cada ID_Trafo en una sola fila.
+
+    Un archivo trae una fila por lectura de medidor: la energía entregada y
+    facturada de un mismo transformador se suma y los atributos fijos
+    (Sector, coordenadas, capacidad) se toman de su primera lectura. Las
+    filas idénticas no son lecturas distintas: la validación ya las rechazó
+    como "Fila duplicada" (ver marcar_duplicadas). Es la misma regla que
+    aplica la ingesta por bloques, de modo que el resultado no depende del
+    tamaño del archivo. Conserva el orden de primera aparición.
+    """
+    if not df['ID_Trafo'].duplicated().any():
+        return df.drop(columns='Periodo', errors='ignore')
+    return (
+        df.groupby('ID_Trafo', sort=False, observed=True)
+        .agg(_AGREGACION_LECTURAS)
+        .reset_index()[list(COLUMNAS_REQUERIDAS)]
+    )
+
+
+def calcular_metricas(df):
+    """
+    Calcula pérdida, pérdida monetaria y porcentaje de carga sobre columnas estándar
+    """
+    df['kWh_Perdido'] = df['kWh_Entregado'] - df['kWh_Facturado']
+    df['Perdida_%'] = (df['kWh_Perdido'] / df['kWh_Entregado']) * 100
+    df['Perdida_Monetaria_RD$'] = df['kWh_Perdido'] * TARIFA_PROMEDIO_RD
+    df['Carga_%'] = (df['kWh_Entregado'] / (df['Capacidad_kVA'] * HORAS_MES * FACTOR_CARGA)) * 100
+    return df
+
+
+# =============================================
+# LECTURA GUIADA POR ESQUEMA
+# =============================================
+def leer_encabezado(archivo, formato):
+    """
+    Nombres de columna de un CSV o XLSX sin leer sus datos
+    """
+    if formato == 'csv':
+        encabezado = pd.read_csv(archivo, nrows=0).columns
+    else:
+        encabezado = pd.read_excel(archivo, nrows=0, engine='openpyxl').columns
+    if hasattr(archivo, 'seek'):
+        archivo.seek(0)
+    return list(encabezado)
+
+
+def _mapa_lectura(encabezado):
+    """
+    Columnas a leer: las requeridas y, si existe, la de fecha/periodo (filtros y filas duplicadas)
+    """
+    mapa_columnas = resolver_columnas(encabezado)
+    col_fecha = resolver_fecha(encabezado)
+    if col_fecha is not None:
+        mapa_columnas[col_fecha] = 'Periodo'
+    return mapa_columnas
+
+
+def _tipos_lectura(mapa_columnas, tipos):
+    """
+    Tipos de lectura por columna del archivo; el periodo se lee como texto
+    """
+    return {variante: tipos.get(col_std, object) for variante, col_std in mapa_columnas.items()}
+
+
+def leer_con_esquema(archivo, formato, sectores=None, fecha_desde=None, fecha_hasta=None):
+    """
+    Lee un CSV o XLSX guiado por el esquema y valida sus filas.
+
+    Los alias se resuelven sólo con el encabezado; después se leen
+    únicamente las columnas requeridas y la de periodo, si existe (usecols),
+    con tipos explícitos, de modo que las columnas descartadas de
+    exportaciones anchas no se convierten. Si alguna columna numérica trae
+    texto, se relee como texto y se convierte de forma vectorizada para
+    reportar esas filas en lugar de fallar. Las filas fuera del filtro de
+    Sector y fechas (ver filtro_lectura) se descartan. Devuelve
+    (df, df_rechazos) con columnas estándar, sin métricas.
+    """
+    mapa_columnas = _mapa_lectura(leer_encabezado(archivo, formato))
+    tipos = _tipos_lectura(mapa_columnas, TIPOS_LECTURA)
+    texto = {variante: (str if col_std in COLUMNAS_TEXTO else object) for variante, col_std in mapa_columnas.items()}
+
+    if formato == 'csv':
+        try:
+            df = pd.read_csv(archivo, usecols=list(mapa_columnas), dtype=tipos)
+        except ValueError:
+            if hasattr(archivo, 'seek'):
+                archivo.seek(0)
+            df = pd.read_csv(archivo, usecols=list(mapa_columnas), dtype=texto)
+    else:
+        # Las celdas de Excel ya vienen tipadas: sólo se convierten las que traen texto
+        df = pd.read_excel(archivo, usecols=list(mapa_columnas), dtype=texto, engine='openpyxl')
+
+    df = df.rename(columns=mapa_columnas)[list(mapa_columnas.values())]
+    df['Sector'] = df['Sector'].astype('category')
+    no_numericos = convertir_numericas(df)
+    return validar_filas(
+        df, no_numericos, duplicadas=marcar_duplicadas(df)[0],
+        incluidas=filtro_lectura(df, sectores, fecha_desde, fecha_hasta)
+    )
+
+
+# =============================================
+# INGESTA POR BLOQUES (CSV DE GRAN TAMAÑO)
+# =============================================
+def leer_csv_por_bloques(archivo, tamano_bloque=TAMANO_BLOQUE, rechazos=None,
+                         sectores=None, fecha_desde=None, fecha_hasta=None):
+    """
+    Lee un CSV de lecturas de medidores en bloques con memoria acotada.
+
+    Los alias se resuelven una sola vez a partir del encabezado y sólo se leen
+    las columnas requeridas, con tipos compactos (float32, Sector categórico).
+    Cada bloque se reduce a un parcial por transformador (energía entregada,
+    facturada y perdida acumuladas) que se combina con el acumulado, por lo que
+    la memoria máxima depende del número de transformadores y del tamaño de
+    bloque, no del tamaño del archivo. Los porcentajes se derivan al final a
+    partir de los totales. Las filas idénticas a una anterior (de cualquier
+    bloque) se rechazan en lugar de sumarse; sus huellas ocupan 8 bytes por
+    fila distinta. Cada bloque se valida antes de acumularse; si se
+    pasa la lista `rechazos`, se le añade el reporte de filas rechazadas de
+    cada bloque. Si alguna columna numérica trae texto, la lectura se repite
+    con esas columnas como texto (convertidas por bloque) para reportar las
+    filas en lugar de fallar. Las filas fuera del filtro de Sector y fechas
+    (ver filtro_lectura) se descartan antes de acumularse.
+    """
+    mapa_columnas = _mapa_lectura(leer_encabezado(archivo, 'csv'))
+    tipos = _tipos_lectura(mapa_columnas, TIPOS_COMPACTOS)
+    filtro = (sectores, fecha_desde, fecha_hasta)
+    # Falta de columna de fecha: se valida con el encabezado, antes de leer bloques
+    filtro_lectura(pd.DataFrame(columns=list(mapa_columnas.values())), *filtro)
+    try:
+        acumulado, rechazos_lectura = _acumular_bloques(archivo, mapa_columnas, tipos, tamano_bloque, filtro)
+    except ValueError:
+        if hasattr(archivo, 'seek'):
+            archivo.seek(0)
+        texto = {v: (str if c in COLUMNAS_TEXTO else object) for v, c in mapa_columnas.items()}
+        acumulado, rechazos_lectura = _acumular_bloques(archivo, mapa_columnas, texto, tamano_bloque, filtro)
+    if rechazos is not None:
+        rechazos.extend(rechazos_lectura)
+
+    if acumulado is None:
+        return pd.DataFrame(columns=COLUMNAS_SALIDA)
+
+    df = acumulado.reset_index()
+    df['Sector'] = df['Sector'].astype('category')
+    df['Perdida_%'] = (df['kWh_Perdido'] / df['kWh_Entregado']) * 100
+    df['Perdida_Monetaria_RD$'] = df['kWh_Perdido'] * TARIFA_PROMEDIO_RD
+    df['Carga_%'] = (df['kWh_Entregado'] / (df['Capacidad_kVA'] * HORAS_MES * FACTOR_CARGA)) * 100
+
+    return df[COLUMNAS_SALIDA]
+
+
+def _acumular_bloques(archivo, mapa_columnas, tipos, tamano_bloque, filtro=(None, None, None)):
+    """
+    Valida y reduce cada bloque a parciales por transformador; devuelve (acumulado, rechazos)
+    """
+    lector = pd.read_csv(archivo, usecols=list(mapa_columnas), dtype=tipos, chunksize=tamano_bloque)
+
+    acumulado = None
+    rechazos = []
+    filas_leidas = 0
+    vistas = np.empty(0, dtype=np.uint64)
+    for bloque in lector:
+        bloque = bloque.rename(columns=mapa_columnas)
+        no_numericos = convertir_numericas(bloque)
+        duplicadas, vistas = marcar_duplicadas(bloque, vistas)
+        filas_bloque = len(bloque)
+        bloque, rechazos_bloque = validar_filas(
+            bloque, no_numericos, desplazamiento=filas_leidas, duplicadas=duplicadas,
+            incluidas=filtro_lectura(bloque, *filtro)
+        )
+        filas_leidas += filas_bloque
+        if len(rechazos_bloque):
+            rechazos.append(rechazos_bloque)
+        bloque[_COLUMNAS_ENERGIA] = bloque[_COLUMNAS_ENERGIA].astype(np.float64)
+        bloque['kWh_Perdido'] = bloque['kWh_Entregado'] - bloque['kWh_Facturado']
+        parcial = bloque.groupby('ID_Trafo', sort=False, observed=True).agg(_AGREGACION_BLOQUE)
+
+        if acumulado is None:
+            acumulado = parcial
+        else:
+            acumulado = pd.concat([acumulado, parcial]).groupby(level=0, sort=False).agg(_AGREGACION_BLOQUE)
+
+    return acumulado, rechazos
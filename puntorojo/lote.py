@@ -0,0 +1,161 @@
+"""
+Procesamiento por lotes sin interfaz (trabajos nocturnos).
+
+Prioriza todos los archivos regionales de un directorio en paralelo y
+escribe, por cada uno, el análisis completo y el resumen por sector.
+
+Uso:
+    python -m puntorojo.lote ENTRADA SALIDA [--formato csv|parquet|arrow|xlsx] [--procesos N]
+                             [--sectores S [S ...]] [--desde FECHA] [--hasta FECHA]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from puntorojo.columnar import exportar_arrow, exportar_parquet
+from puntorojo.excel import exportar_xlsx
+from puntorojo.motor import EXTENSIONES_SOPORTADAS, cargar_archivo_validado, procesar
+
+# Formato -> (extensión, serializador)
+FORMATOS_SALIDA = {
+    'csv': ('csv', lambda df: df.to_csv(index=False).encode('utf-8')),
+    'parquet': ('parquet', exportar_parquet),
+    'arrow': ('arrow', exportar_arrow),
+    'xlsx': ('xlsx', lambda df: exportar_xlsx({'Datos': df}))
+}
+
+
+def listar_archivos(directorio):
+    """
+    Archivos de datos soportados en el directorio, ordenados por nombre
+    """
+    return sorted(
+        os.path.join(directorio, nombre)
+        for nombre in os.listdir(directorio)
+        if nombre.lower().endswith(EXTENSIONES_SOPORTADAS) and not nombre.startswith(('.', '~$'))
+    )
+
+
+def nombre_base(ruta):
+    """
+    Prefijo de las salidas de un archivo: su nombre con la extensión (zona.csv -> zona_csv).
+
+    Conservar la extensión evita que zona.csv y zona.parquet, procesados a
+    la vez, escriban sobre los mismos archivos.
+    """
+    base, extension = os.path.splitext(os.path.basename(ruta))
+    return f"{base}_{extension.lstrip('.')}" if extension else base
+
+
+def procesar_archivo(ruta, destino, formato='parquet', sectores=None, fecha_desde=None, fecha_hasta=None):
+    """
+    Carga, prioriza y escribe las salidas de un archivo regional.
+
+    Las salidas se nombran <base>_priorizado y <base>_sectores (ver
+    nombre_base); las filas rechazadas por el esquema se escriben en
+    <base>_rechazos.csv. Devuelve un resumen con el número de
+    transformadores, las filas rechazadas, las rutas escritas y el tiempo
+    empleado. Se ejecuta en un proceso del pool.
+    """
+    inicio = time.perf_counter()
+    extension, serializar = FORMATOS_SALIDA[formato]
+    base = nombre_base(ruta)
+
+    df, df_rechazos = cargar_archivo_validado(ruta, sectores, fecha_desde, fecha_hasta)
+    df_priorizado, df_sector = procesar(df)
+
+    salidas = []
+    for sufijo, df in (('priorizado', df_priorizado), ('sectores', df_sector)):
+        salida = os.path.join(destino, f"{base}_{sufijo}.{extension}")
+        with open(salida, 'wb') as f:
+            f.write(serializar(df))
+        salidas.append(salida)
+    if len(df_rechazos):
+        salida = os.path.join(destino, f"{base}_rechazos.csv")
+        df_rechazos.to_csv(salida, index=False)
+        salidas.append(salida)
+
+    return {
+        'archivo': ruta,
+        'transformadores': len(df_priorizado),
+        'rechazadas': len(df_rechazos),
+        'salidas': salidas,
+        'segundos': time.perf_counter() - inicio
+    }
+
+
+def procesar_directorio(entrada, destino, formato='parquet', procesos=None,
+                        sectores=None, fecha_desde=None, fecha_hasta=None):
+    """
+    Procesa todos los archivos de `entrada` con un pool de procesos.
+
+    `sectores`, `fecha_desde` y `fecha_hasta` filtran cada archivo en la
+    lectura (ver motor.cargar_archivo_validado). Un archivo con errores no
+    detiene el lote. Devuelve (resultados, errores), donde errores es una
+    lista de (ruta, mensaje).
+    """
+    os.makedirs(destino, exist_ok=True)
+    archivos = listar_archivos(entrada)
+    resultados, errores = [], []
+    if not archivos:
+        return resultados, errores
+
+    procesos = min(procesos or os.cpu_count() or 1, len(archivos))
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        tareas = {
+            pool.submit(procesar_archivo, ruta, destino, formato, sectores, fecha_desde, fecha_hasta): ruta
+            for ruta in archivos
+        }
+        for tarea in as_completed(tareas):
+            try:
+                resultados.append(tarea.result())
+            except Exception as e:
+                errores.append((tareas[tarea], str(e)))
+
+    resultados.sort(key=lambda r: r['archivo'])
+    errores.sort()
+    return resultados, errores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m puntorojo.lote',
+        description='Priorización por lotes de archivos regionales de transformadores'
+    )
+    parser.add_argument('entrada', help='Directorio con archivos CSV, XLSX, Parquet o Arrow')
+    parser.add_argument('salida', help='Directorio donde se escriben los resultados')
+    parser.add_argument('--formato', choices=list(FORMATOS_SALIDA), default='parquet')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos en paralelo (por defecto, núcleos)')
+    parser.add_argument('--sectores', nargs='+', default=None, help='Procesar sólo estos sectores')
+    parser.add_argument('--desde', default=None, help='Fecha/periodo mínimo, incluido (p. ej. 2024-01)')
+    parser.add_argument('--hasta', default=None, help='Fecha/periodo máximo, incluido (p. ej. 2024-06-30)')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.entrada):
+        parser.error(f"No existe el directorio de entrada: {args.entrada}")
+    for opcion in ('desde', 'hasta'):
+        valor = getattr(args, opcion)
+        if valor is not None and pd.isna(pd.to_datetime(valor, errors='coerce')):
+            parser.error(f"Fecha inválida en --{opcion}: {valor}")
+
+    inicio = time.perf_counter()
+    resultados, errores = procesar_directorio(
+        args.entrada, args.salida, args.formato, args.procesos, args.sectores, args.desde, args.hasta
+    )
+
+    for r in resultados:
+        rechazadas = f", {r['rechazadas']:,} filas rechazadas" if r['rechazadas'] else ""
+        print(f"✅ {os.path.basename(r['archivo'])}: {r['transformadores']:,} transformadores{rechazadas} ({r['segundos']:.2f} s)")
+    for ruta, mensaje in errores:
+        print(f"❌ {os.path.basename(ruta)}: {mensaje}", file=sys.stderr)
+    print(f"{len(resultados)} archivos procesados, {len(errores)} con errores en {time.perf_counter() - inicio:.2f} s")
+
+    return 1 if errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+import json
+
+import folium
+import numpy as np
+from branca.element import Element
+from folium.elements import ElementAddToElement
+from folium.map import Layer
+from folium.plugins import HeatMap
+from folium.template import Template
+
+# =============================================
+# GENERACIÓN DE MAPA INTERACTIVO
+# =============================================
+CENTRO_MAPA = [18.48, -69.65]
+ZOOM_INICIAL = 11
+
+# Bandas de Perdida_% -> (color, radio, icono): > 50%, 30-50%, < 30%
+BANDAS_PERDIDA = [
+    ('red', 12, '🔴'),
+    ('orange', 10, '🟠'),
+    ('green', 8, '🟢')
+]
+
+# Colores de las rutas de cuadrillas (se repiten si hay más rutas)
+COLORES_RUTAS = ['#1f77b4', '#d62728', '#2ca02c', '#9467bd', '#ff7f0e', '#8c564b', '#e377c2', '#17becf']
+
+# Estilo y popup de cada marcador calculados en el navegador a partir de las
+# propiedades del feature, sin objetos Python por transformador
+_JS_MARCADOR = """
+function(feature, layer) {
+    var bandas = %s;
+    var p = feature.properties;
+    var banda = bandas[p.banda];
+    var fmt = function(valor, decimales) {
+        return Number(valor).toLocaleString('en-US', {
+            minimumFractionDigits: decimales, maximumFractionDigits: decimales
+        });
+    };
+    layer.setStyle({color: banda[0], fillColor: banda[0], radius: banda[1]});
+    layer.bindPopup(
+        '<div style="font-family: Arial; width: 250px;">' +
+        '<h4 style="margin:0; color:' + banda[0] + ';">' + banda[2] + ' ' + p.id + '</h4>' +
+        '<hr style="margin:5px 0;">' +
+        '<b>Sector:</b> ' + p.sector + '<br>' +
+        '<b>Pérdida:</b> ' + Number(p.perdida).toFixed(1) + '%%<br>' +
+        '<b>Energía Perdida:</b> ' + fmt(p.kwh, 0) + ' kWh<br>' +
+        '<b>Impacto Monetario:</b> RD$ ' + fmt(p.monto, 2) + '<br>' +
+        '<b>Capacidad:</b> ' + fmt(p.kva, 0) + ' kVA<br>' +
+        '<b>Carga:</b> ' + Number(p.carga).toFixed(0) + '%%' +
+        '</div>',
+        {maxWidth: 300}
+    );
+}
+""" % [list(b) for b in BANDAS_PERDIDA]
+
+# Estilo de los polígonos de hotspots (ver puntorojo.hotspots)
+ESTILO_HOTSPOT = {'color': '#8B0000', 'weight': 2, 'fillColor': '#FF0000', 'fillOpacity': 0.15, 'dashArray': '5, 5'}
+
+LEYENDA_HTML = """
+<div style="position: fixed;
+            bottom: 50px; right: 50px; width: 180px; height: 120px;
+            background-color: white; border:2px solid grey; z-index:9999;
+            font-size:14px; padding: 10px">
+    <p style="margin:0;"><b>Nivel de Pérdida</b></p>
+    <p style="margin:5px 0;"><span style="color:red;">🔴</span> > 50% - CRÍTICO</p>
+    <p style="margin:5px 0;"><span style="color:orange;">🟠</span> 30-50% - ALTO</p>
+    <p style="margin:5px 0;"><span style="color:green;">🟢</span> < 30% - NORMAL</p>
+</div>
+"""
+
+
+def banda_perdida(perdida):
+    """
+    Índice de banda en BANDAS_PERDIDA para cada valor de Perdida_%
+    """
+    perdida = np.asarray(perdida, dtype=float)
+    return np.select([perdida > 50, perdida > 30], [0, 1], default=2)
+
+
+def construir_geojson_hotspots(df_hotspots):
+    """
+    FeatureCollection con el polígono de cada hotspot (punto si tiene menos de 3 vértices)
+    """
+    features = []
+    for _, hs in df_hotspots.iterrows():
+        vertices = [[lon, lat] for lat, lon in hs['Poligono']]
+        if len(vertices) >= 3:
+            geometria = {'type': 'Polygon', 'coordinates': [vertices + vertices[:1]]}
+        else:
+            geometria = {'type': 'Point', 'coordinates': [round(hs['Longitud'], 6), round(hs['Latitud'], 6)]}
+        features.append({
+            'type': 'Feature',
+            'geometry': geometria,
+            'properties': {
+                'hotspot': hs['ID_Hotspot'],
+                'kwh': f"{hs['kWh_Perdido_Total']:,.0f}",
+                'perdida': f"{hs['Perdida_%']:.1f}%",
+                'trafos': int(hs['Num_Transformadores']),
+                'sectores': hs['Sectores']
+            }
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def construir_columnas_marcadores(df):
+    """
+    Extrae las propiedades de los marcadores como columnas (listas paralelas).
+
+    Es la carga útil de CapaMarcadores: el navegador la expande a un
+    FeatureCollection GeoJSON. Los sectores van codificados como índices a la
+    lista 'sectores' y los transformadores sin coordenadas válidas se omiten.
+    """
+    lat = df['Latitud'].to_numpy(dtype=float)
+    lon = df['Longitud'].to_numpy(dtype=float)
+    validos = np.isfinite(lat) & np.isfinite(lon)
+    sectores = df['Sector'].astype(str).astype('category')
+
+    return {
+        'lon': lon[validos].round(6).tolist(),
+        'lat': lat[validos].round(6).tolist(),
+        'id': df['ID_Trafo'].to_numpy()[validos].tolist(),
+        'sector': sectores.cat.codes.to_numpy()[validos].tolist(),
+        'sectores': sectores.cat.categories.tolist(),
+        'banda': banda_perdida(df['Perdida_%'])[validos].tolist(),
+        'perdida': df['Perdida_%'].to_numpy(dtype=float)[validos].round(1).tolist(),
+        'kwh': df['kWh_Perdido'].to_numpy(dtype=float)[validos].round(0).tolist(),
+        'monto': df['Perdida_Monetaria_RD$'].to_numpy(dtype=float)[validos].round(2).tolist(),
+        'kva': df['Capacidad_kVA'].to_numpy(dtype=float)[validos].round(0).tolist(),
+        'carga': df['Carga_%'].to_numpy(dtype=float)[validos].round(0).tolist()
+    }
+
+
+class _ScriptLiteral(Element):
+    """
+    Fragmento de script que se emite tal cual, sin compilarse como plantilla
+    """
+    def __init__(self, texto):
+        super().__init__()
+        self.texto = texto
+
+    def render(self, **kwargs):
+        return self.texto
+
+
+class CapaMarcadores(Layer):
+    """
+    Capa GeoJSON única de marcadores circulares.
+
+    Recibe las columnas de construir_columnas_marcadores y el navegador las
+    expande a un FeatureCollection, con lo que no se repiten las claves de
+    cada feature en el HTML. Además, folium compila como plantilla Jinja el
+    script ya renderizado de cada elemento, lo que con varios MB de datos
+    domina el tiempo de construcción; esta capa inserta su script como texto
+    literal.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.geoJson(null, {
+                pointToLayer: function(feature, latlng) {
+                    return L.circleMarker(latlng, {{ this.opciones_marcador }});
+                },
+                onEachFeature: {{ this.on_each_feature }}
+            });
+            (function(c) {
+                var features = new Array(c.id.length);
+                for (var i = 0; i < c.id.length; i++) {
+                    features[i] = {
+                        type: 'Feature',
+                        geometry: {type: 'Point', coordinates: [c.lon[i], c.lat[i]]},
+                        properties: {
+                            id: c.id[i], sector: c.sectores[c.sector[i]], banda: c.banda[i],
+                            perdida: c.perdida[i], kwh: c.kwh[i], monto: c.monto[i],
+                            kva: c.kva[i], carga: c.carga[i]
+                        }
+                    };
+                }
+                {{ this.get_name() }}.addData({type: 'FeatureCollection', features: features});
+            })({{ this.datos_json }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, columnas, on_each_feature, name=None, overlay=True, control=True, show=True, **opciones_marcador):
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = 'CapaMarcadores'
+        self.datos_json = json.dumps(columnas, separators=(',', ':'))
+        self.on_each_feature = on_each_feature
+        self.opciones_marcador = json.dumps(opciones_marcador)
+
+    def render(self, **kwargs):
+        if self.show:
+            self.add_child(
+                ElementAddToElement(
+                    element_name=self.get_name(),
+                    element_parent_name=self._parent.get_name(),
+                ),
+                name=self.get_name() + "_add",
+            )
+        figura = self.get_root()
+        script = self._template.module.__dict__['script']
+        figura.script.add_child(_ScriptLiteral(script(self, kwargs)), name=self.get_name())
+        for elemento in self._children.values():
+            elemento.render(**kwargs)
+
+
+def crear_mapa_calor(df, celdas_calor, df_hotspots=None):
+    """
+    Crea mapa de calor con marcadores categorizados por pérdida
+
+    La capa de calor recibe celdas hexagonales preagregadas en el servidor
+    (ver puntorojo.espacial) y los marcadores se emiten como una sola capa
+    GeoJSON (CapaMarcadores) cuyo estilo y popup se generan en el navegador.
+    Si se pasan hotspots (ver puntorojo.hotspots) se dibujan sus polígonos.
+    """
+    # Centro del mapa: Corredor Este RD
+    mapa = folium.Map(
+        location=CENTRO_MAPA,
+        zoom_start=ZOOM_INICIAL,
+        tiles='OpenStreetMap'
+    )
+
+    # Agregar capa de calor (pesos normalizados a la celda de mayor pérdida)
+    peso = celdas_calor['Peso'].clip(lower=0).to_numpy()
+    if len(peso) and peso.max() > 0:
+        peso = peso / peso.max()
+    heat_data = np.column_stack([
+        celdas_calor['Latitud'].to_numpy(), celdas_calor['Longitud'].to_numpy(), peso
+    ]).tolist()
+    HeatMap(heat_data, radius=15, blur=25, max_zoom=13, gradient={
+        0.0: 'green', 0.3: 'yellow', 0.5: 'orange', 0.7: 'red', 1.0: 'darkred'
+    }).add_to(mapa)
+
+    # Agregar hotspots de pérdida (agrupamientos que cruzan sectores)
+    if df_hotspots is not None and len(df_hotspots):
+        folium.GeoJson(
+            construir_geojson_hotspots(df_hotspots),
+            name='Hotspots de Pérdida',
+            style_function=lambda feature: ESTILO_HOTSPOT,
+            marker=folium.CircleMarker(radius=10, **ESTILO_HOTSPOT),
+            tooltip=folium.GeoJsonTooltip(
+                fields=['hotspot', 'kwh', 'perdida', 'trafos', 'sectores'],
+                aliases=['Hotspot:', 'Energía Perdida (kWh):', 'Pérdida:', 'Transformadores:', 'Sectores:']
+            )
+        ).add_to(mapa)
+
+    # Agregar marcadores con categorización por color (una sola capa GeoJSON)
+    CapaMarcadores(
+        construir_columnas_marcadores(df),
+        on_each_feature=_JS_MARCADOR,
+        name='Transformadores',
+        radius=8,
+        fill=True,
+        fillOpacity=0.7,
+        weight=2
+    ).add_to(mapa)
+
+    # Agregar leyenda
+    mapa.get_root().html.add_child(folium.Element(LEYENDA_HTML))
+
+    return mapa
+
+
+def crear_mapa_rutas(df_paradas, base):
+    """
+    Mapa de rutas de cuadrillas: una polilínea por ruta (base -> paradas -> base)
+    """
+    mapa = folium.Map(location=list(base), zoom_start=ZOOM_INICIAL, tiles='OpenStreetMap')
+    folium.Marker(list(base), tooltip='Base de cuadrillas', icon=folium.Icon(color='black', icon='home')).add_to(mapa)
+
+    for n, ((dia, cuadrilla), ruta) in enumerate(df_paradas.groupby(['Dia', 'Cuadrilla'], sort=True)):
+        color = COLORES_RUTAS[n % len(COLORES_RUTAS)]
+        puntos = ruta[['Latitud', 'Longitud']].to_numpy().tolist()
+        capa = folium.FeatureGroup(name=f"Día {dia} - Cuadrilla {cuadrilla}")
+        folium.PolyLine([list(base)] + puntos + [list(base)], color=color, weight=3, opacity=0.8).add_to(capa)
+        for parada in ruta.itertuples(index=False):
+            folium.CircleMarker(
+                [parada.Latitud, parada.Longitud],
+                radius=5, color=color, fill=True, fill_opacity=0.9,
+                tooltip=f"{parada.Orden}. {parada.ID_Trafo} (Score {parada.Prioridad_Score:.0f})"
+            ).add_to(capa)
+        capa.add_to(mapa)
+
+    folium.LayerControl(collapsed=True).add_to(mapa)
+    return mapa
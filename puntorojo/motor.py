@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from puntorojo.anomalias import detectar_anomalias
+from puntorojo.columnar import formato_columnar, leer_columnar
+from puntorojo.ingesta import (
+    COLUMNAS_RECHAZO, calcular_metricas, consolidar_lecturas, convertir_numericas, filtro_lectura,
+    leer_con_esquema, leer_csv_por_bloques, marcar_duplicadas, validar_filas
+)
+from puntorojo.prioridad import agregar_por_sector, calcular_prioridades
+
+# =============================================
+# MOTOR DE ANÁLISIS (SIN INTERFAZ)
+# =============================================
+# Por encima de este tamaño los CSV se leen por bloques
+UMBRAL_STREAMING_BYTES = 100 * 1024 * 1024
+
+EXTENSIONES_SOPORTADAS = ('.csv', '.xlsx', '.parquet', '.pq', '.arrow', '.feather', '.ipc')
+
+
+def _nombre(origen):
+    return os.fspath(origen) if isinstance(origen, (str, os.PathLike)) else origen.name
+
+
+def tamano_archivo(origen):
+    """
+    Tamaño en bytes de una ruta o de un archivo abierto, sin copiar su contenido
+    """
+    if isinstance(origen, (str, os.PathLike)):
+        return os.path.getsize(origen)
+    posicion = origen.tell()
+    origen.seek(0, os.SEEK_END)
+    tamano = origen.tell()
+    origen.seek(posicion)
+    return tamano
+
+
+def leer_tabla(origen):
+    """
+    Lee un archivo CSV, Excel, Parquet o Arrow IPC completo, sin normalizar columnas
+    """
+    nombre = _nombre(origen).lower()
+    formato = formato_columnar(nombre)
+    if formato == 'parquet':
+        return pd.read_parquet(origen)
+    if formato == 'arrow':
+        return pd.read_feather(origen)
+    if nombre.endswith('.csv'):
+        return pd.read_csv(origen)
+    if nombre.endswith('.xlsx'):
+        return pd.read_excel(origen, engine='openpyxl')
+    raise ValueError("Formato no soportado. Use CSV, XLSX, Parquet o Arrow")
+
+
+def cargar_archivo_validado(origen, sectores=None, fecha_desde=None, fecha_hasta=None):
+    """
+    Carga un archivo CSV, Excel, Parquet o Arrow IPC (ruta o archivo abierto
+    con atributo `name`) y devuelve (df, df_rechazos): el dataset normalizado
+    con sus métricas y el reporte de filas rechazadas por el esquema (ver
+    ingesta.validar_filas).
+
+    Las filas idénticas a una anterior se rechazan ("Fila duplicada"); las
+    demás filas repetidas de un mismo ID_Trafo son lecturas del medidor y se
+    suman (ver ingesta.consolidar_lecturas), tanto en la lectura completa
+    como en la ingesta por bloques: el resultado no depende del tamaño del
+    archivo. Los repetidos entre archivos distintos los resuelve la fusión.
+
+    `sectores`, `fecha_desde` y `fecha_hasta` (opcionales) restringen la
+    carga a esos sectores y a los periodos entre ambas fechas, incluidas
+    (ver ingesta.filtro_lectura). El filtro se aplica en el lector: en
+    Parquet descarta grupos de filas sin decodificarlos y en CSV por bloques
+    las filas se descartan antes de acumularse.
+
+    Lanza ValueError si el formato no está soportado, faltan columnas o se
+    filtra por fecha un archivo sin columna de fecha.
+    """
+    nombre = _nombre(origen).lower()
+
+    # CSV grandes (exportaciones AMI): ingesta por bloques con memoria acotada
+    if nombre.endswith('.csv') and tamano_archivo(origen) > UMBRAL_STREAMING_BYTES:
+        rechazos = []
+        df = leer_csv_por_bloques(origen, rechazos=rechazos, sectores=sectores,
+                                  fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
+        return df, _unir_rechazos(rechazos)
+
+    # Parquet / Arrow IPC: proyección de columnas en el lector
+    formato = formato_columnar(nombre)
+    if formato is not None:
+        df = leer_columnar(origen, formato, sectores, fecha_desde, fecha_hasta)
+        posiciones = df.index.to_numpy()
+        df = df.reset_index(drop=True)
+        no_numericos = convertir_numericas(df)
+        df, df_rechazos = validar_filas(
+            df, no_numericos, duplicadas=marcar_duplicadas(df)[0],
+            incluidas=filtro_lectura(df, sectores, fecha_desde, fecha_hasta)
+        )
+        # El lector pudo descartar filas: se reportan con su número en el archivo
+        df_rechazos['Fila'] = posiciones[df_rechazos['Fila'].to_numpy(dtype=np.int64) - 1] + 1
+        return calcular_metricas(consolidar_lecturas(df)), df_rechazos
+
+    if nombre.endswith('.csv'):
+        df, df_rechazos = leer_con_esquema(origen, 'csv', sectores, fecha_desde, fecha_hasta)
+    elif nombre.endswith('.xlsx'):
+        df, df_rechazos = leer_con_esquema(origen, 'xlsx', sectores, fecha_desde, fecha_hasta)
+    else:
+        raise ValueError("Formato no soportado. Use CSV, XLSX, Parquet o Arrow")
+
+    return calcular_metricas(consolidar_lecturas(df)), df_rechazos
+
+
+def cargar_archivo(origen):
+    """
+    Carga un archivo y devuelve sólo el dataset normalizado (descarta las filas rechazadas)
+    """
+    return cargar_archivo_validado(origen)[0]
+
+
+def _unir_rechazos(rechazos):
+    if not rechazos:
+        return pd.DataFrame(columns=COLUMNAS_RECHAZO)
+    return pd.concat(rechazos, ignore_index=True)
+
+
+def procesar(df):
+    """
+    Pipeline de priorización (anomalías + prioridades): devuelve (df_priorizado, df_sector)
+    """
+    df_priorizado = calcular_prioridades(detectar_anomalias(df))
+    return df_priorizado, agregar_por_sector(df_priorizado)
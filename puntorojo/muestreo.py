@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+from puntorojo.prioridad import reglas_criticas
+
+# =============================================
+# VISTA PREVIA POR MUESTREO ESTRATIFICADO
+# =============================================
+# Filas a partir de las cuales la app ofrece la vista previa aproximada
+UMBRAL_VISTA_PREVIA = 500_000
+# Tamaño esperado de la muestra (incluye los transformadores críticos)
+TAMANO_MUESTRA = 50_000
+# Tamaño mínimo de muestra por sector (o el sector completo si es menor)
+MIN_POR_SECTOR = 200
+# Mezcla con muestreo uniforme: fracción de la pérdida media del sector que se
+# suma a cada transformador, para que los de pérdida nula también puedan salir
+FRACCION_PISO = 0.1
+# Cuantil normal del intervalo de confianza del 95%
+Z_CONFIANZA = 1.96
+# Semilla por defecto del sorteo. No usar 0: default_rng(0) repite el flujo de
+# default_rng([0, 0]), el del primer bloque de puntorojo.sintetico, y el
+# sorteo quedaría correlacionado con el Sector de los fixtures
+SEMILLA_MUESTRA = 20_240_601
+
+COLUMNA_PESO = 'Peso_Muestral'
+# Pérdida expandida por el peso: la capa de calor de la muestra estima la del dataset
+COLUMNA_PERDIDA_EXPANDIDA = 'kWh_Perdido_Expandido'
+
+COLUMNAS_TOTALES = ['kWh_Entregado', 'kWh_Facturado', 'kWh_Perdido', 'Perdida_Monetaria_RD$']
+
+
+def seleccion_obligatoria(df):
+    """
+    Transformadores que siempre entran en la muestra: los de categoría CRÍTICA
+    (no dependen del score) y el de mayor pérdida, que fija la normalización
+    del score por volumen
+    """
+    operativo, cambio = reglas_criticas(df['Sector'], df['Perdida_%'], df['Carga_%'])
+    obligatorios = operativo | cambio
+    perdido = df['kWh_Perdido'].to_numpy(dtype=float)
+    if np.isfinite(perdido).any():
+        obligatorios[np.nanargmax(perdido)] = True
+    return obligatorios
+
+
+def _calibrar(tamanos, n):
+    """
+    Probabilidades proporcionales a `tamanos` con suma n, acotadas a 1 (las acotadas se reparten el resto)
+    """
+    probabilidad = np.zeros(len(tamanos))
+    ciertos = np.zeros(len(tamanos), dtype=bool)
+    while True:
+        restantes = n - ciertos.sum()
+        total = tamanos[~ciertos].sum()
+        if restantes <= 0 or total <= 0:
+            break
+        probabilidad[~ciertos] = tamanos[~ciertos] * (restantes / total)
+        nuevos = ~ciertos & (probabilidad >= 1)
+        if not nuevos.any():
+            break
+        ciertos |= nuevos
+    probabilidad[ciertos] = 1.0
+    return probabilidad
+
+
+def probabilidades_inclusion(df, tamano=TAMANO_MUESTRA):
+    """
+    Probabilidad de inclusión de cada transformador.
+
+    Estratos por Sector. Los obligatorios (ver seleccion_obligatoria) tienen
+    probabilidad 1; el resto de la muestra se reparte entre sectores según
+    su pérdida (con MIN_POR_SECTOR como mínimo) y, dentro de cada sector,
+    proporcionalmente a kWh_Perdido más un piso (FRACCION_PISO de la pérdida
+    media del sector), de modo que todos tienen probabilidad positiva.
+    """
+    obligatorios = seleccion_obligatoria(df)
+    perdido = np.nan_to_num(df['kWh_Perdido'].to_numpy(dtype=float), nan=0.0).clip(min=0)
+    sector = df['Sector'].astype(str).to_numpy()
+    estratos = pd.Series(perdido).groupby(sector, sort=False)
+    media_sector = estratos.transform('mean').to_numpy()
+    tamanos = perdido + FRACCION_PISO * np.where(media_sector > 0, media_sector, 1.0)
+
+    # Reparto entre sectores proporcional a la pérdida de sus transformadores no obligatorios
+    libres = pd.Series(np.where(obligatorios, 0.0, tamanos)).groupby(sector, sort=False)
+    disponibles = (~pd.Series(obligatorios)).groupby(sector, sort=False).sum()
+    restantes = max(tamano - obligatorios.sum(), 0)
+    reparto = restantes * libres.sum() / max(libres.sum().sum(), 1e-12)
+    reparto = np.minimum(np.maximum(reparto, MIN_POR_SECTOR), disponibles)
+
+    probabilidad = np.ones(len(df))
+    for nombre, posiciones in pd.Series(np.arange(len(df))).groupby(sector, sort=False).groups.items():
+        posiciones = np.asarray(posiciones)
+        posiciones = posiciones[~obligatorios[posiciones]]
+        probabilidad[posiciones] = _calibrar(tamanos[posiciones], reparto[nombre])
+    return probabilidad
+
+
+def muestra_estratificada(df, tamano=TAMANO_MUESTRA, semilla=SEMILLA_MUESTRA):
+    """
+    Muestra estratificada por Sector y ponderada por pérdida para la vista previa.
+
+    Muestreo de Poisson con las probabilidades de probabilidades_inclusion
+    (tamaño esperado `tamano`): siempre incluye a todos los transformadores
+    CRÍTICA y al de mayor pérdida, por lo que sus scores y categorías son
+    los exactos. Cada fila lleva COLUMNA_PESO = 1 / probabilidad (estimador
+    de Horvitz-Thompson) y COLUMNA_PERDIDA_EXPANDIDA. Un dataset que no
+    supera `tamano` se devuelve completo con peso 1.
+    """
+    if len(df) <= tamano:
+        probabilidad = np.ones(len(df))
+        incluidos = np.ones(len(df), dtype=bool)
+    else:
+        probabilidad = probabilidades_inclusion(df, tamano)
+        incluidos = np.random.default_rng(semilla).random(len(df)) < probabilidad
+    muestra = df[incluidos].reset_index(drop=True)
+    muestra[COLUMNA_PESO] = 1.0 / probabilidad[incluidos]
+    muestra[COLUMNA_PERDIDA_EXPANDIDA] = muestra['kWh_Perdido'] * muestra[COLUMNA_PESO]
+    return muestra
+
+
+def estimar_totales(df_muestra):
+    """
+    Totales del dataset estimados desde la muestra, con su margen al 95%: {métrica: (estimado, margen)}.
+
+    Totales de COLUMNAS_TOTALES por Horvitz-Thompson, con varianza
+    Σ (w² - w) y² (muestreo de Poisson; los obligatorios, con w = 1, no
+    aportan varianza). Perdida_% es el cociente kWh_Perdido / kWh_Entregado,
+    con varianza por linealización. Sobre el dataset completo (pesos 1) los
+    márgenes son 0.
+    """
+    peso = df_muestra[COLUMNA_PESO].to_numpy(dtype=float)
+    factor = peso * peso - peso
+    valores = {c: np.nan_to_num(df_muestra[c].to_numpy(dtype=float)) for c in COLUMNAS_TOTALES}
+
+    totales = {}
+    for columna, y in valores.items():
+        totales[columna] = ((peso * y).sum(), Z_CONFIANZA * np.sqrt((factor * y * y).sum()))
+
+    perdido, entregado = totales['kWh_Perdido'][0], totales['kWh_Entregado'][0]
+    razon = perdido / entregado if entregado else np.nan
+    residuo = valores['kWh_Perdido'] - razon * valores['kWh_Entregado']
+    margen = Z_CONFIANZA * np.sqrt((factor * residuo * residuo).sum()) / entregado if entregado else np.nan
+    totales['Perdida_%'] = (razon * 100, margen * 100)
+    return totales
+
+
+def agregar_por_sector_ponderado(df_priorizado):
+    """
+    Como agregar_por_sector, pero sobre una muestra: sumas y promedios ponderados por COLUMNA_PESO
+    """
+    peso = df_priorizado[COLUMNA_PESO]
+    df_sector = pd.DataFrame({
+        'Sector': df_priorizado['Sector'],
+        'kWh_Perdido_Total': df_priorizado['kWh_Perdido'] * peso,
+        'Perdida_%_Ponderada': df_priorizado['Perdida_%'] * peso,
+        'Impacto_Monetario': df_priorizado['Perdida_Monetaria_RD$'] * peso,
+        'Num_Transformadores': peso
+    }).groupby('Sector', observed=True).sum().reset_index()
+    df_sector.insert(2, 'Perdida_%_Promedio', df_sector.pop('Perdida_%_Ponderada') / df_sector['Num_Transformadores'])
+    df_sector['Num_Transformadores'] = df_sector['Num_Transformadores'].round().astype(int)
+    return df_sector.sort_values('kWh_Perdido_Total', ascending=False)
@@ -0,0 +1,55 @@
+import numpy as np
+
+# =============================================
+# PAGINACIÓN DEL LISTADO PRIORIZADO
+# =============================================
+TAMANOS_PAGINA = [25, 50, 100, 200]
+
+# Columnas por las que se puede ordenar el listado
+COLUMNAS_ORDEN = ['Prioridad_Score', 'Perdida_%', 'kWh_Perdido', 'Perdida_Monetaria_RD$', 'Carga_%']
+
+
+def numero_paginas(total, tamano_pagina):
+    """
+    Número de páginas para `total` filas (al menos una, aunque no haya filas)
+    """
+    return max(1, -(-total // tamano_pagina))
+
+
+def obtener_pagina(df, pagina, tamano_pagina, columna=None, descendente=True, posiciones=None):
+    """
+    Filas de la página `pagina` (base 1) de df ordenado por `columna`.
+
+    `posiciones` (p. ej. el resultado de IndiceFiltros.consultar) limita la
+    paginación a esas filas sin materializar el DataFrame filtrado.
+
+    No ordena todo el DataFrame: con argpartition se separan las primeras
+    pagina * tamano_pagina posiciones y sólo esas se ordenan, por lo que las
+    primeras páginas (las que se consultan) cuestan O(n). Si columna es
+    None se respeta el orden actual (df_priorizado ya viene ordenado por
+    Prioridad_Score). Los valores faltantes van al final.
+    """
+    if posiciones is None:
+        posiciones = np.arange(len(df))
+    inicio = (pagina - 1) * tamano_pagina
+    fin = min(inicio + tamano_pagina, len(posiciones))
+    if inicio >= fin:
+        return df.iloc[0:0]
+    if columna is None:
+        return df.iloc[posiciones[inicio:fin]]
+
+    valores = df[columna].to_numpy(dtype=float)[posiciones]
+    clave = -valores if descendente else valores.copy()
+    clave[np.isnan(clave)] = np.inf
+
+    if fin < len(clave):
+        # Valor de corte; entre empates en el corte se toman los de menor posición
+        corte = clave[np.argpartition(clave, fin - 1)[fin - 1]]
+        menores = np.flatnonzero(clave < corte)
+        iguales = np.flatnonzero(clave == corte)[:fin - len(menores)]
+        primeras = np.concatenate([menores, iguales])
+    else:
+        primeras = np.arange(len(clave))
+    # Orden estable entre empates: por posición original
+    primeras = primeras[np.lexsort((primeras, clave[primeras]))]
+    return df.iloc[posiciones[primeras[inicio:fin]]]
@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+
+# =============================================
+# PARÁMETROS DEL ALGORITMO DE PRIORIZACIÓN
+# =============================================
+# Sectores con operativo de normalización activo
+SECTORES_OPERATIVO = ['Ensanche Luperón', 'San Isidro']
+
+# Pesos de los componentes del score de prioridad (suman 100)
+PESO_VOLUMEN = 40
+PESO_PORCENTAJE = 30
+PESO_SOBRECARGA = 30
+
+# Categorías en orden de severidad (el índice es el código categórico)
+CATEGORIAS_PRIORIDAD = [
+    'CRÍTICA - Operativo Urgente',
+    'CRÍTICA - Cambio Transformador',
+    'ALTA',
+    'MEDIA',
+    'BAJA'
+]
+
+SUGERENCIA_OPERATIVO = "🔴 OPERATIVO DE NORMALIZACIÓN: Blindaje de red y regularización de conexiones directas"
+SUGERENCIA_CAMBIO_PREFIJO = "⚡ CAMBIO DE TRANSFORMADOR: Sobrecarga del "
+SUGERENCIA_CAMBIO_SUFIJO = "% - Capacidad insuficiente"
+SUGERENCIA_INSPECCION = "🔍 INSPECCIÓN TÉCNICA: Posible fraude masivo o falla en medición"
+SUGERENCIA_AUDITORIA = "📋 AUDITORÍA DE RED: Revisar conexiones no autorizadas"
+SUGERENCIA_MANTENIMIENTO = "🔧 MANTENIMIENTO PREVENTIVO: Revisar estado de conductores y empalmes"
+SUGERENCIA_MONITOREO = 'Monitoreo regular'
+
+
+def _tablas_sugerencias():
+    """
+    Precalcula el texto de sugerencia para cada combinación de reglas.
+
+    El código de combinación es operativo*6 + revision*2 + mantenimiento,
+    donde revision vale 0 (ninguna), 1 (auditoría) o 2 (inspección).
+    La regla de sobrecarga lleva el porcentaje de carga en el texto, por lo
+    que se guarda como prefijo/sufijo alrededor del valor formateado.
+    """
+    sin_carga, prefijos, sufijos = [], [], []
+    for operativo in (0, 1):
+        for revision in (0, 1, 2):
+            for mantenimiento in (0, 1):
+                antes = [SUGERENCIA_OPERATIVO] if operativo else []
+                despues = []
+                if revision == 2:
+                    despues.append(SUGERENCIA_INSPECCION)
+                elif revision == 1:
+                    despues.append(SUGERENCIA_AUDITORIA)
+                if mantenimiento:
+                    despues.append(SUGERENCIA_MANTENIMIENTO)
+
+                sin_carga.append(' | '.join(antes + despues) or SUGERENCIA_MONITOREO)
+                prefijos.append(''.join(p + ' | ' for p in antes) + SUGERENCIA_CAMBIO_PREFIJO)
+                sufijos.append(SUGERENCIA_CAMBIO_SUFIJO + ''.join(' | ' + p for p in despues))
+
+    return (
+        np.array(sin_carga, dtype=object),
+        np.array(prefijos, dtype=object),
+        np.array(sufijos, dtype=object)
+    )
+
+
+_SUGERENCIAS_SIN_CARGA, _SUGERENCIAS_PREFIJO, _SUGERENCIAS_SUFIJO = _tablas_sugerencias()
+_CATEGORIAS = np.array(CATEGORIAS_PRIORIDAD, dtype=object)
+
+
+# =============================================
+# ALGORITMO DE PRIORIZACIÓN
+# =============================================
+def reglas_criticas(sector, perdida, carga):
+    """
+    Máscaras de las dos categorías CRÍTICA, que no dependen del score: (operativo urgente, cambio de transformador)
+    """
+    perdida = np.asarray(perdida, dtype=float)
+    carga = np.asarray(carga, dtype=float)
+    operativo = pd.Series(sector).isin(SECTORES_OPERATIVO).to_numpy() & (perdida > 50)
+    return operativo, (carga > 100) & (perdida > 40)
+
+
+def categorizar_prioridad(sector, perdida, carga, score, anomalia=None):
+    """
+    Categoría de prioridad por transformador (lógica especializada por sector y condiciones)
+
+    `anomalia` (booleana, ver puntorojo.anomalias) eleva a ALTA como mínimo
+    a los transformadores atípicos en su sector o en su vecindad.
+    """
+    score = np.asarray(score, dtype=float)
+    operativo, cambio = reglas_criticas(sector, perdida, carga)
+    atipico = np.zeros(len(score), dtype=bool) if anomalia is None else np.asarray(anomalia, dtype=bool)
+
+    codigo_categoria = np.select(
+        [operativo, cambio, atipico | (score > 70), score > 40],
+        [0, 1, 2, 3],
+        default=4
+    )
+    return _CATEGORIAS[codigo_categoria]
+
+
+def generar_sugerencias(sector, perdida, carga):
+    """
+    Texto de intervención sugerida por transformador, a partir del código de combinación de reglas
+    """
+    perdida = np.asarray(perdida, dtype=float)
+    carga = np.asarray(carga, dtype=float)
+    operativo = pd.Series(sector).isin(SECTORES_OPERATIVO).to_numpy() & (perdida > 50)
+    sobrecarga = carga > 100
+
+    revision = np.select([perdida > 60, perdida > 40], [2, 1], default=0)
+    mantenimiento = (perdida > 30) & (carga < 70)
+    codigo_sugerencia = operativo * 6 + revision * 2 + mantenimiento
+
+    sugerencias = _SUGERENCIAS_SIN_CARGA[codigo_sugerencia]
+    if sobrecarga.any():
+        codigos_carga = codigo_sugerencia[sobrecarga]
+        sugerencias[sobrecarga] = (
+            _SUGERENCIAS_PREFIJO[codigos_carga] +
+            np.char.mod('%.0f', carga[sobrecarga]).astype(object) +
+            _SUGERENCIAS_SUFIJO[codigos_carga]
+        )
+    return sugerencias
+
+
+def calcular_prioridades(df):
+    """
+    Calcula prioridad de intervención basada en múltiples factores
+
+    Implementación por columnas (máscaras booleanas y np.select) equivalente
+    a la evaluación fila por fila original.
+    """
+    df_prioridad = df.copy()
+
+    # Score de prioridad (0-100)
+    df_prioridad['Score_Volumen'] = (df_prioridad['kWh_Perdido'] / df_prioridad['kWh_Perdido'].max()) * PESO_VOLUMEN
+    df_prioridad['Score_Porcentaje'] = (df_prioridad['Perdida_%'] / 100) * PESO_PORCENTAJE
+    df_prioridad['Score_Sobrecarga'] = score_sobrecarga(df_prioridad['Carga_%'])
+
+    df_prioridad['Prioridad_Score'] = (
+        df_prioridad['Score_Volumen'] +
+        df_prioridad['Score_Porcentaje'] +
+        df_prioridad['Score_Sobrecarga']
+    )
+    # Factor de historial mensual (ver puntorojo.series), si se cargó
+    if 'Score_Tendencia' in df_prioridad:
+        df_prioridad['Prioridad_Score'] += df_prioridad['Score_Tendencia']
+
+    df_prioridad['Categoria_Prioridad'] = categorizar_prioridad(
+        df_prioridad['Sector'], df_prioridad['Perdida_%'], df_prioridad['Carga_%'], df_prioridad['Prioridad_Score'],
+        anomalia=df_prioridad.get('Anomalia')
+    )
+    df_prioridad['Sugerencia_Intervencion'] = generar_sugerencias(
+        df_prioridad['Sector'], df_prioridad['Perdida_%'], df_prioridad['Carga_%']
+    )
+
+    return df_prioridad.sort_values('Prioridad_Score', ascending=False)
+
+
+def score_sobrecarga(carga, peso=PESO_SOBRECARGA):
+    """
+    Componente de sobrecarga del score: `peso` puntos si supera el 100%, proporcional a la mitad si no
+    """
+    carga = np.asarray(carga, dtype=float)
+    return np.where(carga > 100, float(peso), (carga / 100) * (peso / 2))
+
+
+# =============================================
+# AGREGACIÓN POR SECTOR
+# =============================================
+def agregar_por_sector(df_priorizado):
+    """
+    Resume pérdidas, impacto monetario y número de transformadores por sector
+    """
+    df_sector = df_priorizado.groupby('Sector').agg({
+        'kWh_Perdido': 'sum',
+        'Perdida_%': 'mean',
+        'Perdida_Monetaria_RD$': 'sum',
+        'ID_Trafo': 'count'
+    }).reset_index()
+    df_sector.columns = ['Sector', 'kWh_Perdido_Total', 'Perdida_%_Promedio', 'Impacto_Monetario', 'Num_Transformadores']
+    return df_sector.sort_values('kWh_Perdido_Total', ascending=False)
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+from puntorojo.espacial import distancia_haversine_km
+
+# =============================================
+# PARÁMETROS DE CUADRILLAS
+# =============================================
+HORAS_JORNADA = 8.0
+HORAS_SERVICIO = 0.75  # tiempo de intervención por transformador
+VELOCIDAD_KMH = 30.0
+# Las calles no siguen la línea recta: km de ruta por km en línea recta
+FACTOR_RUTA = 1.3
+
+TOP_K_RUTAS = 500
+
+
+def matriz_distancias(lat, lon):
+    """
+    Matriz de distancias haversine (km) entre todos los puntos, vectorizada (float32)
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    return distancia_haversine_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :]).astype(np.float32)
+
+
+def _longitud_ruta(ruta, distancias):
+    return float(distancias[ruta[:-1], ruta[1:]].sum())
+
+
+def mejorar_2opt(ruta, distancias, max_iteraciones=1000):
+    """
+    Mejora una ruta cerrada (empieza y termina en la base) invirtiendo tramos.
+
+    En cada iteración evalúa a la vez todos los pares (i, j) de aristas con
+    NumPy y aplica la inversión de mayor ahorro, hasta que ninguna mejora.
+    """
+    ruta = np.asarray(ruta)
+    n = len(ruta)
+    if n < 5:
+        return ruta
+
+    i, j = np.triu_indices(n - 1, k=2)
+    for _ in range(max_iteraciones):
+        a, b = ruta[i], ruta[i + 1]
+        c, d = ruta[j], ruta[j + 1]
+        ahorro = distancias[a, b] + distancias[c, d] - distancias[a, c] - distancias[b, d]
+        mejor = int(np.argmax(ahorro))
+        if ahorro[mejor] <= 1e-9:
+            break
+        ruta = np.concatenate([ruta[:i[mejor] + 1], ruta[i[mejor] + 1:j[mejor] + 1][::-1], ruta[j[mejor] + 1:]])
+    return ruta
+
+
+def _construir_ruta(distancias, score, disponibles, horas_jornada, horas_servicio, velocidad_kmh):
+    """
+    Ruta de una jornada desde la base (índice 0) por inserción voraz.
+
+    En cada paso elige, entre los transformadores alcanzables con tiempo
+    para volver a la base, el de mayor score por hora (score / (viaje +
+    servicio)). Al cerrar la jornada aplica 2-opt y, con el tiempo
+    ahorrado, intenta añadir más paradas.
+    """
+    horas_por_km = FACTOR_RUTA / velocidad_kmh
+    ruta = [0]
+    tiempo = 0.0
+    candidatos = disponibles.copy()
+
+    while True:
+        actual = ruta[-1]
+        if candidatos.any():
+            idx = np.flatnonzero(candidatos)
+            viaje = distancias[actual, idx] * horas_por_km
+            regreso = distancias[idx, 0] * horas_por_km
+            factible = tiempo + viaje + horas_servicio + regreso <= horas_jornada
+            if factible.any():
+                idx, viaje = idx[factible], viaje[factible]
+                elegido = int(np.argmax(score[idx] / (viaje + horas_servicio)))
+                ruta.append(idx[elegido])
+                candidatos[idx[elegido]] = False
+                tiempo += viaje[elegido] + horas_servicio
+                continue
+
+        # Sin más paradas factibles: optimizar el orden y reintentar con el tiempo ahorrado
+        cerrada = mejorar_2opt(np.array(ruta + [0]), distancias)
+        paradas = len(cerrada) - 2
+        tiempo_optimizado = _longitud_ruta(cerrada[:-1], distancias) * horas_por_km + paradas * horas_servicio
+        if tiempo_optimizado < tiempo - 1e-9 and candidatos.any():
+            ruta = list(cerrada[:-1])
+            tiempo = tiempo_optimizado
+            continue
+        return cerrada
+
+
+def planificar_rutas(df_priorizado, cuadrillas, dias=1, base=None, top_k=TOP_K_RUTAS,
+                     horas_jornada=HORAS_JORNADA, horas_servicio=HORAS_SERVICIO, velocidad_kmh=VELOCIDAD_KMH):
+    """
+    Rutas diarias de cuadrillas sobre los top-K transformadores por Prioridad_Score.
+
+    Cada ruta sale de la base y regresa a ella dentro de la jornada. Las rutas
+    se construyen una tras otra (día 1: cuadrilla 1, 2, ...; luego día 2) con
+    la heurística voraz de score por hora más 2-opt, sin repetir
+    transformadores. Las distancias son haversine (x FACTOR_RUTA) y se
+    calculan una sola vez como matriz.
+
+    Devuelve (df_paradas, df_resumen): las paradas en orden de visita con la
+    hora estimada de llegada, y un resumen por ruta con km, horas, score
+    cubierto y score por hora.
+    """
+    candidatos = df_priorizado.dropna(subset=['Latitud', 'Longitud', 'Prioridad_Score'])
+    candidatos = candidatos.nlargest(top_k, 'Prioridad_Score')
+    if base is None:
+        base = (candidatos['Latitud'].mean(), candidatos['Longitud'].mean())
+
+    lat = np.r_[base[0], candidatos['Latitud'].to_numpy(dtype=float)]
+    lon = np.r_[base[1], candidatos['Longitud'].to_numpy(dtype=float)]
+    distancias = matriz_distancias(lat, lon)
+    score = np.r_[0.0, candidatos['Prioridad_Score'].to_numpy(dtype=float)]
+    disponibles = np.ones(len(lat), dtype=bool)
+    disponibles[0] = False
+    horas_por_km = FACTOR_RUTA / velocidad_kmh
+
+    paradas, resumen = [], []
+    for dia in range(1, dias + 1):
+        for cuadrilla in range(1, cuadrillas + 1):
+            if not disponibles.any():
+                break
+            ruta = _construir_ruta(distancias, score, disponibles, horas_jornada, horas_servicio, velocidad_kmh)
+            visitas = ruta[1:-1]
+            if len(visitas) == 0:
+                continue
+            disponibles[visitas] = False
+
+            tramos_km = distancias[ruta[:-1], ruta[1:]] * FACTOR_RUTA
+            llegada = np.cumsum(tramos_km[:-1] / velocidad_kmh + np.r_[0.0, np.full(len(visitas) - 1, horas_servicio)])
+            horas = float(tramos_km.sum() / velocidad_kmh + len(visitas) * horas_servicio)
+
+            filas = candidatos.iloc[visitas - 1]
+            paradas.append(pd.DataFrame({
+                'Dia': dia,
+                'Cuadrilla': cuadrilla,
+                'Orden': np.arange(1, len(visitas) + 1),
+                'ID_Trafo': filas['ID_Trafo'].to_numpy(),
+                'Sector': filas['Sector'].to_numpy(),
+                'Latitud': filas['Latitud'].to_numpy(),
+                'Longitud': filas['Longitud'].to_numpy(),
+                'Prioridad_Score': filas['Prioridad_Score'].to_numpy(),
+                'Tramo_km': tramos_km[:-1],
+                'Hora_Llegada': llegada
+            }))
+            resumen.append({
+                'Dia': dia,
+                'Cuadrilla': cuadrilla,
+                'Paradas': len(visitas),
+                'Distancia_km': float(tramos_km.sum()),
+                'Horas': horas,
+                'Score_Cubierto': float(score[visitas].sum()),
+                'Score_por_Hora': float(score[visitas].sum()) / horas
+            })
+
+    if not paradas:
+        return pd.DataFrame(), pd.DataFrame()
+    return pd.concat(paradas, ignore_index=True), pd.DataFrame(resumen)
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+from puntorojo.ingesta import resolver_columnas
+from puntorojo.motor import leer_tabla
+
+# =============================================
+# HISTORIAL MENSUAL POR TRANSFORMADOR
+# =============================================
+COLUMNAS_HISTORIAL = ['ID_Trafo', 'Periodo', 'kWh_Entregado', 'kWh_Facturado']
+
+# Ventanas en meses: pérdida móvil y pendiente de tendencia
+VENTANA_MOVIL = 3
+VENTANA_TENDENCIA = 12
+
+# Factor de tendencia del score: puntos máximos y valor que los satura
+PESO_SALTO = 10
+SALTO_SATURACION_PP = 20  # puntos porcentuales de pérdida de un mes a otro
+PESO_TENDENCIA = 5
+TENDENCIA_SATURACION_PP = 2  # puntos porcentuales por mes
+
+COLUMNAS_TENDENCIA = ['Perdida_%_Movil', 'Tendencia_pp_Mes', 'Salto_pp', 'Meses_Historial', 'Score_Tendencia']
+
+
+def leer_historial(archivo):
+    """
+    Lee un archivo de lecturas mensuales (una fila por transformador y periodo)
+    """
+    df = leer_tabla(archivo)
+    mapa_columnas = resolver_columnas(df.columns, COLUMNAS_HISTORIAL)
+    return preparar_historial(df.rename(columns=mapa_columnas)[COLUMNAS_HISTORIAL])
+
+
+def preparar_historial(df):
+    """
+    Convierte las lecturas a un almacén compacto indexado por periodo.
+
+    ID_Trafo pasa a categórico y Periodo a un entero de mes (año*12 + mes).
+    Las lecturas repetidas de un mismo transformador y mes se suman y el
+    resultado queda ordenado por (ID_Trafo, Mes), de modo que la historia de
+    cada transformador es un tramo contiguo. Un mes sin ninguna lectura de
+    energía válida queda en NaN (no en 0), y metricas_historial lo excluye.
+    """
+    periodos = pd.to_datetime(df['Periodo'], errors='coerce')
+    historial = pd.DataFrame({
+        'ID_Trafo': df['ID_Trafo'].astype(str).astype('category'),
+        'Mes': (periodos.dt.year * 12 + periodos.dt.month - 1).astype('Int32'),
+        'kWh_Entregado': pd.to_numeric(df['kWh_Entregado'], errors='coerce').astype(np.float64),
+        'kWh_Facturado': pd.to_numeric(df['kWh_Facturado'], errors='coerce').astype(np.float64)
+    }).dropna(subset=['Mes'])
+    historial['Mes'] = historial['Mes'].astype(np.int32)
+
+    return historial.groupby(['ID_Trafo', 'Mes'], observed=True, sort=True).sum(min_count=1).reset_index()
+
+
+def _suma_ventana(valores, inicios, fines):
+    """
+    Suma de valores[inicio:fin] para cada par (inicio, fin), vía suma acumulada
+    """
+    acumulado = np.concatenate([[0.0], np.cumsum(valores)])
+    return acumulado[fines] - acumulado[inicios]
+
+
+def metricas_historial(historial, ventana=VENTANA_MOVIL, ventana_tendencia=VENTANA_TENDENCIA):
+    """
+    Métricas de serie temporal por transformador al último periodo del historial.
+
+    Todas las ventanas terminan en el último mes del conjunto de datos, no en
+    la última lectura de cada transformador: uno que dejó de reportar no
+    arrastra un salto o una tendencia de meses atrás. Se calculan de una vez
+    sobre el historial ordenado: cada fila se codifica como clave =
+    código_trafo * paso + mes, de modo que los límites de la ventana de cada
+    transformador se obtienen con una búsqueda binaria y las sumas con sumas
+    acumuladas. Las ventanas son por calendario (un mes sin lectura no
+    alarga la ventana) y los meses sin energía válida no cuentan.
+
+    - Perdida_%_Movil: pérdida de los últimos `ventana` meses (sumas de energía)
+    - Tendencia_pp_Mes: pendiente de mínimos cuadrados de Perdida_% en los
+      últimos `ventana_tendencia` meses
+    - Salto_pp: variación de Perdida_% del último mes respecto al anterior
+      (NaN si falta cualquiera de los dos)
+    - Meses_Historial: meses con lectura
+    """
+    codigos = historial['ID_Trafo'].cat.codes.to_numpy().astype(np.int64)
+    mes = historial['Mes'].to_numpy().astype(np.int64)
+    if len(mes) == 0:
+        return pd.DataFrame(columns=['ID_Trafo'] + COLUMNAS_TENDENCIA[:-1])
+
+    mes = mes - mes.min()
+    final = int(mes.max())
+    paso = final + max(ventana, ventana_tendencia) + 1
+    clave = codigos * paso + mes
+
+    entregado = historial['kWh_Entregado'].to_numpy(dtype=float)
+    perdido = entregado - historial['kWh_Facturado'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        perdida_pct = perdido / entregado * 100
+    validas = np.isfinite(perdida_pct)
+
+    # Tramo de cada transformador y clave de su fila en el último mes del conjunto
+    ultimas = np.flatnonzero(np.r_[codigos[1:] != codigos[:-1], True])
+    primeras = np.r_[0, ultimas[:-1] + 1]
+    clave_final = codigos[ultimas] * paso + final
+    fines = np.searchsorted(clave, clave_final, side='right')
+
+    # Pérdida móvil: sumas de energía en la ventana
+    inicios = np.searchsorted(clave, clave_final - ventana + 1, side='left')
+    validas_energia = np.isfinite(perdido) & np.isfinite(entregado)
+    suma_perdido = _suma_ventana(np.where(validas_energia, perdido, 0.0), inicios, fines)
+    suma_entregado = _suma_ventana(np.where(validas_energia, entregado, 0.0), inicios, fines)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        perdida_movil = suma_perdido / suma_entregado * 100
+
+    # Tendencia: regresión lineal de Perdida_% sobre el mes en la ventana
+    inicios_t = np.searchsorted(clave, clave_final - ventana_tendencia + 1, side='left')
+    x = np.where(validas, mes, 0).astype(float)
+    y = np.where(validas, perdida_pct, 0.0)
+    n = _suma_ventana(validas.astype(float), inicios_t, fines)
+    sx, sy = _suma_ventana(x, inicios_t, fines), _suma_ventana(y, inicios_t, fines)
+    sxx, sxy = _suma_ventana(x * x, inicios_t, fines), _suma_ventana(x * y, inicios_t, fines)
+    denominador = n * sxx - sx * sx
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tendencia = np.where(denominador > 0, (n * sxy - sx * sy) / denominador, np.nan)
+
+    # Salto: sólo si el transformador tiene lectura en el último mes y en el anterior
+    actual, anterior = fines - 1, np.maximum(fines - 2, 0)
+    consecutiva = (clave[actual] == clave_final) & (clave[anterior] == clave_final - 1)
+    salto = np.where(consecutiva, perdida_pct[actual] - perdida_pct[anterior], np.nan)
+
+    return pd.DataFrame({
+        'ID_Trafo': historial['ID_Trafo'].to_numpy()[ultimas].astype(str),
+        'Perdida_%_Movil': perdida_movil,
+        'Tendencia_pp_Mes': tendencia,
+        'Salto_pp': salto,
+        'Meses_Historial': np.add.reduceat(validas.astype(np.int64), primeras)
+    })
+
+
+def score_tendencia(salto, tendencia):
+    """
+    Factor de tendencia del score (0-15): saltos y pendientes al alza de la pérdida
+    """
+    salto = np.nan_to_num(np.asarray(salto, dtype=float), nan=0.0)
+    tendencia = np.nan_to_num(np.asarray(tendencia, dtype=float), nan=0.0)
+    return (
+        np.clip(salto / SALTO_SATURACION_PP, 0, 1) * PESO_SALTO +
+        np.clip(tendencia / TENDENCIA_SATURACION_PP, 0, 1) * PESO_TENDENCIA
+    )
+
+
+def incorporar_tendencias(df, metricas):
+    """
+    Añade al dataset las métricas de historial y el factor Score_Tendencia.
+
+    calcular_prioridades suma Score_Tendencia a Prioridad_Score cuando la
+    columna está presente. Los transformadores sin historial reciben 0.
+    """
+    df = df.drop(columns=COLUMNAS_TENDENCIA, errors='ignore')
+    metricas = metricas.set_index('ID_Trafo')
+    claves = df['ID_Trafo'].astype(str)
+    for col in COLUMNAS_TENDENCIA[:-1]:
+        df[col] = claves.map(metricas[col]).to_numpy()
+    df['Meses_Historial'] = df['Meses_Historial'].fillna(0).astype(np.int64)
+    df['Score_Tendencia'] = score_tendencia(df['Salto_pp'], df['Tendencia_pp_Mes'])
+    return df
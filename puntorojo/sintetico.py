@@ -0,0 +1,186 @@
+"""
+Generador de datasets sintéticos a escala (10 mil a 5 millones de transformadores).
+
+Reparte los transformadores alrededor de los centroides de los sectores de
+los datos de demostración, con una distribución de pérdida propia de cada
+sector, y escribe fixtures CSV, XLSX o Parquet con las columnas de entrada
+que espera el motor. El resultado es determinista para una semilla dada.
+
+Uso:
+    python -m puntorojo.sintetico SALIDA [--filas 10000 100000] [--formato csv xlsx parquet] [--semilla 0]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from puntorojo.excel import exportar_xlsx
+from puntorojo.ingesta import COLUMNAS_REQUERIDAS, FACTOR_CARGA, HORAS_MES, RANGOS_VALIDOS
+
+# =============================================
+# PERFILES DE SECTOR
+# =============================================
+# Sector -> (latitud, longitud, dispersión en grados, participación en el
+# total, pérdida media (fracción), carga mediana (fracción de la nominal)).
+# Los centroides salen de los datos de demostración. Pérdidas y cargas están
+# calibradas para una red realista: ~28% de pérdida global, ~16% de
+# transformadores sobrecargados y ~6% en categoría CRÍTICA, de modo que la
+# vista previa por muestreo (que incluye todos los CRÍTICA) se ejercita con
+# una muestra pequeña.
+PERFILES_SECTOR = {
+    'Gazcue': (18.4714, -69.9289, 0.010, 0.10, 0.18, 0.65),
+    'Ensanche Luperón': (18.4967, -69.9095, 0.012, 0.14, 0.30, 0.70),
+    'San Isidro': (18.4565, -69.7106, 0.015, 0.14, 0.32, 0.70),
+    'San Isidro Labrador': (18.4406, -69.7266, 0.012, 0.10, 0.24, 0.65),
+    'Boca Chica': (18.4495, -69.6106, 0.015, 0.10, 0.26, 0.70),
+    'San Pedro de Macorís': (18.4555, -69.2948, 0.025, 0.17, 0.28, 0.75),
+    'Santo Domingo Este': (18.4856, -69.8456, 0.030, 0.25, 0.27, 0.72)
+}
+
+CAPACIDADES_KVA = [75, 150, 225, 300, 500]
+PROBABILIDAD_CAPACIDAD = [0.10, 0.30, 0.30, 0.25, 0.05]
+
+# Concentración de la beta de pérdida (mayor = menos dispersión alrededor de la media del sector)
+CONCENTRACION_PERDIDA = 8.0
+# Dispersión (log) de la carga alrededor de la mediana del sector
+SIGMA_CARGA = 0.35
+# Fracción de transformadores con pérdida extrema (fraude masivo o medición dañada)
+FRACCION_ATIPICOS = 0.01
+
+FILAS_POR_BLOQUE = 500_000
+# Filas de datos que admite una hoja de Excel (sin el encabezado)
+MAX_FILAS_XLSX = 1_048_575
+
+FORMATOS_FIXTURE = ('csv', 'xlsx', 'parquet')
+# Versión de la distribución generada: forma parte del nombre de los fixtures
+# para que un cambio de perfiles no reutilice archivos ya escritos
+VERSION_FIXTURE = 2
+
+
+def _generar_bloque(inicio, n, semilla):
+    """
+    Transformadores [inicio, inicio + n): cada bloque usa su propio generador, derivado de (semilla, inicio)
+    """
+    rng = np.random.default_rng([semilla, inicio])
+    sectores = list(PERFILES_SECTOR)
+    lat, lon, dispersion, participacion, perdida_media, carga_mediana = (
+        np.array(v) for v in zip(*PERFILES_SECTOR.values())
+    )
+    codigo = rng.choice(len(sectores), size=n, p=participacion / participacion.sum())
+
+    (lat_min, lat_max), (lon_min, lon_max) = RANGOS_VALIDOS['Latitud'], RANGOS_VALIDOS['Longitud']
+    latitud = np.clip(lat[codigo] + rng.normal(0, dispersion[codigo]), lat_min, lat_max)
+    longitud = np.clip(lon[codigo] + rng.normal(0, dispersion[codigo]), lon_min, lon_max)
+
+    capacidad = rng.choice(CAPACIDADES_KVA, size=n, p=PROBABILIDAD_CAPACIDAD)
+    carga = carga_mediana[codigo] * np.exp(rng.normal(0, SIGMA_CARGA, size=n))
+    entregado = np.round(capacidad * HORAS_MES * FACTOR_CARGA * carga)
+
+    media = perdida_media[codigo]
+    perdida = rng.beta(media * CONCENTRACION_PERDIDA, (1 - media) * CONCENTRACION_PERDIDA)
+    atipico = rng.random(n) < FRACCION_ATIPICOS
+    perdida[atipico] = rng.uniform(0.80, 0.95, size=atipico.sum())
+
+    return pd.DataFrame({
+        'ID_Trafo': 'TF-' + pd.Series(np.arange(inicio, inicio + n)).astype(str).str.zfill(7),
+        'Sector': np.array(sectores, dtype=object)[codigo],
+        'Latitud': latitud.round(6),
+        'Longitud': longitud.round(6),
+        'Capacidad_kVA': capacidad,
+        'kWh_Entregado': entregado,
+        'kWh_Facturado': np.round(entregado * (1 - perdida))
+    })[list(COLUMNAS_REQUERIDAS)]
+
+
+def generar_bloques(n, semilla=0, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Genera los n transformadores en bloques de `filas_por_bloque` filas (memoria acotada)
+    """
+    for inicio in range(0, n, filas_por_bloque):
+        yield _generar_bloque(inicio, min(filas_por_bloque, n - inicio), semilla)
+
+
+def generar_transformadores(n, semilla=0):
+    """
+    Dataset sintético de n transformadores con las columnas de entrada del motor (sin métricas)
+    """
+    return pd.concat(generar_bloques(n, semilla), ignore_index=True)
+
+
+def escribir_fixture(ruta, n, semilla=0):
+    """
+    Escribe n transformadores en `ruta`; el formato sale de la extensión (.csv, .xlsx o .parquet).
+
+    CSV y Parquet se escriben por bloques. XLSX se limita a una hoja
+    (MAX_FILAS_XLSX filas). Devuelve el tamaño del archivo en bytes.
+    """
+    formato = os.path.splitext(ruta)[1].lower().lstrip('.')
+    if formato not in FORMATOS_FIXTURE:
+        raise ValueError(f"Formato de fixture no soportado: {ruta}")
+    if formato == 'xlsx' and n > MAX_FILAS_XLSX:
+        raise ValueError(f"Una hoja XLSX admite hasta {MAX_FILAS_XLSX:,} filas; use CSV o Parquet para {n:,}")
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+
+    if formato == 'csv':
+        for i, bloque in enumerate(generar_bloques(n, semilla)):
+            bloque.to_csv(ruta, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    elif formato == 'parquet':
+        escritor = None
+        try:
+            for bloque in generar_bloques(n, semilla):
+                tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+                if escritor is None:
+                    escritor = pq.ParquetWriter(ruta, tabla.schema, compression='zstd')
+                escritor.write_table(tabla)
+        finally:
+            if escritor is not None:
+                escritor.close()
+    else:
+        with open(ruta, 'wb') as f:
+            f.write(exportar_xlsx({'Datos': generar_transformadores(n, semilla)}))
+    return os.path.getsize(ruta)
+
+
+def ruta_fixture(directorio, n, formato, semilla=0):
+    """
+    Nombre canónico de un fixture: sintetico_v<versión>_<n>_s<semilla>.<formato>
+    """
+    return os.path.join(directorio, f"sintetico_v{VERSION_FIXTURE}_{n}_s{semilla}.{formato}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m puntorojo.sintetico',
+        description='Genera fixtures sintéticos de transformadores a escala'
+    )
+    parser.add_argument('salida', help='Directorio donde se escriben los fixtures')
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--formato', choices=FORMATOS_FIXTURE, nargs='+', default=['csv', 'parquet'])
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    errores = 0
+    for n in args.filas:
+        for formato in args.formato:
+            ruta = ruta_fixture(args.salida, n, formato, args.semilla)
+            inicio = time.perf_counter()
+            try:
+                tamano = escribir_fixture(ruta, n, args.semilla)
+            except ValueError as e:
+                print(f"❌ {os.path.basename(ruta)}: {e}", file=sys.stderr)
+                errores += 1
+                continue
+            print(f"✅ {ruta}: {n:,} transformadores, {tamano / 1e6:.1f} MB ({time.perf_counter() - inicio:.2f} s)")
+
+    return 1 if errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())